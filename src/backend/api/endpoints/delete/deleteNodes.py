@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.nodeCache import get_node_cache
+from store.storeFactory import get_store
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 class SingleNodeDelete(BaseModel):
     label: str
@@ -15,26 +17,14 @@ class MultipleNodesDelete(BaseModel):
     identifier_values: List[str]
 
 
-def get_identifier_key(label: str) -> str:
-    if label == "Review":
-        return "title"
-    else:
-        return "name"
-
-
 @router.delete("/delete_node", tags=["nodes"])
-def delete_single_node(request: SingleNodeDelete):
+async def delete_single_node(request: SingleNodeDelete, store=Depends(get_store), cache=Depends(get_node_cache),
+                             recommendations=Depends(get_recommendations)):
     identifier_key = get_identifier_key(request.label)
-    query = f"""
-    MATCH (n:{request.label} {{{identifier_key}: $identifier_value}})
-    DETACH DELETE n
-    RETURN count(n) AS deleted_count
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_value=request.identifier_value)
-        deleted_count = result.single()["deleted_count"]
-    
+    deleted_count = await store.delete_nodes(request.label, identifier_key, [request.identifier_value])
+    cache.invalidate(request.label, [request.identifier_value])
+    recommendations.nodes_deleted(request.label, [request.identifier_value])
+
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Node not found")
 
@@ -42,17 +32,11 @@ def delete_single_node(request: SingleNodeDelete):
 
 
 @router.delete("/delete_nodes", tags=["nodes"])
-def delete_multiple_nodes(request: MultipleNodesDelete):
+async def delete_multiple_nodes(request: MultipleNodesDelete, store=Depends(get_store), cache=Depends(get_node_cache),
+                                recommendations=Depends(get_recommendations)):
     identifier_key = get_identifier_key(request.label)
-    query = f"""
-    MATCH (n:{request.label})
-    WHERE n.{identifier_key} IN $identifier_values
-    DETACH DELETE n
-    RETURN count(n) AS deleted_count
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_values=request.identifier_values)
-        deleted_count = result.single()["deleted_count"]
+    deleted_count = await store.delete_nodes(request.label, identifier_key, request.identifier_values)
+    cache.invalidate(request.label, request.identifier_values)
+    recommendations.nodes_deleted(request.label, request.identifier_values)
 
     return {"message": f"{deleted_count} node(s) deleted successfully"}
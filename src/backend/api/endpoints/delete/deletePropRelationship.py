@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.graphStore import RelationshipSpec
+from store.storeFactory import get_store
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 class RemovePropertiesFromSingleRelationship(BaseModel):
     from_label: str
@@ -21,49 +23,32 @@ class RemovePropertiesFromMultipleRelationships(BaseModel):
     pairs: List[List[str]]  # Cada sublista es ["from_identifier", "to_identifier"]
     properties: List[str]
 
-def get_identifier_key(label: str) -> str:
-    return "title" if label == "Review" else "name"
 
 @router.delete("/remove_properties_from_relationship", tags=["relationships"])
-def remove_properties_from_relationship(request: RemovePropertiesFromSingleRelationship):
+async def remove_properties_from_relationship(request: RemovePropertiesFromSingleRelationship, store=Depends(get_store),
+                                              recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    remove_statements = " ".join([f"REMOVE r.{prop}" for prop in request.properties])
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    relationship = await store.update_relationship(spec, request.from_identifier, request.to_identifier, remove_props=request.properties)
 
-    query = f"""
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = $from_identifier AND b.{to_key} = $to_identifier
-    {remove_statements}
-    RETURN r
-    """
-
-    with driver.session() as session:
-        result = session.run(query, from_identifier=request.from_identifier, to_identifier=request.to_identifier)
-        record = result.single()
-
-    if not record:
+    if relationship is None:
         raise HTTPException(status_code=404, detail="Relationship not found")
+    recommendations.relationships_updated(request.from_label, request.relationship_type, request.to_label,
+                                          [(request.from_identifier, request.to_identifier)], remove_props=request.properties)
 
-    return {"message": "Properties removed successfully", "updated_relationship": record["r"]}
+    return {"message": "Properties removed successfully", "updated_relationship": relationship}
 
 @router.delete("/remove_properties_from_multiple_relationships", tags=["relationships"])
-def remove_properties_from_multiple_relationships(request: RemovePropertiesFromMultipleRelationships):
+async def remove_properties_from_multiple_relationships(request: RemovePropertiesFromMultipleRelationships, store=Depends(get_store),
+                                                        recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    remove_statements = " ".join([f"REMOVE r.{prop}" for prop in request.properties])
-
-    query = f"""
-    UNWIND $pairs AS pair
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = pair[0] AND b.{to_key} = pair[1]
-    {remove_statements}
-    RETURN count(r) AS updated_count
-    """
-
-    with driver.session() as session:
-        result = session.run(query, pairs=request.pairs)
-        updated_count = result.single()["updated_count"]
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    updated_count = await store.update_relationships(spec, request.pairs, remove_props=request.properties)
+    recommendations.relationships_updated(request.from_label, request.relationship_type, request.to_label,
+                                          request.pairs, remove_props=request.properties)
 
     return {"message": f"{updated_count} relationship(s) updated successfully"}
\ No newline at end of file
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Tuple
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.graphStore import RelationshipSpec
+from store.storeFactory import get_store
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 class SingleRelationshipDelete(BaseModel):
     from_label: str
@@ -20,25 +22,15 @@ class MultipleRelationshipsDelete(BaseModel):
     pairs: List[Tuple[str, str]]  # Lista de (from_identifier, to_identifier)
 
 
-def get_identifier_key(label: str) -> str:
-    return "title" if label == "Review" else "name"
-
-
 @router.delete("/delete_relationship", tags=["relationships"])
-def delete_single_relationship(request: SingleRelationshipDelete):
+async def delete_single_relationship(request: SingleRelationshipDelete, store=Depends(get_store), recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    query = f"""
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = $from_identifier AND b.{to_key} = $to_identifier
-    DELETE r
-    RETURN count(r) AS deleted_count
-    """
-
-    with driver.session() as session:
-        result = session.run(query, from_identifier=request.from_identifier, to_identifier=request.to_identifier)
-        deleted_count = result.single()["deleted_count"]
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    deleted_count = await store.delete_relationships(spec, [(request.from_identifier, request.to_identifier)])
+    recommendations.relationships_deleted(request.from_label, request.relationship_type, request.to_label,
+                                          [(request.from_identifier, request.to_identifier)])
 
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Relationship not found")
@@ -47,20 +39,12 @@ def delete_single_relationship(request: SingleRelationshipDelete):
 
 
 @router.delete("/delete_relationships", tags=["relationships"])
-def delete_multiple_relationships(request: MultipleRelationshipsDelete):
+async def delete_multiple_relationships(request: MultipleRelationshipsDelete, store=Depends(get_store), recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    query = f"""
-    UNWIND $pairs AS pair
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = pair[0] AND b.{to_key} = pair[1]
-    DELETE r
-    RETURN count(r) AS deleted_count
-    """
-
-    with driver.session() as session:
-        result = session.run(query, pairs=request.pairs)
-        deleted_count = result.single()["deleted_count"]
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    deleted_count = await store.delete_relationships(spec, request.pairs)
+    recommendations.relationships_deleted(request.from_label, request.relationship_type, request.to_label, request.pairs)
 
     return {"message": f"{deleted_count} relationship(s) deleted successfully"}
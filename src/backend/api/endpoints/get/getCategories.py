@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from recommendations.providerRanking import RANKING_WEIGHTS
+from recommendations.recommendationIndex import get_recommendations
+from utils.jsonResponse import FastJSONResponse
+
+router = APIRouter()
+
+
+@router.get("/{name}/top-providers", tags=["categories"])
+async def get_top_providers(
+    name: str,
+    k: int = Query(10, ge=1, le=100, description="Cantidad de proveedores a retornar"),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Mejores proveedores de la categoría: combina su `association_level` con la categoría,
+    el `stock` con el que surten componentes de la categoría y la `satisfaction` de las
+    reseñas de esos componentes (aporte de cada señal en `signals`, pesos en `weights`).
+    Se responde desde un ranking por categoría en memoria que se mantiene con cada escritura.
+    """
+    result = await recommendations.provider_ranking.top(name, k)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return FastJSONResponse(dict(result, weights=RANKING_WEIGHTS))
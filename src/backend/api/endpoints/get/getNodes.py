@@ -1,168 +1,289 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, Dict, Any, List
-from utils.dbConnection import get_neo4j_driver
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, List, AsyncIterator
+from store.aggregates import AVAILABLE_STATS, DEFAULT_PERCENTILES, percentile_key
+from store.graphStore import Predicate
+from store.nodeCache import get_node_cache, project
+from store.schemaCatalog import get_schema_catalog
+from store.storeFactory import get_store
+from utils.filters import check_identifier, convert_value, parse_fields, parse_filters
+from utils.jsonResponse import FastJSONResponse, dumps
+from utils.labelRegistry import LABELS, get_identifier_key
+from utils.pagination import ELEMENT_ID, decode_cursor, encode_cursor
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
-@router.get("/", tags=["nodes"])  
-def get_nodes(
+# Tamaño aproximado (en bytes) de cada bloque enviado en el streaming NDJSON
+NDJSON_CHUNK_SIZE = 64 * 1024
+
+# Máximo de elementos por petición de `POST /nodes/batch`
+MAX_BATCH_ITEMS = 5000
+
+FIELDS_DESCRIPTION = "Propiedades a retornar de cada nodo (repetible o separadas por coma), por ejemplo `name,price`"
+
+async def ndjson_lines(nodes: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Serializa los nodos como NDJSON a medida que el store los entrega,
+    agrupando líneas en bloques para no enviar un mensaje por nodo.
+    """
+    buffer, size = [], 0
+    async for node in nodes:
+        line = dumps(node) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= NDJSON_CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+async def cached_node(store, cache, label: str, value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Nodo completo del label con ese identificador, desde la caché o desde el store.
+    """
+    node = cache.get(label, value)
+    if node is None:
+        generation = cache.generation
+        node = await store.get_node(label, get_identifier_key(label), value)
+        if node is not None:
+            cache.put(label, node, generation)
+    return node
+
+@router.get("/", tags=["nodes"])
+async def get_nodes(
     label: Optional[str] = Query(None, description="Etiqueta del nodo, por ejemplo 'Component'"),
     prop: Optional[str] = Query(None, description="Nombre de la propiedad a filtrar, por ejemplo 'price'"),
-    value: Optional[str] = Query(None, description="Valor de la propiedad para el filtro")
+    value: Optional[str] = Query(None, description="Valor de la propiedad para el filtro"),
+    filter: Optional[List[str]] = Query(None, description="Filtros `<propiedad>:<operador>:<valor>`, por ejemplo `price:between:100,500` (ver utils/filters.py)"),
+    order_by: Optional[str] = Query(None, description="Propiedad para ordenar; con `-` al inicio es descendente (por ejemplo `-popularity`)"),
+    limit: int = Query(100, ge=1, le=1000, description="Máximo de nodos sin paginación (top-k con `order_by`)"),
+    page_size: Optional[int] = Query(None, ge=1, le=1000, description="Nodos por página; activa la paginación por cursor"),
+    cursor: Optional[str] = Query(None, description="Valor `next_cursor` de la página anterior"),
+    stream: bool = Query(False, description="Envía todos los nodos como NDJSON (uno por línea) a medida que llegan"),
+    fields: Optional[List[str]] = Query(None, description=FIELDS_DESCRIPTION),
+    store=Depends(get_store),
+    catalog=Depends(get_schema_catalog),
+    cache=Depends(get_node_cache)
 ):
     """
     Retorna nodos filtrados:
       - Si se pasan parámetros (label, prop y value), retorna los nodos que cumplan el filtro.
+      - Con `filter` (repetible) se combinan varias condiciones: eq, ne, gt, gte, lt, lte, between,
+        in y starts_with. Los valores se convierten al tipo de la propiedad según el catálogo del esquema.
+      - Con `order_by` y `limit` retorna los primeros k nodos según esa propiedad.
       - Si no se pasan, retorna una vista general de todos los nodos (limitado a 100 por ejemplo).
+      - Con `page_size` y/o `cursor` retorna `{"items": [...], "next_cursor": ...}`. La paginación es
+        por keyset: sobre el identificador (name/title) si hay label, o sobre el element id si no.
+        Con label solo se recorren los nodos que tienen identificador.
+      - Con `stream=true` retorna todos los nodos en NDJSON sin cargarlos en memoria.
+      - Con `fields` cada nodo trae solo esas propiedades.
+      - Una búsqueda solo por el identificador del label (por ejemplo `prop=name&value=...`)
+        se responde desde la caché de nodos si el nodo está en ella.
     """
-    if label:
-        query = f"MATCH (n:{label})"
-    else:
-        query = "MATCH (n)"
-
+    fields = parse_fields(fields)
+    # El catálogo solo hace falta para convertir los valores de los filtros
+    property_types = await catalog.property_types(label) if filter or (prop and value) else {}
+    predicates = parse_filters(filter, property_types)
     if prop and value:
-        try:
-            if "." in value: 
-                value = float(value)
-            else:  
-                value = int(value)
-        except ValueError:
-            pass  
-
-        query += f" WHERE n.{prop} = $value"
-    
-    query += " RETURN n LIMIT 100"
-
-    with driver.session() as session:
-        result = session.run(query, value=value)
-        nodes = [record["n"] for record in result]
-
-    return nodes
+        check_identifier(prop)
+        predicates.insert(0, Predicate(prop, "eq", convert_value(value, property_types.get(prop, {}).get("types", ()))))
 
+    paginated = stream or page_size is not None or cursor is not None
+    if order_by and paginated:
+        raise HTTPException(status_code=400, detail="`order_by` solo se combina con `limit`, no con paginación ni streaming.")
 
-def get_numeric_properties(label: str) -> list:
-    """
-    Extrae propiedades numéricas reales (int o float) de un nodo de prueba.
-    Si un label no tiene nodos, lanza un error 404.
-    """
-    query = f"MATCH (n:{label}) RETURN n LIMIT 1"
-
-    with driver.session() as session:
-        result = session.run(query)
-        record = result.single()
-
-        if not record:
-            raise HTTPException(status_code=404, detail=f"No hay nodos con label '{label}'")
+    if stream:
+        return StreamingResponse(ndjson_lines(store.stream_nodes(label, predicates, fields)), media_type="application/x-ndjson")
 
-        node = record["n"]
-        numeric_props = []
+    if not paginated:
+        descending = bool(order_by) and order_by.startswith("-")
+        order_key = check_identifier(order_by.lstrip("-")) if order_by else None
+        if not order_key and len(predicates) == 1 and predicates[0].op == "eq" and cache.is_identifier(label, predicates[0].prop):
+            node = await cached_node(store, cache, label, predicates[0].value)
+            return FastJSONResponse([project(node, fields)] if node is not None else [])
+        nodes = await store.find_nodes(label, predicates, order_by=order_key, descending=descending, limit=limit, fields=fields)
+        return FastJSONResponse(nodes)
 
-        for key, value in dict(node).items():
-            if isinstance(value, (int, float)) and not isinstance(value, bool):
-                numeric_props.append(key)
+    order_key = get_identifier_key(label) if label else None
+    by = order_key or ELEMENT_ID
+    after = decode_cursor(cursor, by)
 
-        return numeric_props
+    nodes, last = await store.page_nodes(label, predicates, order_key=order_key, after=after, page_size=page_size or 100, fields=fields)
+    return FastJSONResponse({"items": nodes, "next_cursor": encode_cursor(by, last) if last is not None else None})
 
 @router.get("/batch", tags=["nodes"])
-def get_nodes_batch(
+async def get_nodes_batch(
     label: str,
     prop: str,
-    values: List[str] = Query(..., description="Lista de valores a buscar")
+    values: List[str] = Query(..., description="Lista de valores a buscar"),
+    fields: Optional[List[str]] = Query(None, description=FIELDS_DESCRIPTION),
+    store=Depends(get_store)
 ):
     """
     Retorna una lista de nodos que coincidan con la label y con alguno de los valores en la propiedad indicada.
     """
-    query = f"""
-    MATCH (n:{label})
-    WHERE n.{prop} IN $values
-    RETURN n
+    return FastJSONResponse(await store.find_nodes_in(label, prop, values, fields=parse_fields(fields)))
+
+class NodeRef(BaseModel):
+    label: str
+    identifier: str  # name, o title para Review
+
+class NodeLookupBatch(BaseModel):
+    items: List[NodeRef]
+    fields: Optional[List[str]] = None
+    common_properties: bool = False  # Calcula las propiedades comunes de los nodos encontrados
+
+def common_properties(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Propiedades que tienen todos los nodos y, de ellas, las que tienen el mismo valor en todos.
+    """
+    if not nodes:
+        return {"keys": [], "shared_values": {}}
+    keys = set(nodes[0]).intersection(*nodes[1:])
+    shared = {key: nodes[0][key] for key in keys if all(node[key] == nodes[0][key] for node in nodes[1:])}
+    return {"keys": sorted(keys), "shared_values": shared}
+
+@router.post("/batch", tags=["nodes"])
+async def get_nodes_by_identifiers(
+    request: NodeLookupBatch,
+    store=Depends(get_store),
+    cache=Depends(get_node_cache)
+):
+    """
+    Busca nodos de distintos labels por su identificador (name/title) en una sola consulta.
+    Retorna `results` en el mismo orden que `items` (`node` es null si no existe) y `missing`.
+    Con `common_properties=true` también retorna las propiedades que comparten los nodos
+    encontrados (`keys`) y las que además tienen el mismo valor en todos (`shared_values`).
     """
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Se permiten como máximo {MAX_BATCH_ITEMS} elementos por petición.")
+    unknown = sorted({item.label for item in request.items if item.label not in LABELS})
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Labels sin identificador registrado: {unknown}. Usa: {list(LABELS)}")
 
-    with driver.session() as session:
-        result = session.run(query, values=values)
-        nodes = [record["n"] for record in result]
+    fields = parse_fields(request.fields)
+    nodes = [cache.get(item.label, item.identifier) for item in request.items]
+    pending = [index for index, node in enumerate(nodes) if node is None]
+    if pending:
+        generation = cache.generation
+        fetched = await store.get_nodes_by_identifiers([(request.items[index].label, request.items[index].identifier) for index in pending])
+        for index, node in zip(pending, fetched):
+            nodes[index] = node
+            if node is not None:
+                cache.put(request.items[index].label, node, generation)
 
-    return nodes
+    results, missing, found = [], [], []
+    for item, node in zip(request.items, nodes):
+        if node is None:
+            missing.append({"label": item.label, "identifier": item.identifier})
+        else:
+            found.append(node)
+        results.append({"label": item.label, "identifier": item.identifier,
+                        "node": project(node, fields) if node is not None else None})
+
+    response = {"results": results, "missing": missing}
+    if request.common_properties:
+        response["common_properties"] = common_properties(found)
+    return FastJSONResponse(response)
 
 @router.get("/aggregates", tags=["nodes"])
-def get_node_aggregates(label: Optional[str] = None) -> Dict[str, Any]:
+async def get_node_aggregates(
+    label: Optional[str] = None,
+    stats: Optional[List[str]] = Query(None, description=f"Estadísticas a calcular: {', '.join(AVAILABLE_STATS)} (por defecto todas)"),
+    properties: Optional[List[str]] = Query(None, description="Propiedades numéricas a incluir (por defecto todas)"),
+    percentiles: Optional[List[float]] = Query(None, description="Percentiles entre 0 y 1 para la estadística 'percentiles'"),
+    store=Depends(get_store),
+    catalog=Depends(get_schema_catalog)
+) -> Dict[str, Any]:
     """
     Devuelve:
     - Total de nodos.
-    - Si hay label, devuelve promedio (avg), media (median) y moda (mode) de propiedades numéricas.
+    - Si hay label, devuelve las estadísticas pedidas de sus propiedades numéricas, calculadas en
+      un solo recorrido: count, avg, min, max, stddev, median, percentiles y moda (mode).
+      Las llaves tienen la forma `<estadística>_<propiedad>` (por ejemplo `avg_price`, `p90_price`).
     """
 
     if label:
-        numeric_props = get_numeric_properties(label)
-
-        if not numeric_props:
-            return {"total_nodes": 0, "message": "No hay propiedades numéricas en este tipo de nodo."}
-
-        # Bloques dinámicos para cada métrica
-        avg_part = ", ".join([f"avg(n.{prop}) AS avg_{prop}" for prop in numeric_props])
-        median_part = ", ".join([f"percentileCont(n.{prop}, 0.5) AS median_{prop}" for prop in numeric_props])
-
-        # Para moda, hacemos un truco: Contamos frecuencia y seleccionamos el más común
-        mode_part_list = []
-        for prop in numeric_props:
-            mode_query = f"""
-            OPTIONAL MATCH (n:{label})
-            WITH n.{prop} AS value
-            WHERE value IS NOT NULL
-            RETURN value, count(*) AS frequency
-            ORDER BY frequency DESC
-            LIMIT 1
-            """
-            mode_part_list.append((prop, mode_query))
-
-        # Consulta principal para count, avg y median
-        query = f"""
-        MATCH (n:{label})
-        RETURN count(n) AS total, {avg_part}, {median_part}
-        """
-
-        response = {}
-
-        with driver.session() as session:
-            result = session.run(query)
-            record = result.single()
-
-            response["total_nodes"] = record["total"]
-            for prop in numeric_props:
-                response[f"avg_{prop}"] = record[f"avg_{prop}"]
-                response[f"median_{prop}"] = record[f"median_{prop}"]
-
-            # Ejecutamos cada consulta de moda individualmente
-            for prop, mode_query in mode_part_list:
-                mode_result = session.run(mode_query)
-                mode_record = mode_result.single()
-                response[f"mode_{prop}"] = mode_record["value"] if mode_record else None
+        stats = stats or list(AVAILABLE_STATS)
+        invalid = [stat for stat in stats if stat not in AVAILABLE_STATS]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Estadísticas inválidas: {invalid}. Usa: {list(AVAILABLE_STATS)}")
+
+        percentiles = percentiles or list(DEFAULT_PERCENTILES)
+        if any(not 0 <= q <= 1 for q in percentiles):
+            raise HTTPException(status_code=400, detail="Los percentiles deben estar entre 0 y 1.")
+
+        # La mediana es el percentil 0.5: se calcula en la misma pasada
+        required = list(percentiles) if "percentiles" in stats else []
+        if "median" in stats and 0.5 not in required:
+            required.append(0.5)
+
+        # Las propiedades numéricas salen del catálogo del esquema, sin muestrear nodos en cada llamada
+        properties = properties or await catalog.numeric_properties(label) or None
+        aggregates = await store.numeric_aggregates(label, properties, percentiles=required, with_mode="mode" in stats)
+
+        if aggregates is None:
+            raise HTTPException(status_code=404, detail=f"No hay nodos con label '{label}'")
+
+        if not aggregates["stats"]:
+            return {"total_nodes": aggregates["total"], "message": "No hay propiedades numéricas en este tipo de nodo."}
+
+        response = {"total_nodes": aggregates["total"]}
+        for stat in stats:
+            for prop, summary in aggregates["stats"].items():
+                if stat == "median":
+                    response[f"median_{prop}"] = summary["percentiles"][0.5]
+                elif stat == "percentiles":
+                    for q in percentiles:
+                        response[f"{percentile_key(q)}_{prop}"] = summary["percentiles"][q]
+                else:
+                    response[f"{stat}_{prop}"] = summary[stat]
 
         return response
 
     else:
-        query = "MATCH (n) RETURN count(n) AS total"
-        with driver.session() as session:
-            result = session.run(query)
-            record = result.single()
-            return {"total_nodes": record["total"]}
+        return {"total_nodes": await store.count_nodes()}
 
 @router.get("/{name}", tags=["nodes"])
-def get_node_by_name(name: str, label: Optional[str] = Query(None, description="Etiqueta del nodo, si se conoce")):
+async def get_node_by_name(
+    name: str,
+    label: Optional[str] = Query(None, description="Etiqueta del nodo, si se conoce"),
+    fields: Optional[List[str]] = Query(None, description=FIELDS_DESCRIPTION),
+    store=Depends(get_store),
+    cache=Depends(get_node_cache)
+):
     """
-    Retorna un nodo específico identificado por su nombre.
-    Si se pasa el parámetro 'label', se restringe la búsqueda a esa etiqueta.
+    Retorna un nodo específico identificado por su nombre (o título, para Review).
+    Si se pasa el parámetro 'label', se restringe la búsqueda a esa etiqueta
+    y el nodo se sirve desde la caché de nodos cuando está en ella.
+    Sin label se busca en todos los labels del registro con sus índices de identificador;
+    si el nombre existe en más de uno responde 409 con `matches` (label y nodo de cada uno).
     """
+    fields = parse_fields(fields)
     if label:
-        query = f"MATCH (n:{label} {{name: $name}}) RETURN n"
-    else:
-        query = "MATCH (n {name: $name}) RETURN n"
-    
-    with driver.session() as session:
-        result = session.run(query, name=name)
-        record = result.single()
-        if not record:
+        key = get_identifier_key(label)
+        if cache.is_identifier(label, key):
+            node = await cached_node(store, cache, label, name)
+            node = project(node, fields) if node is not None else None
+        else:
+            node = await store.get_node(label, key, name, fields=fields)
+        if node is None:
             raise HTTPException(status_code=404, detail="Node not found")
-        return record["n"]
-    
+        return FastJSONResponse(node)
+
+    generation = cache.generation
+    matches = await store.find_by_identifier(name)
+    if not matches:
+        raise HTTPException(status_code=404, detail="Node not found")
+    found_labels = [match["label"] for match in matches]
+    for match in matches:
+        if found_labels.count(match["label"]) == 1:
+            cache.put(match["label"], match["node"], generation)
+
+    if len(matches) > 1:
+        return FastJSONResponse({
+            "detail": f"'{name}' identifica nodos en varios labels; indica `label` para elegir uno.",
+            "matches": [{"label": match["label"], "node": project(match["node"], fields)} for match in matches],
+        }, status_code=409)
+    return FastJSONResponse(project(matches[0]["node"], fields))
@@ -0,0 +1,343 @@
+import datetime
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from recommendations.bundleBuilder import BUNDLE_MAX_HOPS, BUNDLE_SIZE, DEFAULT_BEAM_WIDTH, DEFAULT_HOP_DECAY, DEFAULT_HOPS
+from recommendations.componentEmbeddings import COMPONENT_INDEX_NPROBE, COLD_START_PROPERTIES
+from recommendations.interactionMatrix import METRICS
+from recommendations.personalizedPageRank import (DEFAULT_ALPHA, DEFAULT_MAX_ITERATIONS, DEFAULT_TOLERANCE,
+                                                  PAGERANK_LABELS, PAGERANK_LATENCY_BUDGET_MS, PAGERANK_MAX_BATCH,
+                                                  personalized_pagerank, top_nodes)
+from recommendations.promotionTargeting import OFFERS_BOOST, OVER_BUDGET_FACTOR, PROMOTES_CHUNK_SIZE, TARGETING_WEIGHTS
+from recommendations.recommendationIndex import RELATIONS, get_recommendations
+from recommendations.userRecommender import SIGNAL_WEIGHTS, USER_RECOMMENDATIONS_DEPTH, recommend_for_user
+from store.schemaCatalog import invalidate_schema
+from store.storeFactory import get_store
+from utils.jsonResponse import FastJSONResponse
+
+router = APIRouter()
+
+# Usuarios por petición de `POST /pagerank/batch`
+MAX_PAGERANK_USERS = 1000
+# Componentes por combo, contando el carrito
+MAX_BUNDLE_SIZE = 20
+# Usuarios por campaña de promociones
+MAX_PROMOTION_TARGETS = 10000
+
+
+@router.get("/components/{name}/also-bought", tags=["recommendations"])
+async def get_also_bought(
+    name: str,
+    k: int = Query(10, ge=1, le=100, description="Cantidad de componentes a retornar"),
+    metric: str = Query("count", description=f"Orden: {', '.join(METRICS)}"),
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Componentes que más se compran junto con `name`: usuarios que compraron ambos (`count`)
+    o esa cifra normalizada por la popularidad de cada uno (`cosine`).
+    Se responde desde la matriz de co-compras en memoria, sin consultar la base.
+    """
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Métrica inválida: '{metric}'. Usa: {list(METRICS)}")
+
+    matrix = await recommendations.matrix("PURCHASED")
+    items = matrix.co_occurring(name, k=k, metric=metric)
+    if items is None:
+        # Sin compras registradas: 404 solo si el componente no existe
+        if await store.get_node("Component", "name", name, fields=["name"]) is None:
+            raise HTTPException(status_code=404, detail="Component not found")
+        items = []
+
+    return FastJSONResponse({"component": name, "metric": metric, "items": items})
+
+
+@router.get("/components/{name}/similar", tags=["recommendations"])
+async def get_similar_components(
+    name: str,
+    k: int = Query(10, ge=1, le=100, description="Cantidad de componentes a retornar"),
+    nprobe: int = Query(COMPONENT_INDEX_NPROBE, ge=1, le=1024, description="Listas del índice que se recorren"),
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Componentes más parecidos a `name` según sus embeddings (caminatas aleatorias sobre
+    compras, deseos y complementos), buscados en el índice aproximado. `trained` indica si el
+    vector del componente salió del entrenamiento o del promedio de su `type`/`main_market`.
+    """
+    similar = recommendations.similar
+    items = await similar.similar(name, k=k, nprobe=nprobe)
+    indexed = items is not None
+    if not indexed:
+        # Creado fuera de la API o después de guardar el índice: se agrega con su vector de arranque
+        node = await store.get_node("Component", "name", name, fields=["name", *COLD_START_PROPERTIES])
+        if node is None:
+            raise HTTPException(status_code=404, detail="Component not found")
+        indexed = similar.add(node)
+        items = await similar.similar(name, k=k, nprobe=nprobe) if indexed else []
+
+    return FastJSONResponse({"component": name, "indexed": indexed, "items": items})
+
+
+class BundleRequest(BaseModel):
+    components: List[str] = Field(..., min_length=1, max_length=MAX_BUNDLE_SIZE - 1)
+    size: int = Field(BUNDLE_SIZE, ge=2, le=MAX_BUNDLE_SIZE)
+    max_price: Optional[float] = Field(None, gt=0)
+    hops: int = Field(DEFAULT_HOPS, ge=1, le=BUNDLE_MAX_HOPS)
+    decay: float = Field(DEFAULT_HOP_DECAY, gt=0, le=1)
+    beam_width: int = Field(DEFAULT_BEAM_WIDTH, ge=1, le=64)
+
+
+async def _bundle(recommendations, store, request: BundleRequest) -> Dict[str, Any]:
+    started = time.perf_counter()
+    components = list(dict.fromkeys(request.components))
+    if len(components) >= request.size:
+        raise HTTPException(status_code=400, detail="`size` debe ser mayor que la cantidad de componentes del carrito")
+    graph = await recommendations.bundles.get()
+    for name in components:
+        # Sin precio registrado puede ser un componente que no existe
+        if name not in graph.prices and await store.get_node("Component", "name", name, fields=["name"]) is None:
+            raise HTTPException(status_code=404, detail=f"Component not found: {name}")
+    bundle = await recommendations.bundles.bundle(components, request.size, request.max_price, request.hops,
+                                                  request.decay, request.beam_width)
+    return dict(bundle, components=components, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+
+@router.get("/components/{name}/bundle", tags=["recommendations"])
+async def get_component_bundle(
+    name: str,
+    size: int = Query(BUNDLE_SIZE, ge=2, le=MAX_BUNDLE_SIZE, description="Componentes del combo, contando `name`"),
+    max_price: Optional[float] = Query(None, gt=0, description="Precio total máximo del combo"),
+    hops: int = Query(DEFAULT_HOPS, ge=1, le=BUNDLE_MAX_HOPS, description="Saltos por COMPLEMENTS desde `name`"),
+    decay: float = Query(DEFAULT_HOP_DECAY, gt=0, le=1, description="Factor por cada salto después del primero"),
+    beam_width: int = Query(DEFAULT_BEAM_WIDTH, ge=1, le=64, description="Combos que se mantienen en cada paso"),
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Combo de componentes compatibles con `name` por COMPLEMENTS con el mayor puntaje: cada
+    componente agregado suma su `compatibility_level` con los que ya están en el combo,
+    reducido por `decay` por cada salto extra. Con `max_price` el precio total no lo supera.
+    Se responde desde un grafo de compatibilidades en memoria, sin consultar la base.
+    """
+    request = BundleRequest(components=[name], size=size, max_price=max_price, hops=hops, decay=decay, beam_width=beam_width)
+    return FastJSONResponse(await _bundle(recommendations, store, request))
+
+
+@router.post("/bundle", tags=["recommendations"])
+async def post_bundle(
+    request: BundleRequest,
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Igual que `GET /components/{name}/bundle` pero a partir de un carrito (`components`): los
+    componentes agregados se puntúan contra todo el carrito.
+    """
+    return FastJSONResponse(await _bundle(recommendations, store, request))
+
+
+@router.get("/users/{name}", tags=["recommendations"])
+async def get_user_recommendations(
+    name: str,
+    k: int = Query(10, ge=1, le=USER_RECOMMENDATIONS_DEPTH, description="Cantidad de componentes a retornar"),
+    refresh: bool = Query(False, description="Recalcula aunque haya un resultado en caché"),
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Componentes recomendados para el usuario, combinando sus compras (co-compras), lista de
+    deseos, búsquedas y marcas preferidas (proveedores que los surten). Solo incluye
+    componentes con `price <= budget` del usuario y que no haya comprado.
+    Cada componente trae el aporte de cada señal en `signals` (pesos en `weights`).
+    El resultado se guarda por usuario hasta que cambian sus relaciones o propiedades.
+    """
+    cache = recommendations.user_results
+    result = None if refresh else cache.get(name)
+    cached = result is not None
+    if result is None:
+        generation = cache.generation
+        user = await store.get_node("User", "name", name, fields=["name", "budget", "preferred_brands"])
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        result = await recommend_for_user(recommendations, store, user)
+        cache.put(name, result, generation)
+
+    return FastJSONResponse(dict(result, items=result["items"][:k], weights=SIGNAL_WEIGHTS, cached=cached))
+
+
+class PageRankBatch(BaseModel):
+    users: List[str]
+    k: int = Field(10, ge=1, le=100)
+    label: str = "Component"
+    alpha: float = Field(DEFAULT_ALPHA, gt=0, lt=1)
+    tol: float = Field(DEFAULT_TOLERANCE, gt=0)
+    max_iter: int = Field(DEFAULT_MAX_ITERATIONS, ge=1, le=1000)
+    budget_ms: float = Field(PAGERANK_LATENCY_BUDGET_MS, gt=0, le=60000)
+    exclude_known: bool = True  # Sin los nodos con los que el usuario ya tiene relación
+
+
+def _rank_seeds(graph, seeds: Sequence[int], label: str, k: int, alpha: float, tol: float, max_iter: int,
+                deadline: float, exclude_known: bool) -> Dict[str, Any]:
+    # Bloques de PAGERANK_MAX_BATCH semillas con el mismo plazo; corre en el threadpool
+    items, residuals, converged = [], [], []
+    iterations, budget_exhausted = 0, False
+    for start in range(0, len(seeds), PAGERANK_MAX_BATCH):
+        block = seeds[start:start + PAGERANK_MAX_BATCH]
+        result = personalized_pagerank(graph, block, alpha=alpha, tol=tol, max_iter=max_iter, deadline=deadline)
+        iterations = max(iterations, result.iterations)
+        budget_exhausted = budget_exhausted or result.budget_exhausted
+        for column, seed in enumerate(block):
+            exclude = graph.neighbors(seed) if exclude_known else ()
+            items.append(top_nodes(graph, result.scores[:, column], label, k, exclude=exclude))
+            residuals.append(float(result.residuals[column]))
+            converged.append(bool(result.converged[column]))
+    return {"items": items, "residuals": residuals, "converged": converged,
+            "iterations": iterations, "budget_exhausted": budget_exhausted}
+
+
+async def _pagerank(recommendations, store, users: List[str], label: str, k: int, alpha: float, tol: float,
+                    max_iter: int, budget_ms: float, exclude_known: bool) -> Dict[str, Any]:
+    """
+    PageRank personalizado de cada usuario. Los usuarios que no están en el grafo pero sí en
+    la base (sin relaciones, o creados después de armarlo) quedan con la lista vacía; los
+    que no existen van en `missing`.
+    """
+    if label not in PAGERANK_LABELS:
+        raise HTTPException(status_code=400, detail=f"Label inválido: '{label}'. Usa: {list(PAGERANK_LABELS)}")
+
+    started = time.perf_counter()
+    graph = await recommendations.pagerank.graph()
+    graph_ms = (time.perf_counter() - started) * 1000
+    nodes = {user: graph.node("User", user) for user in users}
+    absent = [user for user, node in nodes.items() if node is None]
+    existing = {node["name"] for node in await store.find_nodes_in("User", "name", absent, fields=["name"])} if absent else set()
+    seeds = [node for node in nodes.values() if node is not None]
+
+    started = time.perf_counter()
+    ranked = await run_in_threadpool(_rank_seeds, graph, seeds, label, k, alpha, tol, max_iter,
+                                     started + budget_ms / 1000, exclude_known)
+    results, position = [], 0
+    for user, node in nodes.items():
+        if node is not None:
+            results.append({"user": user, "items": ranked["items"][position],
+                            "converged": ranked["converged"][position], "residual": ranked["residuals"][position]})
+            position += 1
+        elif user in existing:
+            results.append({"user": user, "items": [], "converged": True, "residual": 0.0})
+
+    return {
+        "label": label,
+        "results": results,
+        "missing": [user for user in absent if user not in existing],
+        "iterations": ranked["iterations"],
+        "budget_exhausted": ranked["budget_exhausted"],
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+        "graph_ms": graph_ms,
+    }
+
+
+@router.get("/users/{name}/pagerank", tags=["recommendations"])
+async def get_user_pagerank(
+    name: str,
+    k: int = Query(10, ge=1, le=100, description="Cantidad de nodos a retornar"),
+    label: str = Query("Component", description=f"Label de los resultados: {', '.join(PAGERANK_LABELS)}"),
+    alpha: float = Query(DEFAULT_ALPHA, gt=0, lt=1, description="Probabilidad de seguir caminando (1 - alpha vuelve al usuario)"),
+    tol: float = Query(DEFAULT_TOLERANCE, gt=0, description="Residuo L1 con el que se considera convergido"),
+    max_iter: int = Query(DEFAULT_MAX_ITERATIONS, ge=1, le=1000, description="Máximo de iteraciones"),
+    budget_ms: float = Query(PAGERANK_LATENCY_BUDGET_MS, gt=0, le=60000, description="Presupuesto de latencia de la iteración"),
+    exclude_known: bool = Query(True, description="Excluye los nodos con los que el usuario ya tiene relación"),
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Nodos de `label` ordenados por PageRank personalizado desde el usuario, sobre el grafo de
+    compras, deseos, proveedores, categorías y promociones. Si se acaba `budget_ms` antes de
+    converger retorna el último resultado con `converged` en false y `budget_exhausted` en true.
+    """
+    ranked = await _pagerank(recommendations, store, [name], label, k, alpha, tol, max_iter, budget_ms, exclude_known)
+    if not ranked["results"]:
+        raise HTTPException(status_code=404, detail="User not found")
+    result = ranked.pop("results")[0]
+    ranked.pop("missing")
+    return FastJSONResponse(dict(result, **ranked, graph=recommendations.pagerank.stats()))
+
+
+@router.post("/pagerank/batch", tags=["recommendations"])
+async def post_pagerank_batch(
+    request: PageRankBatch,
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    PageRank personalizado de varios usuarios a la vez: cada bloque de usuarios se calcula
+    con un solo producto matriz-matriz por iteración. Retorna `results` en el orden recibido
+    y `missing` (usuarios que no existen).
+    """
+    users = list(dict.fromkeys(request.users))
+    if len(users) > MAX_PAGERANK_USERS:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_PAGERANK_USERS} usuarios por petición")
+    ranked = await _pagerank(recommendations, store, users, request.label, request.k, request.alpha, request.tol,
+                             request.max_iter, request.budget_ms, request.exclude_known)
+    return FastJSONResponse(dict(ranked, graph=recommendations.pagerank.stats()))
+
+
+async def _promotion_targets(recommendations, store, name: str, k: int, exclude_promoted: bool) -> Dict[str, Any]:
+    if await store.get_node("Provider", "name", name, fields=["name"]) is None:
+        raise HTTPException(status_code=404, detail="Provider not found")
+    result = await recommendations.promotions.targets(recommendations, name, k, exclude_promoted)
+    return dict(result, weights=TARGETING_WEIGHTS, over_budget_factor=OVER_BUDGET_FACTOR, offers_boost=OFFERS_BOOST)
+
+
+@router.get("/providers/{name}/promotion-targets", tags=["recommendations"])
+async def get_promotion_targets(
+    name: str,
+    k: int = Query(100, ge=1, le=MAX_PROMOTION_TARGETS, description="Cantidad de usuarios a retornar"),
+    exclude_promoted: bool = Query(True, description="Excluye a los usuarios a los que el proveedor ya promociona"),
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Usuarios a los que más le conviene promocionar al proveedor: los que desean (WANTS) o
+    buscaron (SEARCHED) componentes que surte, con menos peso los que superan su `budget` y
+    más los que tienen `looking_for_offers`. Se puntúan todos los usuarios a la vez en memoria.
+    """
+    return FastJSONResponse(await _promotion_targets(recommendations, store, name, k, exclude_promoted))
+
+
+class PromotionCampaign(BaseModel):
+    k: int = Field(100, ge=1, le=MAX_PROMOTION_TARGETS)
+    exclude_promoted: bool = True
+    discount_percentage: float = Field(..., gt=0, le=100)
+    promotion_type: str = "Targeted"
+    promotion_date: Optional[datetime.date] = None  # Por defecto hoy
+
+
+@router.post("/providers/{name}/promotions", tags=["recommendations"], dependencies=[Depends(invalidate_schema)])
+async def post_promotions(
+    name: str,
+    campaign: PromotionCampaign,
+    store=Depends(get_store),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Igual que `GET /providers/{name}/promotion-targets`, y además crea la relación PROMOTES
+    del proveedor a cada usuario elegido con las propiedades de la campaña, en bloques de
+    `PROMOTES_CHUNK_SIZE` relaciones por consulta.
+    """
+    result = await _promotion_targets(recommendations, store, name, campaign.k, campaign.exclude_promoted)
+    properties = {
+        "discount_percentage": campaign.discount_percentage,
+        "promotion_date": (campaign.promotion_date or datetime.date.today()).isoformat(),
+        "promotion_type": campaign.promotion_type,
+    }
+    users = [item["name"] for item in result["items"]]
+    created = 0
+    for start in range(0, len(users), PROMOTES_CHUNK_SIZE):
+        chunk = users[start:start + PROMOTES_CHUNK_SIZE]
+        created += await store.create_relationships(RELATIONS["PROMOTES"], [(name, user) for user in chunk], properties)
+        recommendations.promotions_created(name, chunk)
+
+    return FastJSONResponse(dict(result, created=created, promotion=properties))
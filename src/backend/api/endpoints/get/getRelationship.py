@@ -1,26 +1,32 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from utils.dbConnection import get_neo4j_driver
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional, Tuple
+from store.graphStore import RelationshipSpec
+from store.storeFactory import get_store
+from utils.jsonResponse import FastJSONResponse
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
-def get_identifier_key(label: str) -> str:
-    """
-    Devuelve la key de identificador según el label.
-    - Reviews usan `title`
-    - Los demás usan `name`
-    """
-    return "title" if label == "Review" else "name"
+# Máximo de pares por petición de `/properties/batch`
+MAX_BATCH_PAIRS = 5000
+
+
+class RelationshipPairs(BaseModel):
+    from_label: str
+    to_label: str
+    relationship_type: str
+    pairs: List[Tuple[str, str]]  # Cada tupla es (from_identifier, to_identifier)
 
 
 @router.get("/properties", tags=["relationships"])
-def get_relationship_properties(
+async def get_relationship_properties(
     from_label: str = Query(..., description="Label del nodo origen"),
     to_label: str = Query(..., description="Label del nodo destino"),
     relationship_type: str = Query(..., description="Tipo de relación (en mayúsculas)"),
     from_value: str = Query(..., description="Identificador (name/title) del nodo origen"),
-    to_value: str = Query(..., description="Identificador (name/title) del nodo destino")
+    to_value: str = Query(..., description="Identificador (name/title) del nodo destino"),
+    store=Depends(get_store)
 ):
     """
     Obtiene las propiedades de una relación específica entre dos nodos.
@@ -29,19 +35,34 @@ def get_relationship_properties(
     from_key = get_identifier_key(from_label)
     to_key = get_identifier_key(to_label)
 
-    query = f"""
-    MATCH (a:{from_label})-[r:{relationship_type}]->(b:{to_label})
-    WHERE a.{from_key} = $from_value AND b.{to_key} = $to_value
-    RETURN properties(r) AS properties
-    """
-
-    with driver.session() as session:
-        result = session.run(query, from_value=from_value, to_value=to_value)
-        record = result.single()
+    spec = RelationshipSpec(from_label, from_key, relationship_type, to_label, to_key)
+    properties = await store.get_relationship_properties(spec, from_value, to_value)
 
-    if not record:
+    if properties is None:
         raise HTTPException(status_code=404, detail=f"No se encontró la relación {relationship_type} entre {from_label} '{from_value}' y {to_label} '{to_value}'.")
 
-    properties = record.get("properties", {})
-
     return {"properties": properties}
+
+
+@router.post("/properties/batch", tags=["relationships"])
+async def get_relationships_properties_batch(request: RelationshipPairs, store=Depends(get_store)):
+    """
+    Obtiene las propiedades de las relaciones de varios pares de nodos con una sola consulta.
+    Retorna `found` (cada par con sus propiedades, en el orden recibido) y `missing`
+    (los pares sin relación).
+    """
+    if len(request.pairs) > MAX_BATCH_PAIRS:
+        raise HTTPException(status_code=400, detail=f"Se permiten como máximo {MAX_BATCH_PAIRS} pares por petición.")
+
+    spec = RelationshipSpec(request.from_label, get_identifier_key(request.from_label), request.relationship_type,
+                            request.to_label, get_identifier_key(request.to_label))
+    results = await store.get_relationships_properties(spec, request.pairs)
+
+    found, missing = [], []
+    for (from_value, to_value), properties in zip(request.pairs, results):
+        if properties is None:
+            missing.append([from_value, to_value])
+        else:
+            found.append({"from_value": from_value, "to_value": to_value, "properties": properties})
+
+    return FastJSONResponse({"found": found, "missing": missing})
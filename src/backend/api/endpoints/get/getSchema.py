@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from store.schemaCatalog import get_schema_catalog
+from store.storeFactory import get_store
+
+router = APIRouter()
+
+
+@router.get("/", tags=["schema"])
+async def get_schema(
+    refresh: bool = Query(False, description="Reconstruye el catálogo en lugar de usar la caché"),
+    catalog=Depends(get_schema_catalog)
+):
+    """
+    Retorna el catálogo del esquema: labels y tipos de relación con su total de elementos,
+    y para cada propiedad los tipos observados y su fill rate (fracción de elementos que la tienen).
+    Las relaciones incluyen los pares [label origen, label destino] observados.
+    El catálogo se guarda en caché y se reconstruye al vencer el TTL o después de una escritura.
+    """
+    if refresh:
+        catalog.invalidate()
+    return await catalog.get()
+
+
+@router.get("/indexes", tags=["schema"])
+async def get_index_status(store=Depends(get_store)):
+    """
+    Estado de los índices y constraints (ONLINE, POPULATING, FAILED) con su porcentaje de población.
+    """
+    return await store.index_status()
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query
+from recommendations.recommendationIndex import get_recommendations
+from store.cypherTemplates import TEMPLATES, template_cache_info
+from store.nodeCache import get_node_cache
+from utils.planCache import plan_cache
+
+router = APIRouter()
+
+
+@router.get("/query-plans", tags=["stats"])
+async def get_query_plan_stats(reset: bool = Query(False, description="Reinicia los contadores después de leerlos")):
+    """
+    Hits y misses de la caché de planes de Neo4j vistos desde la API: cada texto de consulta
+    nuevo es una compilación (miss). También retorna cuántos textos distintos han generado
+    las plantillas de `store/cypherTemplates.py`.
+    """
+    stats = plan_cache.snapshot()
+    stats["templates"] = {"registered": len(TEMPLATES), "rendered": template_cache_info()}
+    if reset:
+        plan_cache.reset()
+    return stats
+
+
+@router.get("/node-cache", tags=["stats"])
+async def get_node_cache_stats(reset: bool = Query(False, description="Reinicia los contadores después de leerlos"),
+                               cache=Depends(get_node_cache)):
+    """
+    Hits, misses, desalojos (evictions), vencimientos e invalidaciones de la caché de nodos
+    por identificador que usan `GET /nodes/{name}` y `GET /nodes?prop=<identificador>`.
+    """
+    stats = cache.snapshot()
+    if reset:
+        cache.reset_stats()
+    return stats
+
+
+@router.get("/recommendations", tags=["stats"])
+async def get_recommendation_stats(recommendations=Depends(get_recommendations)):
+    """
+    Tamaño de cada matriz de interacciones construida, cambios pendientes de recompactar
+    y duración de la última compactación.
+    """
+    return recommendations.stats()
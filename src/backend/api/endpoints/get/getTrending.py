@@ -0,0 +1,33 @@
+import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from recommendations.recommendationIndex import get_recommendations
+from recommendations.trendingCounters import TRENDING_RELATIONS, parse_window
+from utils.jsonResponse import FastJSONResponse
+
+router = APIRouter()
+
+
+@router.get("", tags=["trending"])
+async def get_trending(
+    window: str = Query("7d", description="Ventana de tiempo: días (7d) o semanas (4w)"),
+    type: str = Query("PURCHASED", description=f"Tipo de relación: {', '.join(TRENDING_RELATIONS)}"),
+    k: int = Query(20, ge=1, le=100, description="Cantidad de componentes a retornar"),
+    half_life: Optional[str] = Query(None, description="Vida media del decaimiento (por defecto la mitad de la ventana)"),
+    as_of: Optional[datetime.date] = Query(None, description="Último día de la ventana (por defecto hoy)"),
+    recommendations=Depends(get_recommendations)
+):
+    """
+    Componentes con más relaciones `type` en la ventana que termina en `as_of`, según su fecha
+    (`purchase_date`, `search_date` o `added_date`). `score` pondera cada relación por su
+    antigüedad (vale la mitad cada `half_life`) y `count` es el total sin ponderar.
+    Se responde desde contadores por día y por semana en memoria, sin recorrer las relaciones.
+    """
+    try:
+        window_days = parse_window(window)
+        half_life_days = parse_window(half_life) if half_life else None
+        result = await recommendations.trending.top(type, window_days, k, as_of or datetime.date.today(), half_life_days)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    return FastJSONResponse(dict(result, window=window))
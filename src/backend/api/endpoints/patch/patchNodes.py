@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Dict, List, Union
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.nodeCache import get_node_cache
+from store.storeFactory import get_store
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 # Modelo para recibir las actualizaciones
 class UpdateNodeProperties(BaseModel):
@@ -34,127 +35,101 @@ class DeleteMultipleNodesProperties(BaseModel):
 
 # Agregar propiedades a un nodo
 @router.patch("/add_properties", tags=["nodes"])
-def add_properties_to_node(request: UpdateNodeProperties):
+async def add_properties_to_node(request: UpdateNodeProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+        recommendations=Depends(get_recommendations)):
     """
     Agrega una o más propiedades a un nodo específico.
     """
-    query = f"""
-    MATCH (n:{request.label} {{{request.identifier_key}: $identifier_value}})
-    SET n += $properties
-    RETURN n
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_value=request.identifier_value, properties=request.properties)
-        node = result.single()
-        
-        if not node:
-            raise HTTPException(status_code=404, detail="Node not found")
-    
-    return {"message": "Properties added successfully", "updated_node": node["n"]}
+    node = await store.update_node(request.label, request.identifier_key, request.identifier_value, set_props=request.properties)
+    cache.written(request.label, request.identifier_key, [request.identifier_value])
+    recommendations.nodes_updated(request.label, request.identifier_key, [request.identifier_value], request.properties)
+
+    if node is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    # Se guarda el nodo ya actualizado (bajo su identificador nuevo si cambió)
+    cache.put(request.label, node)
+
+    return {"message": "Properties added successfully", "updated_node": node}
 
 
 # Agregar propiedades a múltiples nodos
 @router.patch("/add_properties_multiple", tags=["nodes"])
-def add_properties_to_multiple_nodes(request: UpdateMultipleNodesProperties):
+async def add_properties_to_multiple_nodes(request: UpdateMultipleNodesProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+        recommendations=Depends(get_recommendations)):
     """
     Agrega una o más propiedades a múltiples nodos.
     """
-    query = f"""
-    MATCH (n:{request.label})
-    WHERE n.{request.identifier_key} IN $identifier_values
-    SET n += $properties
-    RETURN count(n) AS updated_count
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_values=request.identifier_values, properties=request.properties)
-        updated_count = result.single()["updated_count"]
-    
+    updated_count = await store.update_nodes(request.label, request.identifier_key, request.identifier_values, set_props=request.properties)
+    cache.written(request.label, request.identifier_key, request.identifier_values)
+    recommendations.nodes_updated(request.label, request.identifier_key, request.identifier_values, request.properties)
+
     return {"message": "Properties added successfully", "nodes_updated": updated_count}
 
 
 # Actualizar propiedades de un nodo
 @router.patch("/update_properties", tags=["nodes"])
-def update_properties_of_node(request: UpdateNodeProperties):
+async def update_properties_of_node(request: UpdateNodeProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+        recommendations=Depends(get_recommendations)):
     """
     Actualiza una o más propiedades de un nodo específico.
     """
-    query = f"""
-    MATCH (n:{request.label} {{{request.identifier_key}: $identifier_value}})
-    SET n += $properties
-    RETURN n
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_value=request.identifier_value, properties=request.properties)
-        node = result.single()
-        
-        if not node:
-            raise HTTPException(status_code=404, detail="Node not found")
-    
-    return {"message": "Properties updated successfully", "updated_node": node["n"]}
+    node = await store.update_node(request.label, request.identifier_key, request.identifier_value, set_props=request.properties)
+    cache.written(request.label, request.identifier_key, [request.identifier_value])
+    recommendations.nodes_updated(request.label, request.identifier_key, [request.identifier_value], request.properties)
+
+    if node is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    # Se guarda el nodo ya actualizado (bajo su identificador nuevo si cambió)
+    cache.put(request.label, node)
+
+    return {"message": "Properties updated successfully", "updated_node": node}
 
 
 # Actualizar propiedades de múltiples nodos
 @router.patch("/update_properties_multiple", tags=["nodes"])
-def update_properties_of_multiple_nodes(request: UpdateMultipleNodesProperties):
+async def update_properties_of_multiple_nodes(request: UpdateMultipleNodesProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+        recommendations=Depends(get_recommendations)):
     """
     Actualiza una o más propiedades en múltiples nodos.
     """
-    query = f"""
-    MATCH (n:{request.label})
-    WHERE n.{request.identifier_key} IN $identifier_values
-    SET n += $properties
-    RETURN count(n) AS updated_count
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_values=request.identifier_values, properties=request.properties)
-        updated_count = result.single()["updated_count"]
-    
+    updated_count = await store.update_nodes(request.label, request.identifier_key, request.identifier_values, set_props=request.properties)
+    cache.written(request.label, request.identifier_key, request.identifier_values)
+    recommendations.nodes_updated(request.label, request.identifier_key, request.identifier_values, request.properties)
+
     return {"message": "Properties updated successfully", "nodes_updated": updated_count}
 
 
 # Eliminar propiedades de un nodo
 @router.patch("/remove_properties", tags=["nodes"])
-def remove_properties_from_node(request: DeleteNodeProperties):
+async def remove_properties_from_node(request: DeleteNodeProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+        recommendations=Depends(get_recommendations)):
     """
     Elimina una o más propiedades de un nodo.
     """
-    remove_statements = ", ".join([f"n.{prop}" for prop in request.properties])
-    query = f"""
-    MATCH (n:{request.label} {{{request.identifier_key}: $identifier_value}})
-    REMOVE {remove_statements}
-    RETURN n
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_value=request.identifier_value)
-        node = result.single()
-        
-        if not node:
-            raise HTTPException(status_code=404, detail="Node not found")
-    
-    return {"message": "Properties removed successfully", "updated_node": node["n"]}
+    node = await store.update_node(request.label, request.identifier_key, request.identifier_value, remove_props=request.properties)
+    cache.written(request.label, request.identifier_key, [request.identifier_value])
+    recommendations.nodes_updated(request.label, request.identifier_key, [request.identifier_value], request.properties)
+
+    if node is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    # Se guarda el nodo ya actualizado (bajo su identificador nuevo si cambió)
+    cache.put(request.label, node)
+
+    return {"message": "Properties removed successfully", "updated_node": node}
 
 
 # Eliminar propiedades de múltiples nodos
 @router.patch("/remove_properties_multiple", tags=["nodes"])
-def remove_properties_from_multiple_nodes(request: DeleteMultipleNodesProperties):
+async def remove_properties_from_multiple_nodes(request: DeleteMultipleNodesProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+        recommendations=Depends(get_recommendations)):
     """
     Elimina una o más propiedades de múltiples nodos.
     """
-    remove_statements = ", ".join([f"n.{prop}" for prop in request.properties])
-    query = f"""
-    MATCH (n:{request.label})
-    WHERE n.{request.identifier_key} IN $identifier_values
-    REMOVE {remove_statements}
-    RETURN count(n) AS updated_count
-    """
-    
-    with driver.session() as session:
-        result = session.run(query, identifier_values=request.identifier_values)
-        updated_count = result.single()["updated_count"]
-    
+    updated_count = await store.update_nodes(request.label, request.identifier_key, request.identifier_values, remove_props=request.properties)
+    cache.written(request.label, request.identifier_key, request.identifier_values)
+    recommendations.nodes_updated(request.label, request.identifier_key, request.identifier_values, request.properties)
+
     return {"message": "Properties removed successfully", "nodes_updated": updated_count}
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Dict, List, Tuple, Any
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.graphStore import RelationshipSpec
+from store.storeFactory import get_store
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 class PutSingleRelationshipProperties(BaseModel):
     from_label: str
@@ -21,45 +23,33 @@ class PutMultipleRelationshipsProperties(BaseModel):
     pairs: List[Tuple[str, str]]
     properties: Dict[str, Any]
 
-def get_identifier_key(label: str) -> str:
-    return "title" if label == "Review" else "name"
 
 @router.patch("/add_properties_to_relationship", tags=["relationships"])
-def add_properties_to_relationship(request: PutSingleRelationshipProperties):
+async def add_properties_to_relationship(request: PutSingleRelationshipProperties, store=Depends(get_store),
+                                         recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    query = f"""
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = $from_identifier AND b.{to_key} = $to_identifier
-    SET r += $properties
-    RETURN r
-    """
-    with driver.session() as session:
-        result = session.run(query, from_identifier=request.from_identifier, to_identifier=request.to_identifier, properties=request.properties)
-        record = result.single()
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    relationship = await store.update_relationship(spec, request.from_identifier, request.to_identifier, set_props=request.properties)
 
-    if not record:
+    if relationship is None:
         raise HTTPException(status_code=404, detail="Relationship not found")
+    recommendations.relationships_updated(request.from_label, request.relationship_type, request.to_label,
+                                          [(request.from_identifier, request.to_identifier)], set_props=request.properties)
 
-    return {"message": "Properties added successfully", "updated_relationship": record["r"]}
+    return {"message": "Properties added successfully", "updated_relationship": relationship}
 
 
 @router.patch("/add_properties_to_multiple_relationships", tags=["relationships"])
-def add_properties_to_multiple_relationships(request: PutMultipleRelationshipsProperties):
+async def add_properties_to_multiple_relationships(request: PutMultipleRelationshipsProperties, store=Depends(get_store),
+                                                   recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    query = f"""
-    UNWIND $pairs AS pair
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = pair[0] AND b.{to_key} = pair[1]
-    SET r += $properties
-    RETURN count(r) AS updated_count
-    """
-
-    with driver.session() as session:
-        result = session.run(query, pairs=request.pairs, properties=request.properties)
-        updated_count = result.single()["updated_count"]
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    updated_count = await store.update_relationships(spec, request.pairs, set_props=request.properties)
+    recommendations.relationships_updated(request.from_label, request.relationship_type, request.to_label,
+                                          request.pairs, set_props=request.properties)
 
     return {"message": f"{updated_count} relationship(s) updated successfully"}
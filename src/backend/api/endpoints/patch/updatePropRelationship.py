@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Dict, List, Tuple, Any
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.graphStore import RelationshipSpec
+from store.storeFactory import get_store
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 class UpdateSingleRelationshipProperties(BaseModel):
     from_label: str
@@ -21,67 +23,35 @@ class UpdateMultipleRelationshipsProperties(BaseModel):
     pairs: List[Tuple[str, str]]  # Cada tupla es (from_identifier, to_identifier)
     properties: Dict[str, Any]
 
-def get_identifier_key(label: str) -> str:
-    return "title" if label == "Review" else "name"
 
 # Actualizar propiedades de UNA relación
 @router.patch("/update_properties_in_relationship", tags=["relationships"])
-def update_properties_in_relationship(request: UpdateSingleRelationshipProperties):
+async def update_properties_in_relationship(request: UpdateSingleRelationshipProperties, store=Depends(get_store),
+                                            recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    set_statements = ", ".join([f"r.{k} = $prop_{k}" for k in request.properties])
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    relationship = await store.update_relationship(spec, request.from_identifier, request.to_identifier, set_props=request.properties)
 
-    query = f"""
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = $from_identifier AND b.{to_key} = $to_identifier
-    SET {set_statements}
-    RETURN r
-    """
-
-    parameters = {
-        "from_identifier": request.from_identifier,
-        "to_identifier": request.to_identifier,
-    }
-
-    for k, v in request.properties.items():
-        parameters[f"prop_{k}"] = v
-
-    with driver.session() as session:
-        result = session.run(query, **parameters)
-        record = result.single()
-
-    if not record:
+    if relationship is None:
         raise HTTPException(status_code=404, detail="Relationship not found")
+    recommendations.relationships_updated(request.from_label, request.relationship_type, request.to_label,
+                                          [(request.from_identifier, request.to_identifier)], set_props=request.properties)
 
-    return {"message": "Properties updated successfully", "updated_relationship": record["r"]}
+    return {"message": "Properties updated successfully", "updated_relationship": relationship}
 
 
 # Actualizar propiedades de MÚLTIPLES relaciones
 @router.patch("/update_properties_in_multiple_relationships", tags=["relationships"])
-def update_properties_in_multiple_relationships(request: UpdateMultipleRelationshipsProperties):
+async def update_properties_in_multiple_relationships(request: UpdateMultipleRelationshipsProperties, store=Depends(get_store),
+                                                      recommendations=Depends(get_recommendations)):
     from_key = get_identifier_key(request.from_label)
     to_key = get_identifier_key(request.to_label)
 
-    set_statements = ", ".join([f"r.{k} = $prop_{k}" for k in request.properties])
-
-    query = f"""
-    UNWIND $pairs AS pair
-    MATCH (a:{request.from_label})-[r:{request.relationship_type}]->(b:{request.to_label})
-    WHERE a.{from_key} = pair[0] AND b.{to_key} = pair[1]
-    SET {set_statements}
-    RETURN count(r) AS updated_count
-    """
-
-    parameters = {
-        "pairs": request.pairs,
-    }
-
-    for k, v in request.properties.items():
-        parameters[f"prop_{k}"] = v
-
-    with driver.session() as session:
-        result = session.run(query, **parameters)
-        updated_count = result.single()["updated_count"]
+    spec = RelationshipSpec(request.from_label, from_key, request.relationship_type, request.to_label, to_key)
+    updated_count = await store.update_relationships(spec, request.pairs, set_props=request.properties)
+    recommendations.relationships_updated(request.from_label, request.relationship_type, request.to_label,
+                                          request.pairs, set_props=request.properties)
 
     return {"message": f"{updated_count} relationship(s) updated successfully"}
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.nodeCache import get_node_cache
+from store.storeFactory import get_store
+from utils.labelRegistry import get_identifier_key
 
 router = APIRouter()
-driver = get_neo4j_driver()
 
 class NodeWithProperties(BaseModel):
     label: str
@@ -12,40 +14,36 @@ class NodeWithProperties(BaseModel):
 
 # Endpoint para crear un nodo con solo una label
 @router.post("/create-node", tags=["nodes"])
-def create_node(label: str):
+async def create_node(label: str, store=Depends(get_store)):
     """
     Crea un nodo en la base de datos con solo una etiqueta (sin propiedades).
     """
-    query = f"CREATE (n:{label}) RETURN n"
+    node = await store.create_node(label)
     
-    with driver.session() as session:
-        result = session.run(query)
-        record = result.single()
-    
-    if not record:
+    if node is None:
         raise HTTPException(status_code=500, detail="No se pudo crear el nodo.")
     
-    return {"message": "Nodo creado exitosamente", "node": record["n"]}
+    return {"message": "Nodo creado exitosamente", "node": node}
 
 
 # Endpoint para crear un nodo con 5+ propiedades
 @router.post("/create-node-with-properties", tags=["nodes"])
-def create_node_with_properties(node: NodeWithProperties):
+async def create_node_with_properties(node: NodeWithProperties, store=Depends(get_store), cache=Depends(get_node_cache),
+                                      recommendations=Depends(get_recommendations)):
     """
     Crea un nodo con una etiqueta y al menos 5 propiedades.
     """
     if len(node.properties) < 5:
         raise HTTPException(status_code=400, detail="Se requieren al menos 5 propiedades.")
     
-    # Construcción dinámica de la consulta
-    props_str = ", ".join([f"n.{k} = ${k}" for k in node.properties.keys()])
-    query = f"CREATE (n:{node.label}) SET {props_str} RETURN n"
-
-    with driver.session() as session:
-        result = session.run(query, **node.properties)
-        record = result.single()
+    created = await store.create_node(node.label, node.properties)
+    # Si ya había un nodo con el mismo identificador, la caché no debe seguir respondiendo solo con ese
+    identifier_value = node.properties.get(get_identifier_key(node.label))
+    if identifier_value is not None:
+        cache.invalidate(node.label, [identifier_value])
     
-    if not record:
+    if created is None:
         raise HTTPException(status_code=500, detail="No se pudo crear el nodo.")
+    recommendations.node_created(node.label, node.properties)
     
-    return {"message": "Nodo con propiedades creado exitosamente", "node": record["n"]}
+    return {"message": "Nodo con propiedades creado exitosamente", "node": created}
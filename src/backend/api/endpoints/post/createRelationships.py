@@ -1,18 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from utils.dbConnection import get_neo4j_driver
+from recommendations.recommendationIndex import get_recommendations
+from store.graphStore import RelationshipSpec
+from store.storeFactory import get_store
+from utils.labelRegistry import LABELS
 
 router = APIRouter()
-driver = get_neo4j_driver()
-
-# Definir los labels y las claves asociadas
-LABEL_KEY_MAP = {
-    "Component": "name",
-    "Category": "name",
-    "Provider": "name",
-    "User": "name",
-    "Review": "title"  # Solo los nodos de Review usan 'title' en vez de 'name'
-}
 
 # Modelo Pydantic para la creación de relaciones con propiedades
 class RelationshipWithProperties(BaseModel):
@@ -27,7 +20,7 @@ class RelationshipWithProperties(BaseModel):
 
 # Endpoint para crear una relación con al menos 3 propiedades
 @router.post("/create-relationship", tags=["relationships"])
-def create_relationship(rel: RelationshipWithProperties):
+async def create_relationship(rel: RelationshipWithProperties, store=Depends(get_store), recommendations=Depends(get_recommendations)):
     """
     Crea una relación entre dos nodos existentes con la clave correcta.
     - Busca nodos por 'name' si son Component, Category, Provider, User.
@@ -35,31 +28,22 @@ def create_relationship(rel: RelationshipWithProperties):
     - Crea la relación solo si se encuentran ambos nodos.
     - La relación debe incluir al menos 3 propiedades.
     """
-    if rel.from_label not in LABEL_KEY_MAP or rel.to_label not in LABEL_KEY_MAP:
+    if rel.from_label not in LABELS or rel.to_label not in LABELS:
         raise HTTPException(status_code=400, detail="Label inválido. Debe ser Component, Category, Provider, User o Review.")
 
-    from_key = LABEL_KEY_MAP[rel.from_label]
-    to_key = LABEL_KEY_MAP[rel.to_label]
+    from_key = LABELS[rel.from_label].identifier
+    to_key = LABELS[rel.to_label].identifier
 
     if len(rel.properties) < 3:
         raise HTTPException(status_code=400, detail="Se requieren al menos 3 propiedades para la relación.")
 
-    # Construcción dinámica de la consulta
-    props_str = ", ".join([f"r.{k} = ${k}" for k in rel.properties.keys()])
-
-    query = f"""
-    MATCH (a:{rel.from_label} {{{from_key}: $from_value}}), 
-          (b:{rel.to_label} {{{to_key}: $to_value}})
-    CREATE (a)-[r:{rel.relation_type}]->(b)
-    SET {props_str}
-    RETURN r
-    """
+    spec = RelationshipSpec(rel.from_label, from_key, rel.relation_type, rel.to_label, to_key)
+    relationship = await store.create_relationship(spec, rel.from_value, rel.to_value, rel.properties)
 
-    with driver.session() as session:
-        result = session.run(query, from_value=rel.from_value, to_value=rel.to_value, **rel.properties)
-        record = result.single()
-
-    if not record:
+    if relationship is None:
         raise HTTPException(status_code=404, detail="No se pudieron encontrar los nodos o crear la relación.")
 
-    return {"message": "Relación creada exitosamente", "relationship": record["r"]}
+    recommendations.relationship_created(rel.from_label, rel.relation_type, rel.to_label, rel.from_value, rel.to_value,
+                                         rel.properties)
+
+    return {"message": "Relación creada exitosamente", "relationship": relationship}
@@ -0,0 +1,145 @@
+"""
+Benchmark de throughput concurrente de la API en modo `sync` vs `async` del driver de Neo4j.
+
+Levanta la API con uvicorn una vez por modo (misma base de datos del `.env`, mismos datos),
+dispara peticiones concurrentes contra los endpoints de lectura y reporta req/s y latencias.
+
+El modo `memory` levanta la API con `GRAPH_STORE=memory` (datos de `MEMORY_STORE_CSV_DIR`):
+mide solo la capa FastAPI (validación, serialización, routing), sin red ni base de datos.
+
+Uso (desde `src/backend`):
+    python benchmarks/benchDriverModes.py --concurrency 1 16 64 --requests 500
+
+Requiere `httpx` además de las dependencias de la API.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def default_paths(label: str, name: str) -> list:
+    return [
+        f"/nodes/?label={label}",
+        f"/nodes/{name}?label={label}",
+        f"/nodes/batch?label={label}&prop=name&values={name}",
+    ]
+
+def start_api(mode: str, port: int) -> subprocess.Popen:
+    if mode == "memory":
+        env = dict(os.environ, GRAPH_STORE="memory")
+    else:
+        env = dict(os.environ, GRAPH_STORE="neo4j", NEO4J_DRIVER_MODE=mode)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"La API en {base_url} no respondió en {timeout}s")
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run_load(base_url: str, paths: list, concurrency: int, total_requests: int) -> dict:
+    """
+    Ejecuta `total_requests` peticiones (rotando entre `paths`) con `concurrency` en vuelo.
+    """
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(total_requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+async def bench_mode(mode: str, port: int, paths: list, concurrencies: list, total_requests: int) -> list:
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_api(mode, port)
+    try:
+        await wait_until_ready(base_url)
+        # Calentamiento: abre conexiones del pool y compila los planes de las consultas
+        await run_load(base_url, paths, max(concurrencies), len(paths) * 4)
+        results = []
+        for concurrency in concurrencies:
+            result = await run_load(base_url, paths, concurrency, total_requests)
+            result["mode"] = mode
+            results.append(result)
+            print(f"[{mode:6}] c={concurrency:<4} {result['req_per_s']:>8} req/s  "
+                  f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms errores={result['errors']}")
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compara el throughput de la API con el driver sync y async.")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async", "memory"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por nivel de concurrencia")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--label", default="Component")
+    parser.add_argument("--name", default="Component 1")
+    parser.add_argument("--output", help="Ruta opcional para guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    paths = default_paths(args.label, args.name)
+    results = []
+    for mode in args.modes:
+        results.extend(await bench_mode(mode, args.port, paths, args.concurrency, args.requests))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,383 @@
+"""
+Benchmark offline de calidad y velocidad de las estrategias de recomendación.
+
+Por cada escala genera los CSV con `utils/createCSV.py` (N entidades de cada label, semilla
+fija en `CSV_SEED`), aparta al azar una fracción de las relaciones `PURCHASED` y carga el
+resto en el store en memoria. Después, para una muestra de los usuarios con compras
+apartadas, pide `k` componentes a cada estrategia y mide:
+
+- precision@k, recall@k y hit rate contra las compras apartadas de cada usuario,
+- coverage (fracción del catálogo que aparece en alguna recomendación),
+- latencia por consulta (p50/p95/p99) y tiempo de construcción de cada estrategia,
+- RSS máximo del proceso (cada escala corre en un proceso aparte; dentro de la escala es
+  acumulado en el orden de las estrategias).
+
+Estrategias: `also_bought` (co-compras de lo que compró el usuario), `user_blend` (la de
+`GET /recommendations/users/{name}`), `pagerank` (PageRank personalizado), `similar`
+(componentes similares a sus compras) y `popular` (tendencias de compras del último año,
+como línea base sin personalización).
+
+Con los mismos argumentos el resultado es el mismo (salvo los tiempos), así que el JSON de
+una versión sirve de `--baseline` para la siguiente: se listan las métricas que empeoraron
+más de `--tolerance` (los tiempos y la memoria, además, por más de `NOISE_FLOOR`) y el
+proceso termina con código 1.
+
+Uso (desde `src/backend`):
+    python benchmarks/benchRecommendations.py --scales 10k --output results.json --csv results.csv
+    python benchmarks/benchRecommendations.py --scales 10k 100k --baseline results.json
+
+La escala 1m genera ~10M relaciones y necesita varios GB de memoria.
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CREATE_CSV = os.path.join(BACKEND_DIR, "..", "utils", "createCSV.py")
+sys.path.append(BACKEND_DIR)
+
+STRATEGIES = ["also_bought", "user_blend", "pagerank", "similar", "popular"]
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+PURCHASE_FILE = "relations_purchase.csv"
+# Último archivo que escribe createCSV.py: si existe, la generación terminó
+LAST_CSV_FILE = "relations_complement.csv"
+# Métricas donde más es mejor; en el resto (tiempos y memoria) menos es mejor
+HIGHER_IS_BETTER = ("precision", "recall", "hit_rate", "coverage")
+COMPARED_METRICS = ("precision", "recall", "coverage", "p95_ms", "build_seconds", "peak_rss_mb")
+# Diferencia absoluta por debajo de la cual un cambio de tiempo o memoria se considera ruido
+NOISE_FLOOR = {"p95_ms": 1.0, "build_seconds": 0.5, "peak_rss_mb": 50.0}
+
+def parse_scale(value: str) -> int:
+    if value.lower() in SCALES:
+        return SCALES[value.lower()]
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Escala inválida: '{value}'. Usa {', '.join(SCALES)} o un entero")
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def generate_dataset(data_dir: str, entities: int, seed: int, regenerate: bool) -> str:
+    """
+    Carpeta con los CSV de `createCSV.py` para la escala y semilla; los reutiliza si ya existen.
+    """
+    name = f"scale-{entities}-seed-{seed}"
+    # createCSV.py escribe en <directorio actual>/src/<nombre que se ingresa>
+    folder = os.path.join(data_dir, "src", name)
+    if regenerate and os.path.isdir(folder):
+        shutil.rmtree(folder)
+    if not os.path.exists(os.path.join(folder, LAST_CSV_FILE)):
+        os.makedirs(data_dir, exist_ok=True)
+        started = time.perf_counter()
+        subprocess.run([sys.executable, CREATE_CSV], input=f"{name}\n1\n{entities}\n", text=True, cwd=data_dir,
+                       env=dict(os.environ, CSV_SEED=str(seed)), stdout=subprocess.DEVNULL, check=True)
+        print(f"[{entities}] CSV generados en {time.perf_counter() - started:.1f} s ({folder})")
+    return folder
+
+def split_purchases(folder: str, train_dir: str, fraction: float, seed: int) -> pd.DataFrame:
+    """
+    Copia la carpeta en `train_dir` sin una fracción de las compras; retorna las apartadas.
+    """
+    purchases = pd.read_csv(os.path.join(folder, PURCHASE_FILE))
+    rng = np.random.default_rng(seed)
+    held = np.zeros(len(purchases), dtype=bool)
+    held[rng.choice(len(purchases), size=int(round(fraction * len(purchases))), replace=False)] = True
+    purchases[~held].to_csv(os.path.join(train_dir, PURCHASE_FILE), index=False)
+    for file in os.listdir(folder):
+        if file.endswith(".csv") and file != PURCHASE_FILE:
+            try:
+                os.symlink(os.path.join(folder, file), os.path.join(train_dir, file))
+            except OSError:
+                shutil.copyfile(os.path.join(folder, file), os.path.join(train_dir, file))
+    return purchases[held]
+
+def strategies(index, store):
+    """
+    Estrategia -> (construcción, recomendación). La recomendación recibe el usuario, lo
+    que compró en el set de entrenamiento y `k`, y retorna nombres de componentes.
+    """
+    from recommendations.personalizedPageRank import personalized_pagerank, top_nodes
+    from recommendations.trendingCounters import TRENDING_RETENTION_DAYS
+    from recommendations.userRecommender import recommend_for_user
+
+    def ranked(scores: dict, purchased: set, k: int) -> list:
+        candidates = [name for name in scores if name not in purchased]
+        return sorted(candidates, key=lambda name: (-scores[name], str(name)))[:k]
+
+    async def build_also_bought():
+        await index.matrix("PURCHASED")
+
+    async def also_bought(user, purchased, k):
+        return ranked((await index.matrix("PURCHASED")).cooccurrence_scores(purchased), purchased, k)
+
+    async def build_user_blend():
+        for rel_type in ("PURCHASED", "WANTS", "SEARCHED", "SUPPLIES"):
+            await index.matrix(rel_type)
+
+    async def user_blend(user, purchased, k):
+        node = await store.get_node("User", "name", user, fields=["name", "budget", "preferred_brands"])
+        return [item["name"] for item in (await recommend_for_user(index, store, node))["items"][:k]]
+
+    async def build_pagerank():
+        await index.pagerank.graph()
+
+    async def pagerank(user, purchased, k):
+        graph = await index.pagerank.graph()
+        node = graph.node("User", user)
+        if node is None:
+            return []
+        scores = personalized_pagerank(graph, [node]).scores[:, 0]
+        return [item["name"] for item in top_nodes(graph, scores, "Component", k, exclude=graph.neighbors(node))]
+
+    async def build_similar():
+        await index.similar.get()
+
+    async def similar(user, purchased, k):
+        scores = {}
+        for component in purchased:
+            for item in await index.similar.similar(component, k=k) or []:
+                scores[item["name"]] = scores.get(item["name"], 0.0) + item["score"]
+        return ranked(scores, purchased, k)
+
+    popular_as_of = {}
+
+    async def build_popular():
+        counter = (await index.trending.get())["PURCHASED"]
+        popular_as_of["date"] = datetime.date.fromordinal(counter.latest)
+
+    async def popular(user, purchased, k):
+        top = await index.trending.top("PURCHASED", TRENDING_RETENTION_DAYS, k + len(purchased), popular_as_of["date"])
+        return [item["name"] for item in top["items"] if item["name"] not in purchased][:k]
+
+    return {
+        "also_bought": (build_also_bought, also_bought),
+        "user_blend": (build_user_blend, user_blend),
+        "pagerank": (build_pagerank, pagerank),
+        "similar": (build_similar, similar),
+        "popular": (build_popular, popular),
+    }
+
+async def evaluate(train_dir: str, held: pd.DataFrame, entities: int, options: dict) -> dict:
+    from recommendations.componentEmbeddings import ComponentSimilarityIndex
+    from recommendations.personalizedPageRank import PageRankService
+    from recommendations.recommendationIndex import RecommendationIndex
+    from store.memoryStore import MemoryStore
+
+    started = time.perf_counter()
+    store = MemoryStore()
+    store.load_csv_folder(train_dir)
+    load_seconds = time.perf_counter() - started
+    print(f"[{entities}] Store cargado en {load_seconds:.1f} s")
+
+    index = RecommendationIndex(store)
+    # Siempre desde el store: sin snapshot ni índice guardado en disco
+    index.pagerank = PageRankService(store, snapshot_dir=None)
+    index.similar = ComponentSimilarityIndex(store, path=None)
+    purchases = await index.matrix("PURCHASED")
+    catalog = len([node async for node in store.stream_nodes("Component", fields=["name"])])
+
+    truth = held.groupby("user")["component"].agg(set).to_dict()
+    rng = np.random.default_rng(options["seed"])
+    users = sorted(truth)
+    users = [users[i] for i in sorted(rng.choice(len(users), size=min(options["queries"], len(users)), replace=False))]
+
+    k = options["k"]
+    results = []
+    for name, (build, recommend) in strategies(index, store).items():
+        if name not in options["strategies"]:
+            continue
+        started = time.perf_counter()
+        await build()
+        build_seconds = time.perf_counter() - started
+
+        latencies, precision, recall, hits, answered = [], [], [], 0, 0
+        recommended = set()
+        for user in users:
+            purchased = set(purchases.items(user))
+            started = time.perf_counter()
+            items = await recommend(user, purchased, k)
+            latencies.append(time.perf_counter() - started)
+            found = len(truth[user].intersection(items))
+            precision.append(found / k)
+            recall.append(found / len(truth[user]))
+            hits += found > 0
+            answered += bool(items)
+            recommended.update(items)
+
+        latencies.sort()
+        result = {
+            "entities": entities,
+            "strategy": name,
+            "queries": len(users),
+            "answered": answered,
+            "precision": round(statistics.fmean(precision), 5) if users else 0.0,
+            "recall": round(statistics.fmean(recall), 5) if users else 0.0,
+            "hit_rate": round(hits / len(users), 5) if users else 0.0,
+            "coverage": round(len(recommended) / catalog, 5) if catalog else 0.0,
+            "build_seconds": round(build_seconds, 3),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        results.append(result)
+        print(f"[{entities}] {name:<11} P@{k}={result['precision']:.4f} R@{k}={result['recall']:.4f} "
+              f"cov={result['coverage']:.3f} build={result['build_seconds']}s p50={result['p50_ms']}ms "
+              f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms rss={result['peak_rss_mb']}MB")
+
+    await store.close()
+    return {
+        "entities": entities,
+        "load_seconds": round(load_seconds, 3),
+        "components": catalog,
+        "train_purchases": int(purchases.stats()["interactions"]),
+        "held_out_purchases": len(held),
+        "strategies": results,
+    }
+
+def run_scale(entities: int, options: dict) -> dict:
+    """
+    Genera, separa y evalúa una escala. Corre en un proceso propio para que el RSS máximo
+    sea el de esa escala.
+    """
+    folder = generate_dataset(options["data_dir"], entities, options["seed"], options["regenerate"])
+    with tempfile.TemporaryDirectory(prefix="benchRecommendations-") as train_dir:
+        held = split_purchases(folder, train_dir, options["holdout"], options["seed"])
+        return asyncio.run(evaluate(train_dir, held, entities, options))
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Métricas que empeoraron más de `tolerance` (relativo) respecto de `baseline`.
+    """
+    previous = {(row["entities"], row["strategy"]): row for scale in baseline["scales"] for row in scale["strategies"]}
+    regressions = []
+    for scale in report["scales"]:
+        for row in scale["strategies"]:
+            before = previous.get((row["entities"], row["strategy"]))
+            if before is None:
+                continue
+            for metric in COMPARED_METRICS:
+                old, new = before.get(metric), row.get(metric)
+                if old is None or new is None:
+                    continue
+                change = (new - old) / old if old else 0.0
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                if worse > tolerance and abs(new - old) > NOISE_FLOOR.get(metric, 0.0):
+                    regressions.append({"entities": row["entities"], "strategy": row["strategy"], "metric": metric,
+                                        "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+def write_csv(path: str, report: dict):
+    rows = [row for scale in report["scales"] for row in scale["strategies"]]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["commit", "seed", "holdout", "k", *rows[0].keys()] if rows else ["commit"])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict(row, commit=report["commit"], seed=report["config"]["seed"],
+                                 holdout=report["config"]["holdout"], k=report["config"]["k"]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", type=parse_scale, default=[SCALES["10k"]],
+                        help="Entidades por label: 10k, 100k, 1m o un entero")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos, de la separación y de la muestra")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fracción de compras que se apartan")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000, help="Máximo de usuarios evaluados por escala")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "benchRecommendations"),
+                        help="Dónde se guardan (y reutilizan) los CSV generados")
+    parser.add_argument("--regenerate", action="store_true", help="Vuelve a generar los CSV aunque existan")
+    parser.add_argument("--output", help="Ruta opcional para guardar el reporte en JSON")
+    parser.add_argument("--csv", help="Ruta opcional para guardar una fila por escala y estrategia en CSV")
+    parser.add_argument("--baseline", help="Reporte JSON anterior contra el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Empeoramiento relativo tolerado respecto del baseline")
+    args = parser.parse_args()
+    if not 0 < args.holdout < 1:
+        parser.error("--holdout debe estar entre 0 y 1")
+
+    options = {
+        "seed": args.seed,
+        "holdout": args.holdout,
+        "k": args.k,
+        "queries": args.queries,
+        "strategies": args.strategies,
+        "data_dir": os.path.abspath(args.data_dir),
+        "regenerate": args.regenerate,
+    }
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in options.items() if key not in ("data_dir", "regenerate")},
+        "scales": [],
+    }
+    for entities in args.scales:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            report["scales"].append(executor.submit(run_scale, entities, options).result())
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Reporte guardado en {args.output}")
+    if args.csv:
+        write_csv(args.csv, report)
+        print(f"Resultados guardados en {args.csv}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("⚠️ El baseline se generó con otra configuración; las métricas de calidad no son comparables")
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"❌ [{regression['entities']}] {regression['strategy']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Sin regresiones respecto de {args.baseline} (commit {baseline.get('commit')})")
+
+if __name__ == "__main__":
+    main()
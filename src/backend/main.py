@@ -1,14 +1,75 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import logging
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from neo4j.exceptions import DriverError, Neo4jError
+from recommendations.recommendationIndex import RECOMMENDATIONS_PRELOAD, RecommendationIndex
+from store.cypherTemplates import InvalidIdentifier
+from store.nodeCache import NodeCache
+from store.schemaCatalog import SchemaCatalog, invalidate_schema
+from store.storeFactory import create_store
+from utils.indexProvisioning import PROVISION_INDEXES
+from utils.jsonResponse import FastJSONResponse
 from api.endpoints.get import getNodes
-from api.endpoints.get import getRelationship
+from api.endpoints.get import getCategories, getRecommendations, getRelationship, getSchema, getStats, getTrending
 from api.endpoints.post import createNodes, createRelationships
 from api.endpoints.patch import patchNodes, putPropRelationship, updatePropRelationship
 from api.endpoints.delete import deleteNodes, deleteRelations, deletePropRelationship
 
 import uvicorn
 
-app = FastAPI(title="Neo4j API", description="API para gestionar nodos y relaciones en Neo4j.")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crea el store del grafo una sola vez para todo el proceso y lo cierra al apagar la API.
+    Con `GRAPH_STORE=neo4j` el store tiene un único driver de Neo4j (y su pool de conexiones),
+    sync o async según `NEO4J_DRIVER_MODE`; con `GRAPH_STORE=memory` el grafo vive en el proceso.
+    Los routers lo reciben con `Depends(get_store)`.
+    Al arrancar crea los índices de `utils.labelRegistry` (desactivable con `PROVISION_INDEXES=false`).
+    También crea el catálogo del esquema (`Depends(get_schema_catalog)`), que los routers de
+    escritura invalidan con `invalidate_schema`, y la caché de nodos por identificador
+    (`Depends(get_node_cache)`), que los handlers de escritura de nodos mantienen al día.
+    El índice de recomendaciones (`Depends(get_recommendations)`) se construye en la primera
+    lectura, o al arrancar con `RECOMMENDATIONS_PRELOAD=true`. El índice de componentes
+    similares se carga de `COMPONENT_INDEX_PATH` al arrancar y se vuelve a guardar al apagar.
+    """
+    app.state.store = create_store()
+    app.state.schema = SchemaCatalog(app.state.store)
+    app.state.node_cache = NodeCache()
+    app.state.recommendations = RecommendationIndex(app.state.store)
+    if PROVISION_INDEXES:
+        # Índices y constraints de los identificadores (idempotente); su avance se ve en /schema/indexes
+        try:
+            await app.state.store.provision_indexes()
+        except (DriverError, Neo4jError) as error:
+            logger.warning("No se pudieron crear los índices: %s", error)
+    try:
+        app.state.recommendations.similar.load()
+    except (OSError, ValueError, KeyError) as error:
+        logger.warning("No se pudo cargar el índice de componentes similares: %s", error)
+    if RECOMMENDATIONS_PRELOAD:
+        try:
+            await app.state.recommendations.preload()
+        except (DriverError, Neo4jError) as error:
+            logger.warning("No se pudieron precargar las recomendaciones: %s", error)
+    try:
+        yield
+    finally:
+        try:
+            app.state.recommendations.similar.save_if_changed()
+        except OSError as error:
+            logger.warning("No se pudo guardar el índice de componentes similares: %s", error)
+        await app.state.store.close()
+
+app = FastAPI(
+    title="Neo4j API",
+    description="API para gestionar nodos y relaciones en Neo4j.",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,25 +79,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(InvalidIdentifier)
+async def invalid_identifier_handler(request: Request, error: InvalidIdentifier):
+    # Labels, tipos o propiedades que no pueden ir en el texto de una consulta
+    return JSONResponse(status_code=400, content={"detail": str(error)})
+
 app.include_router(getNodes.router, prefix="/nodes", tags=["Nodes"])
 
 app.include_router(getRelationship.router, prefix="/relationships", tags=["Relationships"])
 
-app.include_router(createNodes.router, prefix="/nodes", tags=["Nodes"])
+app.include_router(getSchema.router, prefix="/schema", tags=["Schema"])
+
+app.include_router(getStats.router, prefix="/stats", tags=["Stats"])
+
+app.include_router(getRecommendations.router, prefix="/recommendations", tags=["Recommendations"])
+
+app.include_router(getTrending.router, prefix="/trending", tags=["Trending"])
+
+app.include_router(getCategories.router, prefix="/categories", tags=["Categories"])
+
+app.include_router(createNodes.router, prefix="/nodes", tags=["Nodes"], dependencies=[Depends(invalidate_schema)])
 
-app.include_router(createRelationships.router, prefix="/relationships", tags=["Relationships"])
+app.include_router(createRelationships.router, prefix="/relationships", tags=["Relationships"], dependencies=[Depends(invalidate_schema)])
 
-app.include_router(patchNodes.router, prefix="/nodes", tags=["Nodes"])
+app.include_router(patchNodes.router, prefix="/nodes", tags=["Nodes"], dependencies=[Depends(invalidate_schema)])
 
-app.include_router(putPropRelationship.router, prefix="/relationships", tags=["Relationships"])  
+app.include_router(putPropRelationship.router, prefix="/relationships", tags=["Relationships"], dependencies=[Depends(invalidate_schema)])  
 
-app.include_router(updatePropRelationship.router, prefix="/relationships", tags=["Relationships"])  
+app.include_router(updatePropRelationship.router, prefix="/relationships", tags=["Relationships"], dependencies=[Depends(invalidate_schema)])  
 
-app.include_router(deleteNodes.router, prefix="/nodes", tags=["Nodes"])
+app.include_router(deleteNodes.router, prefix="/nodes", tags=["Nodes"], dependencies=[Depends(invalidate_schema)])
 
-app.include_router(deleteRelations.router, prefix="/relationships", tags=["Relationships"])
+app.include_router(deleteRelations.router, prefix="/relationships", tags=["Relationships"], dependencies=[Depends(invalidate_schema)])
 
-app.include_router(deletePropRelationship.router, prefix="/relationships", tags=["Relationships"])
+app.include_router(deletePropRelationship.router, prefix="/relationships", tags=["Relationships"], dependencies=[Depends(invalidate_schema)])
 
 @app.get("/")
 def read_root():
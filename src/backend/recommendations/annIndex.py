@@ -0,0 +1,235 @@
+"""
+Índice IVF (inverted file) para búsqueda aproximada de vecinos por similitud coseno.
+
+Los vectores se agrupan con k-means esférico en `nlist` centroides y cada vector queda en la
+lista de su centroide más cercano. Una búsqueda compara la consulta con los centroides,
+recorre solo las `nprobe` listas más cercanas y ordena esos candidatos por producto punto
+(los vectores se guardan normalizados). Con `nprobe = nlist` la búsqueda es exacta.
+
+Agregar un vector no reentrena los centroides: se asigna al más cercano. Quitar uno lo
+marca como eliminado. `save`/`load` guardan todo en un `.npz` (sin pickle).
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Iteraciones de k-means al entrenar
+KMEANS_ITERATIONS = 15
+# Vectores por centroide con los que se elige `nlist` por defecto
+VECTORS_PER_LIST = 64
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = KMEANS_ITERATIONS,
+                     seed: int = 0) -> np.ndarray:
+    """
+    Centroides normalizados de `vectors` (ya normalizados). Los centroides que quedan sin
+    vectores se reinician en el vector peor asignado.
+    """
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        similarity = vectors @ centroids.T
+        assignment = similarity.argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=clusters)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            worst = np.argsort(similarity[np.arange(len(vectors)), assignment])[:len(empty)]
+            sums[empty] = vectors[worst]
+        centroids = normalized(sums)
+    return centroids
+
+
+class IVFIndex:
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.names: List[Any] = []
+        self.ids: Dict[Any, int] = {}
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.assignment = np.zeros(0, dtype=np.int64)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.centroids = np.zeros((0, dimensions), dtype=np.float32)
+        self._lists: List[List[int]] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, name: Any) -> bool:
+        return name in self.ids
+
+    @classmethod
+    def build(cls, names: Sequence[Any], vectors: np.ndarray, nlist: Optional[int] = None, seed: int = 0) -> "IVFIndex":
+        """
+        Entrena los centroides con `vectors` y agrega todos. Por defecto `nlist` ≈ n / 64.
+        """
+        vectors = normalized(vectors)
+        index = cls(vectors.shape[1])
+        if len(vectors):
+            nlist = nlist or max(1, len(vectors) // VECTORS_PER_LIST)
+            index.centroids = spherical_kmeans(vectors, nlist, seed=seed)
+        index._lists = [[] for _ in range(len(index.centroids))]
+        index.add_many(names, vectors)
+        return index
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return (vectors @ self.centroids.T).argmax(axis=1) if len(self.centroids) else np.zeros(len(vectors), dtype=np.int64)
+
+    def _reserve(self, extra: int):
+        # Crece por duplicación, como una lista, para que agregar de a uno sea O(1) amortizado
+        needed = self._count + extra
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors), 16)
+        for attribute, fill in (("vectors", 0.0), ("assignment", 0), ("deleted", True)):
+            current = getattr(self, attribute)
+            grown = np.full((capacity,) + current.shape[1:], fill, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, attribute, grown)
+
+    def add_many(self, names: Sequence[Any], vectors: np.ndarray):
+        """
+        Agrega o reemplaza vectores. Si todavía no hay centroides, el primero hace de centroide.
+        """
+        vectors = normalized(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimensions))
+        if not len(self.centroids) and len(vectors):
+            self.centroids = vectors[:1].copy()
+            self._lists = [[]]
+        for name in names:
+            self.remove(name)
+        self._reserve(len(vectors))
+        assignment = self._assign(vectors)
+        for name, vector, cluster in zip(names, vectors, assignment.tolist()):
+            position = self._count
+            self._count += 1
+            self.vectors[position] = vector
+            self.assignment[position] = cluster
+            self.deleted[position] = False
+            if position < len(self.names):
+                self.names[position] = name
+            else:
+                self.names.append(name)
+            self.ids[name] = position
+            self._lists[cluster].append(position)
+
+    def add(self, name: Any, vector: np.ndarray):
+        self.add_many([name], np.asarray(vector)[None, :])
+
+    def remove(self, name: Any) -> bool:
+        position = self.ids.pop(name, None)
+        if position is None:
+            return False
+        self.deleted[position] = True
+        return True
+
+    def vector(self, name: Any) -> Optional[np.ndarray]:
+        position = self.ids.get(name)
+        return None if position is None else self.vectors[position]
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = 8,
+               exclude: Sequence[Any] = ()) -> List[Tuple[Any, float]]:
+        """
+        Los `k` vectores más parecidos a `query` (coseno) dentro de las `nprobe` listas más
+        cercanas, de mayor a menor similitud.
+        """
+        if not len(self.centroids) or not self.ids:
+            return []
+        query = normalized(np.asarray(query, dtype=np.float32))
+        nprobe = max(1, min(nprobe, len(self.centroids)))
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        candidates = np.fromiter((position for cluster in probes.tolist() for position in self._lists[cluster]),
+                                 dtype=np.int64)
+        if not len(candidates):
+            return []
+        excluded = {self.ids[name] for name in exclude if name in self.ids}
+        keep = ~self.deleted[candidates]
+        if excluded:
+            keep &= ~np.isin(candidates, list(excluded))
+        candidates = candidates[keep]
+        scores = self.vectors[candidates] @ query
+        if len(candidates) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[best], scores[best]
+        order = np.lexsort((candidates, -scores))
+        return [(self.names[position], float(scores[position_index]))
+                for position_index, position in zip(order.tolist(), candidates[order].tolist())]
+
+    def compact(self):
+        """
+        Quita los eliminados y rehace las listas (los centroides no cambian).
+        """
+        live = np.flatnonzero(~self.deleted[:self._count])
+        names = [self.names[position] for position in live.tolist()]
+        vectors, assignment = self.vectors[live], self.assignment[live]
+        self.names, self.ids = names, {name: position for position, name in enumerate(names)}
+        self.vectors, self.assignment = vectors, assignment
+        self.deleted = np.zeros(len(names), dtype=bool)
+        self._count = len(names)
+        self._lists = [[] for _ in range(len(self.centroids))]
+        for position, cluster in enumerate(assignment.tolist()):
+            self._lists[cluster].append(position)
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """
+        Copia de los arreglos de los vectores vivos, en el formato de `write`. No modifica el
+        índice, así el archivo se puede escribir en otro hilo mientras siguen llegando cambios.
+        """
+        live = np.flatnonzero(~self.deleted[:self._count])
+        return {"names": np.asarray([str(self.names[position]) for position in live.tolist()], dtype=str),
+                "vectors": self.vectors[live], "assignment": self.assignment[live], "centroids": self.centroids.copy()}
+
+    @staticmethod
+    def write(path: str, arrays: Dict[str, np.ndarray]):
+        """
+        Guarda `arrays` (un `snapshot` y sus arreglos extra) de forma atómica: archivo temporal y rename.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        partial = path + ".partial"
+        with open(partial, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(partial, path)
+
+    def save(self, path: str, **extra: np.ndarray):
+        """
+        Guarda el índice (y los arreglos de `extra`, alineados con los vectores vivos).
+        """
+        self.write(path, dict(self.snapshot(), **extra))
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["IVFIndex", Dict[str, np.ndarray]]:
+        """
+        Índice guardado con `save` y los arreglos extra que se guardaron con él.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        index = cls(arrays["vectors"].shape[1])
+        index.centroids = arrays.pop("centroids")
+        index.vectors = arrays.pop("vectors")
+        index.assignment = arrays.pop("assignment")
+        index.names = arrays.pop("names").tolist()
+        index.ids = {name: position for position, name in enumerate(index.names)}
+        index.deleted = np.zeros(len(index.names), dtype=bool)
+        index._count = len(index.names)
+        index._lists = [[] for _ in range(len(index.centroids))]
+        for position, cluster in enumerate(index.assignment.tolist()):
+            index._lists[cluster].append(position)
+        return index, arrays
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self.ids),
+            "deleted": int(self.deleted[:self._count].sum()),
+            "dimensions": self.dimensions,
+            "lists": len(self.centroids),
+        }
@@ -0,0 +1,184 @@
+"""
+Cálculo por lotes de las recomendaciones de `recommendations.userRecommender` para muchos
+usuarios a la vez, con las mismas señales, pesos y filtros, pero en operaciones de matrices
+dispersas sobre bloques de usuarios en lugar de usuario por usuario.
+
+`InteractionData` guarda el grafo exportado con ids enteros:
+  - filas de usuarios, columnas de componentes (ordenados por nombre, así los empates se
+    resuelven igual que en la API) y proveedores;
+  - `purchased`, `wanted`, `searched`: usuarios×componentes; `brands`: usuarios×proveedores
+    (`preferred_brands`); `supplies`: proveedores×componentes;
+  - `budgets` y `prices` (NaN si faltan).
+
+`BlockScorer.score_block(start, end, k)` calcula el top-k de los usuarios `[start, end)`: las
+señales se calculan con productos dispersos y se suman en bloques densos de a lo sumo
+`DENSE_BLOCK_CELLS` celdas, donde el filtro de presupuesto y el top-k son operaciones por
+filas de NumPy.
+Lo usa `utils/precomputeRecommendations.py`, que reparte los rangos en un pool de procesos.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from recommendations.interactionMatrix import top_k
+from recommendations.userRecommender import SIGNAL_WEIGHTS, as_list
+
+# Celdas (usuarios × componentes) del bloque denso en el que se suman las señales: 16 MB en float32
+DENSE_BLOCK_CELLS = 4_000_000
+
+
+class InteractionData(NamedTuple):
+    users: List[Any]
+    components: List[Any]
+    providers: List[Any]
+    budgets: np.ndarray
+    prices: np.ndarray
+    purchased: sparse.csr_matrix
+    wanted: sparse.csr_matrix
+    searched: sparse.csr_matrix
+    brands: sparse.csr_matrix
+    supplies: sparse.csr_matrix
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+
+
+def _binary(rows: Iterable[int], cols: Iterable[int], shape: Tuple[int, int]) -> sparse.csr_matrix:
+    rows = np.fromiter(rows, dtype=np.int32)
+    cols = np.fromiter(cols, dtype=np.int32)
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape)
+    # Relaciones repetidas entre el mismo par cuentan una vez
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def build_interaction_data(users: Sequence[Dict[str, Any]], components: Sequence[Dict[str, Any]],
+                           providers: Sequence[Any], edges: Dict[str, Sequence[Tuple[Any, Any]]]) -> InteractionData:
+    """
+    Codifica el grafo exportado. `users` trae name, budget y preferred_brands; `components`
+    name y price; `edges` tiene los pares (origen, destino) de PURCHASED, WANTS, SEARCHED y
+    SUPPLIES. Los pares con nodos desconocidos se descartan.
+    """
+    user_names = [user["name"] for user in users]
+    component_names = sorted({component["name"] for component in components}, key=str)
+    provider_names = sorted(set(providers), key=str)
+    user_ids = {name: index for index, name in enumerate(user_names)}
+    component_ids = {name: index for index, name in enumerate(component_names)}
+    provider_ids = {name: index for index, name in enumerate(provider_names)}
+
+    prices = np.full(len(component_names), np.nan, dtype=np.float64)
+    for component in components:
+        prices[component_ids[component["name"]]] = _number(component.get("price"))
+    budgets = np.array([_number(user.get("budget")) for user in users], dtype=np.float64)
+
+    def encode(pairs, from_ids, to_ids):
+        known = [(from_ids[a], to_ids[b]) for a, b in pairs if a in from_ids and b in to_ids]
+        return (pair[0] for pair in known), (pair[1] for pair in known), (len(from_ids), len(to_ids))
+
+    brand_pairs = [(user["name"], brand) for user in users for brand in as_list(user.get("preferred_brands"))]
+    return InteractionData(
+        users=user_names,
+        components=component_names,
+        providers=provider_names,
+        budgets=budgets,
+        prices=prices,
+        purchased=_binary(*encode(edges.get("PURCHASED", ()), user_ids, component_ids)),
+        wanted=_binary(*encode(edges.get("WANTS", ()), user_ids, component_ids)),
+        searched=_binary(*encode(edges.get("SEARCHED", ()), user_ids, component_ids)),
+        brands=_binary(*encode(brand_pairs, user_ids, provider_ids)),
+        supplies=_binary(*encode(edges.get("SUPPLIES", ()), provider_ids, component_ids)),
+    )
+
+
+def _cells(matrix: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    # (fila, columna) de cada celda no nula
+    return np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr)), matrix.indices
+
+
+def _signal(matrix: sparse.csr_matrix, exclude: Optional[sparse.csr_matrix] = None) -> np.ndarray:
+    """
+    Señal en denso sin las celdas de `exclude` y con cada fila dividida por su máximo, igual
+    que `userRecommender._normalized`.
+    """
+    dense = matrix.toarray().astype(np.float32, copy=False)
+    if exclude is not None:
+        dense[_cells(exclude)] = 0.0
+    maxima = dense.max(axis=1, keepdims=True)
+    np.divide(dense, maxima, out=dense, where=maxima > 0)
+    return dense
+
+
+def _top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k de cada fila de una matriz densa, de mayor a menor y con los empates por id (igual
+    que `interactionMatrix.top_k`). Las filas con empates en el k-ésimo puntaje, que
+    `argpartition` resolvería al azar, se recalculan con `top_k`.
+    """
+    k = min(k, scores.shape[1])
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, best, axis=1)
+    kth = values.min(axis=1)
+    tied = np.flatnonzero((kth > 0) & ((scores >= kth[:, None]).sum(axis=1) > k))
+    for row in tied:
+        candidates = np.flatnonzero(scores[row] > 0)
+        best[row] = candidates[top_k(scores[row, candidates], candidates, k)]
+        values[row] = scores[row, best[row]]
+    order = np.lexsort((best, -values), axis=1)
+    return np.take_along_axis(best, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class BlockScorer:
+
+    def __init__(self, data: InteractionData, weights: Optional[Dict[str, float]] = None,
+                 dense_cells: int = DENSE_BLOCK_CELLS):
+        self.data = data
+        self.weights = dict(SIGNAL_WEIGHTS, **(weights or {}))
+        self.dense_cells = dense_cells
+        # Co-compras componente×componente, la parte costosa: se calcula una vez en el proceso padre
+        self.cooccurrence = (data.purchased.T @ data.purchased).tocsr()
+
+    def score_block(self, start: int, end: int, k: int) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Top-k de los usuarios `[start, end)` como `(usuario, ids de componentes, puntajes)`.
+        """
+        step = max(1, self.dense_cells // max(1, len(self.data.components)))
+        results = []
+        for first in range(start, end, step):
+            results.extend(self._score_rows(first, min(first + step, end), k))
+        return results
+
+    def _score_rows(self, start: int, end: int, k: int) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+        data, weights = self.data, self.weights
+        purchased = data.purchased[start:end]
+        wanted = data.wanted[start:end]
+        searched = data.searched[start:end]
+        interest = ((wanted + searched) > 0).astype(np.float32).tocsr()
+
+        # Cada señal (producto disperso, celdas excluidas) se normaliza en denso y se suma
+        # al bloque usuarios×componentes de a una, así solo hay dos bloques en memoria
+        signals = {
+            "also_bought": (purchased @ self.cooccurrence, purchased),
+            "wanted": (wanted, None),
+            "searched": (searched, None),
+            "related": (interest @ self.cooccurrence, interest),
+            "brand": (data.brands[start:end] @ data.supplies, None),
+        }
+        scores = np.zeros(purchased.shape, dtype=np.float32)
+        for name, (matrix, exclude) in signals.items():
+            scores += weights[name] * _signal(matrix, exclude)
+
+        # Sin lo ya comprado y con price <= budget (los componentes sin precio se descartan)
+        scores[_cells(purchased)] = 0.0
+        budgets = data.budgets[start:end, None]
+        affordable = ~np.isnan(data.prices)[None, :] & (np.isnan(budgets) | (data.prices[None, :] <= budgets))
+        scores[~affordable] = 0.0
+
+        best, values = _top_k_rows(scores, k)
+        results = []
+        for row in range(end - start):
+            keep = values[row] > 0
+            if keep.any():
+                results.append((start + row, best[row][keep], values[row][keep]))
+        return results
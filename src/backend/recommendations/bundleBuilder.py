@@ -0,0 +1,265 @@
+"""
+Combos (bundles) de componentes compatibles a partir de las relaciones COMPLEMENTS.
+
+`ComplementGraph` guarda en memoria la compatibilidad entre componentes como adyacencia no
+dirigida: el peso de un par es su `compatibility_level` llevado a [0, 1] (el mayor de los
+dos sentidos si la relación existe en ambos), junto con el `price` de cada componente. Se
+arma en la primera lectura desde el store y después se mantiene con los eventos de
+escritura; un cambio de precio o de identificador lo marca para reconstruirlo.
+
+`build_bundle` arma el combo con una búsqueda en haz (beam search): parte de los
+componentes semilla (un carrito) y en cada paso agrega a cada combo del haz uno de los
+componentes compatibles con alguno de sus miembros, hasta `size` componentes. El puntaje
+de un combo es la suma de la compatibilidad de cada par de miembros (sin los pares entre
+semillas), multiplicada por `decay^(saltos - 1)`, donde los saltos son la distancia por
+COMPLEMENTS del miembro más lejano del par a las semillas (hasta `max_hops`). Así un
+componente que solo es compatible a través de otro cuenta menos que uno compatible con el
+carrito, uno compatible con varios miembros cuenta más, y el puntaje no depende del orden
+en que se agregaron. Con `max_price` solo se agregan componentes con precio que no pasen
+el total del combo.
+"""
+
+import os
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Set, Tuple
+from recommendations.lazyBuild import LazyBuild
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import relationship_specs
+
+# Componentes por combo por defecto (incluye el carrito)
+BUNDLE_SIZE = int(os.getenv("BUNDLE_SIZE", "4"))
+
+BUNDLE_MAX_HOPS = 3
+DEFAULT_HOPS = 2
+DEFAULT_HOP_DECAY = 0.5
+DEFAULT_BEAM_WIDTH = 8
+# Mayor `compatibility_level` que genera `utils/createCSV.py` (de 1 a 10)
+COMPATIBILITY_SCALE = 10.0
+
+RELATION: RelationshipSpec = relationship_specs(["COMPLEMENTS"])["COMPLEMENTS"]
+
+
+def compatibility(properties: Optional[Dict[str, Any]]) -> float:
+    """
+    `compatibility_level` de la relación en [0, 1]; 0 si no tiene o no es numérico.
+    """
+    try:
+        level = float((properties or {}).get("compatibility_level"))
+    except (TypeError, ValueError):
+        return 0.0
+    return min(max(level / COMPATIBILITY_SCALE, 0.0), 1.0) if level == level else 0.0
+
+
+def _price(value: Any) -> Optional[float]:
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price == price else None
+
+
+class ComplementGraph:
+
+    def __init__(self):
+        # (origen, destino) -> compatibilidad de la relación en ese sentido
+        self._levels: Dict[Tuple[Any, Any], float] = {}
+        self.neighbors: Dict[Any, Dict[Any, float]] = {}
+        self.prices: Dict[Any, Optional[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._levels)
+
+    def _refresh(self, first: Any, second: Any):
+        levels = [self._levels[pair] for pair in ((first, second), (second, first)) if pair in self._levels]
+        if levels:
+            self.neighbors.setdefault(first, {})[second] = max(levels)
+            self.neighbors.setdefault(second, {})[first] = max(levels)
+        else:
+            for node, other in ((first, second), (second, first)):
+                adjacent = self.neighbors.get(node)
+                if adjacent is not None:
+                    adjacent.pop(other, None)
+                    if not adjacent:
+                        del self.neighbors[node]
+
+    def set_edge(self, from_value: Any, to_value: Any, weight: float):
+        if from_value == to_value:
+            return
+        self._levels[(from_value, to_value)] = weight
+        self._refresh(from_value, to_value)
+
+    def update_edge(self, from_value: Any, to_value: Any, weight: float):
+        # Solo si la relación existe: actualizar propiedades no crea relaciones
+        if (from_value, to_value) in self._levels:
+            self.set_edge(from_value, to_value, weight)
+
+    def remove_edge(self, from_value: Any, to_value: Any):
+        if self._levels.pop((from_value, to_value), None) is not None:
+            self._refresh(from_value, to_value)
+
+    def remove_node(self, name: Any):
+        for other in list(self.neighbors.get(name, ())):
+            self._levels.pop((name, other), None)
+            self._levels.pop((other, name), None)
+            self._refresh(name, other)
+        self.prices.pop(name, None)
+
+    def set_price(self, name: Any, price: Any):
+        self.prices[name] = _price(price)
+
+    def hops(self, seeds: Iterable[Any], max_hops: int) -> Dict[Any, int]:
+        """
+        Distancia por COMPLEMENTS de cada componente a las semillas, hasta `max_hops` (BFS).
+        """
+        distance = {seed: 0 for seed in seeds}
+        frontier = list(distance)
+        for hop in range(1, max_hops + 1):
+            reached = []
+            for node in frontier:
+                for other in self.neighbors.get(node, ()):
+                    if other not in distance:
+                        distance[other] = hop
+                        reached.append(other)
+            frontier = reached
+        return distance
+
+
+class _Beam(NamedTuple):
+    members: Tuple[Any, ...]
+    score: float
+    price: float
+    gains: Dict[Any, float]
+
+
+def _extend(graph: ComplementGraph, gains: Dict[Any, float], members: Set[Any], added: Any,
+            distance: Dict[Any, int], decay: float) -> Dict[Any, float]:
+    gains = dict(gains)
+    del gains[added]
+    for other, weight in graph.neighbors.get(added, {}).items():
+        if other in distance and other not in members:
+            gains[other] = gains.get(other, 0.0) + weight * decay ** (max(distance[added], distance[other]) - 1)
+    return gains
+
+
+def build_bundle(graph: ComplementGraph, seeds: Sequence[Any], size: int = BUNDLE_SIZE, max_price: Optional[float] = None,
+                 max_hops: int = DEFAULT_HOPS, decay: float = DEFAULT_HOP_DECAY,
+                 beam_width: int = DEFAULT_BEAM_WIDTH) -> Dict[str, Any]:
+    """
+    Combo de hasta `size` componentes (contando `seeds`) con el mayor puntaje. Retorna los
+    componentes agregados en orden, con su aporte, sus saltos a las semillas y los miembros
+    del combo con los que son compatibles directamente.
+    """
+    seeds = list(dict.fromkeys(seeds))
+    distance = graph.hops(seeds, max_hops)
+    seed_set = set(seeds)
+
+    gains: Dict[Any, float] = {}
+    for seed in seeds:
+        for other, weight in graph.neighbors.get(seed, {}).items():
+            if other not in seed_set:
+                gains[other] = gains.get(other, 0.0) + weight
+    seed_price = sum(graph.prices.get(seed) or 0.0 for seed in seeds)
+    beam = [_Beam(tuple(seeds), 0.0, seed_price, gains)]
+    best = beam[0]
+
+    for _ in range(size - len(seeds)):
+        # Se puntúan todas las extensiones y solo se copian las ganancias de las que quedan en el haz
+        extensions: Dict[frozenset, Tuple[float, Tuple[Any, ...], _Beam, Any, float]] = {}
+        for state in beam:
+            for candidate, gain in state.gains.items():
+                if gain <= 0:
+                    continue
+                price = graph.prices.get(candidate)
+                if max_price is not None and (price is None or state.price + price > max_price):
+                    continue
+                members = state.members + (candidate,)
+                key = frozenset(members)
+                score = state.score + gain
+                if key not in extensions or score > extensions[key][0]:
+                    extensions[key] = (score, members, state, candidate, price or 0.0)
+        if not extensions:
+            break
+        ranked = sorted(extensions.values(), key=lambda entry: (-entry[0], [str(member) for member in entry[1]]))
+        beam = [
+            _Beam(members, score, state.price + price, _extend(graph, state.gains, set(members), candidate, distance, decay))
+            for score, members, state, candidate, price in ranked[:beam_width]
+        ]
+        if beam[0].score > best.score:
+            best = beam[0]
+
+    members = set(best.members)
+    items = []
+    for position, name in enumerate(best.members[len(seeds):], start=len(seeds)):
+        adjacent = graph.neighbors.get(name, {})
+        items.append({
+            "name": name,
+            "score": sum(adjacent.get(member, 0.0) * decay ** (max(distance[member], distance[name]) - 1)
+                         for member in best.members[:position]),
+            "hops": distance[name],
+            "price": graph.prices.get(name),
+            "compatible_with": sorted((member for member in members if member in adjacent), key=str),
+        })
+    return {"items": items, "score": best.score, "total_price": best.price}
+
+
+class BundleBuilder(LazyBuild[ComplementGraph]):
+
+    def __init__(self, store: GraphStore):
+        super().__init__()
+        self.store = store
+
+    async def _build(self) -> ComplementGraph:
+        graph = ComplementGraph()
+        async for node in self.store.stream_nodes("Component", fields=["name", "price"]):
+            if node.get("name") is not None:
+                graph.set_price(node["name"], node.get("price"))
+        async for from_value, to_value, properties in self.store.stream_relationships(RELATION):
+            graph.set_edge(from_value, to_value, compatibility(properties))
+        return graph
+
+    # ----------------------------------------------------------------- Eventos de escritura
+
+    def relationship_created(self, from_value: Any, to_value: Any, properties: Optional[Dict[str, Any]]):
+        graph = self.tracked()
+        if graph is not None:
+            graph.set_edge(from_value, to_value, compatibility(properties))
+
+    def relationships_updated(self, pairs: Iterable[Tuple[Any, Any]], set_props: Optional[Dict[str, Any]] = None,
+                              remove_props: Iterable[str] = ()):
+        if "compatibility_level" not in (set_props or {}) and "compatibility_level" not in remove_props:
+            return
+        graph = self.tracked()
+        if graph is not None:
+            weight = compatibility(set_props)
+            for from_value, to_value in pairs:
+                graph.update_edge(from_value, to_value, weight)
+
+    def relationships_deleted(self, pairs: Iterable[Tuple[Any, Any]]):
+        graph = self.tracked()
+        if graph is not None:
+            for from_value, to_value in pairs:
+                graph.remove_edge(from_value, to_value)
+
+    def component_created(self, properties: Dict[str, Any]):
+        graph = self.tracked()
+        if graph is not None and properties.get("name") is not None:
+            graph.set_price(properties["name"], properties.get("price"))
+
+    def components_deleted(self, values: Sequence[Any]):
+        graph = self.tracked()
+        if graph is not None:
+            for value in values:
+                graph.remove_node(value)
+
+    async def bundle(self, seeds: Sequence[Any], size: int = BUNDLE_SIZE, max_price: Optional[float] = None,
+                     max_hops: int = DEFAULT_HOPS, decay: float = DEFAULT_HOP_DECAY,
+                     beam_width: int = DEFAULT_BEAM_WIDTH) -> Dict[str, Any]:
+        graph = await self.get()
+        return build_bundle(graph, seeds, size, max_price, max_hops, decay, beam_width)
+
+    def stats(self) -> Dict[str, Any]:
+        graph = self._value
+        return {
+            "components": len(graph.prices) if graph is not None else 0,
+            "relationships": len(graph) if graph is not None else 0,
+            **self.build_stats(),
+        }
@@ -0,0 +1,399 @@
+"""
+Embeddings de componentes e índice de componentes similares.
+
+Los vectores salen del grafo User–Component de `EMBEDDING_RELATIONS` (PURCHASED, WANTS y
+COMPLEMENTS), tomado como no dirigido y con un peso por tipo de relación:
+
+  1. `random_walks`: caminatas aleatorias ponderadas desde cada componente, todas las de un
+     bloque avanzan juntas con un `searchsorted` sobre los pesos acumulados de la CSR.
+  2. `walk_cooccurrence`: cuántas veces dos componentes aparecen a menos de
+     `EMBEDDING_WINDOW` pasos en una caminata (con peso 1/distancia). Los usuarios son
+     pasos intermedios: acercan los componentes que compran o desean las mismas personas.
+  3. `ppmi`: PMI positiva de esas co-ocurrencias.
+  4. `truncated_svd`: los `EMBEDDING_DIMENSIONS` valores singulares mayores (con una SVD
+     aleatorizada si la matriz es grande); el vector de cada componente es U·√S normalizado.
+
+Un componente sin co-ocurrencias (o creado después del entrenamiento) recibe el promedio
+de los vectores entrenados de su `type`, o si no hay, de su `main_market`.
+
+`ComponentSimilarityIndex` guarda los vectores en un `annIndex.IVFIndex` en
+`COMPONENT_INDEX_PATH`: lo carga al arrancar la API, lo entrena desde el store en la primera
+consulta si no hay archivo, agrega los componentes que se crean por `createNodes` y lo
+vuelve a guardar al apagar la API.
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import linalg, sparse
+from starlette.concurrency import run_in_threadpool
+from recommendations.annIndex import IVFIndex, normalized
+from recommendations.lazyBuild import LazyBuild
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import LABELS, relationship_specs
+
+logger = logging.getLogger(__name__)
+
+# Archivo `.npz` del índice (se crea la carpeta si no existe)
+COMPONENT_INDEX_PATH = os.getenv("COMPONENT_INDEX_PATH", "indexes/components.npz")
+# Listas del índice que se recorren por consulta por defecto (más = más exacto y más lento)
+COMPONENT_INDEX_NPROBE = int(os.getenv("COMPONENT_INDEX_NPROBE", "8"))
+
+EMBEDDING_DIMENSIONS = 64
+EMBEDDING_WALKS_PER_NODE = 10
+EMBEDDING_WALK_LENGTH = 20
+EMBEDDING_WINDOW = 5
+# Caminatas por bloque (cada bloque ocupa caminatas × largo enteros)
+EMBEDDING_WALK_BATCH = 50_000
+# Hasta este tamaño la SVD se hace densa; arriba se usa `randomized_svd`
+DENSE_SVD_LIMIT = 1_000
+SVD_OVERSAMPLING = 16
+SVD_POWER_ITERATIONS = 4
+# Exponente con el que se suaviza la distribución de contextos en la PMI
+CONTEXT_SMOOTHING = 0.75
+
+# Tipo de relación -> peso de la arista en las caminatas
+EMBEDDING_RELATIONS: Dict[str, float] = {
+    "PURCHASED": 1.0,
+    "WANTS": 0.8,
+    "COMPLEMENTS": 1.0,
+}
+
+# Propiedades de Component con las que se ubica un componente sin vector entrenado
+COLD_START_PROPERTIES = ("type", "main_market")
+
+RELATIONS: Dict[str, RelationshipSpec] = relationship_specs(EMBEDDING_RELATIONS)
+
+
+def walk_adjacency(component_count: int, user_count: int, edges: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> sparse.csr_matrix:
+    """
+    Adyacencia no dirigida y ponderada: los componentes son los nodos 0..n-1 y los usuarios
+    van a continuación. `edges` tiene los pares (ids origen, ids destino) de cada relación.
+    """
+    size = component_count + user_count
+    rows, cols, values = [], [], []
+    for rel_type, (sources, targets) in edges.items():
+        spec = RELATIONS[rel_type]
+        sources = np.asarray(sources, dtype=np.int64) + (component_count if spec.from_label == "User" else 0)
+        targets = np.asarray(targets, dtype=np.int64) + (component_count if spec.to_label == "User" else 0)
+        weight = np.full(len(sources), EMBEDDING_RELATIONS[rel_type], dtype=np.float64)
+        rows += [sources, targets]
+        cols += [targets, sources]
+        values += [weight, weight]
+    if not rows:
+        return sparse.csr_matrix((size, size), dtype=np.float64)
+    adjacency = sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                                  shape=(size, size), dtype=np.float64)
+    adjacency.sum_duplicates()
+    return adjacency
+
+
+def random_walks(adjacency: sparse.csr_matrix, starts: np.ndarray, length: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Una caminata de `length` nodos desde cada nodo de `starts` (caminatas × length). Cada paso
+    elige un vecino con probabilidad proporcional al peso de la arista; un nodo sin vecinos
+    se queda donde está.
+    """
+    indptr = adjacency.indptr
+    cumulative = np.concatenate(([0.0], np.cumsum(adjacency.data)))
+    walks = np.empty((len(starts), length), dtype=np.int64)
+    walks[:, 0] = current = np.asarray(starts, dtype=np.int64)
+    for step in range(1, length):
+        begin, end = indptr[current], indptr[current + 1]
+        moving = end > begin
+        target = cumulative[begin] + rng.random(len(current)) * (cumulative[end] - cumulative[begin])
+        # Arista i de la fila: cumulative[i] <= target < cumulative[i + 1]
+        position = np.clip(np.searchsorted(cumulative, target, side="right") - 1, begin, end - 1)
+        current = current.copy()
+        current[moving] = adjacency.indices[position[moving]]
+        walks[:, step] = current
+    return walks
+
+
+def walk_cooccurrence(adjacency: sparse.csr_matrix, component_count: int, walks_per_node: int = EMBEDDING_WALKS_PER_NODE,
+                      length: int = EMBEDDING_WALK_LENGTH, window: int = EMBEDDING_WINDOW,
+                      batch: int = EMBEDDING_WALK_BATCH, seed: int = 0) -> sparse.csr_matrix:
+    """
+    Co-ocurrencias simétricas componente×componente dentro de `window` pasos, por bloques de
+    `batch` caminatas para acotar la memoria.
+    """
+    rng = np.random.default_rng(seed)
+    degree = np.diff(adjacency.indptr)[:component_count]
+    starts = np.repeat(np.flatnonzero(degree > 0), walks_per_node)
+    counts = sparse.csr_matrix((component_count, component_count), dtype=np.float64)
+    for begin in range(0, len(starts), batch):
+        walks = random_walks(adjacency, starts[begin:begin + batch], length, rng)
+        rows, cols, values = [], [], []
+        for distance in range(1, min(window, length - 1) + 1):
+            left, right = walks[:, :-distance].ravel(), walks[:, distance:].ravel()
+            keep = (left < component_count) & (right < component_count) & (left != right)
+            rows += [left[keep], right[keep]]
+            cols += [right[keep], left[keep]]
+            values.append(np.full(2 * int(keep.sum()), 1.0 / distance))
+        block = sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                                  shape=counts.shape)
+        counts = counts + block
+    counts.sum_duplicates()
+    return counts
+
+
+def ppmi(counts: sparse.csr_matrix, smoothing: float = CONTEXT_SMOOTHING) -> sparse.csr_matrix:
+    """
+    PMI positiva de una matriz de co-ocurrencias, con la distribución de contextos elevada a
+    `smoothing` (baja la PMI de los pares con componentes poco frecuentes).
+    """
+    counts = counts.tocoo()
+    if not counts.nnz:
+        return sparse.csr_matrix(counts.shape, dtype=np.float64)
+    rows = np.asarray(counts.sum(axis=1)).ravel()
+    contexts = np.asarray(counts.sum(axis=0)).ravel() ** smoothing
+    # log P(i, j) / (P(i) · Pα(j)); el total de co-ocurrencias se cancela
+    pmi = (np.log(counts.data) - np.log(rows[counts.row])
+           + np.log(contexts.sum()) - np.log(contexts[counts.col]))
+    keep = pmi > 0
+    return sparse.csr_matrix((pmi[keep], (counts.row[keep], counts.col[keep])), shape=counts.shape)
+
+
+def randomized_svd(matrix: sparse.csr_matrix, dimensions: int, oversampling: int = SVD_OVERSAMPLING,
+                   iterations: int = SVD_POWER_ITERATIONS, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    U y S aproximados de los `dimensions` valores singulares mayores (Halko, Martinsson y
+    Tropp): se proyecta la matriz sobre un subespacio aleatorio algo más grande, se refina
+    con iteraciones de potencia y se hace la SVD densa de esa proyección. Solo hace
+    productos matriz dispersa × matriz angosta, mucho más baratos que las iteraciones de
+    ARPACK. Entre iteraciones basta una LU para no perder precisión; la QR va al final.
+    """
+    rng = np.random.default_rng(seed)
+    width = min(dimensions + oversampling, min(matrix.shape))
+    transposed = matrix.T.tocsr()
+    basis = matrix @ rng.standard_normal((matrix.shape[1], width), dtype=matrix.dtype)
+    for _ in range(iterations):
+        basis = linalg.lu(basis, permute_l=True, check_finite=False)[0]
+        basis = linalg.lu(transposed @ basis, permute_l=True, check_finite=False)[0]
+        basis = matrix @ basis
+    basis = linalg.qr(basis, mode="economic", check_finite=False)[0]
+    u, s, _ = np.linalg.svd((transposed @ basis).T, full_matrices=False)
+    return (basis @ u)[:, :dimensions], s[:dimensions]
+
+
+def truncated_svd(matrix: sparse.csr_matrix, dimensions: int = EMBEDDING_DIMENSIONS, seed: int = 0) -> np.ndarray:
+    """
+    Filas de U·√S con los `dimensions` valores singulares mayores, normalizadas. Las filas
+    vacías quedan en cero.
+    """
+    dimensions = max(1, min(dimensions, min(matrix.shape)))
+    if min(matrix.shape) <= DENSE_SVD_LIMIT:
+        u, s, _ = np.linalg.svd(matrix.toarray(), full_matrices=False)
+        u, s = u[:, :dimensions], s[:dimensions]
+    else:
+        u, s = randomized_svd(matrix.astype(np.float32), dimensions, seed=seed)
+    return normalized(u * np.sqrt(s))
+
+
+def component_embeddings(component_count: int, user_count: int, edges: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                         dimensions: int = EMBEDDING_DIMENSIONS, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectores de los componentes y cuáles salieron del entrenamiento (los demás quedan en cero).
+    """
+    if not component_count:
+        return np.zeros((0, dimensions), dtype=np.float32), np.zeros(0, dtype=bool)
+    adjacency = walk_adjacency(component_count, user_count, edges)
+    weights = ppmi(walk_cooccurrence(adjacency, component_count, seed=seed))
+    trained = np.diff(weights.indptr) > 0
+    if not trained.any():
+        return np.zeros((component_count, dimensions), dtype=np.float32), trained
+    vectors = np.zeros((component_count, dimensions), dtype=np.float32)
+    embedded = truncated_svd(weights, dimensions, seed=seed)
+    vectors[:, :embedded.shape[1]] = embedded
+    trained &= np.linalg.norm(vectors, axis=1) > 0
+    return vectors, trained
+
+
+class ColdStart:
+    """
+    Promedio de los vectores entrenados por cada valor de `COLD_START_PROPERTIES`.
+    """
+
+    def __init__(self, vectors: np.ndarray, metadata: Sequence[Tuple[str, ...]]):
+        self.means: List[Dict[str, np.ndarray]] = []
+        for position in range(len(COLD_START_PROPERTIES)):
+            groups: Dict[str, List[int]] = {}
+            for row, values in enumerate(metadata):
+                if values[position]:
+                    groups.setdefault(values[position], []).append(row)
+            self.means.append({value: normalized(vectors[rows].mean(axis=0)) for value, rows in groups.items()})
+
+    def vector(self, values: Sequence[str]) -> Optional[np.ndarray]:
+        for means, value in zip(self.means, values):
+            if value in means:
+                return means[value]
+        return None
+
+
+def _metadata(node: Dict[str, Any]) -> Tuple[str, ...]:
+    return tuple("" if node.get(prop) is None else str(node[prop]) for prop in COLD_START_PROPERTIES)
+
+
+class ComponentSimilarityIndex(LazyBuild[IVFIndex]):
+
+    def __init__(self, store: GraphStore, path: Optional[str] = COMPONENT_INDEX_PATH):
+        super().__init__()
+        self.store = store
+        self.path = path
+        self._metadata: Dict[str, Tuple[str, ...]] = {}
+        self._trained: set = set()
+        self._cold_start: Optional[ColdStart] = None
+        self._dirty = False
+        self.source = None
+
+    def _install(self, index: IVFIndex, metadata: Sequence[Tuple[str, ...]], trained: np.ndarray):
+        names = index.names
+        self._metadata = dict(zip(names, metadata))
+        self._trained = {name for name, flag in zip(names, trained.tolist()) if flag}
+        self._cold_start = ColdStart(index.vectors[:len(names)][trained], [m for m, flag in zip(metadata, trained) if flag])
+        self._value = index
+
+    def load(self) -> bool:
+        """
+        Carga el índice guardado en `path`; retorna False si no hay archivo.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        index, extra = IVFIndex.load(self.path)
+        metadata = list(zip(*(extra[prop].tolist() for prop in COLD_START_PROPERTIES)))
+        self._install(index, metadata, extra["trained"])
+        self.source = "disk"
+        self._dirty = False
+        return True
+
+    def snapshot(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Copia de lo que se guarda en `path` (vectores vivos y sus metadatos), o None si no hay
+        índice o ruta. Se arma en el event loop; escribirla con `IVFIndex.write` no toca el índice.
+        """
+        index = self._value
+        if index is None or not self.path:
+            return None
+        arrays = index.snapshot()
+        names = arrays["names"].tolist()
+        metadata = [self._metadata.get(name, ("",) * len(COLD_START_PROPERTIES)) for name in names]
+        for position, prop in enumerate(COLD_START_PROPERTIES):
+            arrays[prop] = np.asarray([values[position] for values in metadata], dtype=str)
+        arrays["trained"] = np.asarray([name in self._trained for name in names], dtype=bool)
+        self._dirty = False
+        return arrays
+
+    def save(self):
+        arrays = self.snapshot()
+        if arrays is not None:
+            IVFIndex.write(self.path, arrays)
+
+    def save_if_changed(self):
+        if self._dirty:
+            self.save()
+
+    async def _export(self) -> Tuple[List[Dict[str, Any]], int, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        components: Dict[str, int] = {}
+        nodes = []
+        async for node in self.store.stream_nodes("Component", fields=["name", *COLD_START_PROPERTIES]):
+            if node.get("name") is not None and node["name"] not in components:
+                components[node["name"]] = len(components)
+                nodes.append(node)
+        users: Dict[Any, int] = {}
+        async for node in self.store.stream_nodes("User", fields=[LABELS["User"].identifier]):
+            value = node.get(LABELS["User"].identifier)
+            if value is not None and value not in users:
+                users[value] = len(users)
+
+        edges = {}
+        for rel_type, spec in RELATIONS.items():
+            from_ids = users if spec.from_label == "User" else components
+            to_ids = users if spec.to_label == "User" else components
+            sources, targets = [], []
+            async for from_value, to_value, _ in self.store.stream_relationships(spec, with_properties=False):
+                source, target = from_ids.get(from_value), to_ids.get(to_value)
+                if source is not None and target is not None:
+                    sources.append(source)
+                    targets.append(target)
+            edges[rel_type] = (np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64))
+        return nodes, len(users), edges
+
+    @staticmethod
+    def train(nodes: Sequence[Dict[str, Any]], user_count: int, edges: Dict[str, Tuple[np.ndarray, np.ndarray]],
+              dimensions: int = EMBEDDING_DIMENSIONS, seed: int = 0) -> Tuple[IVFIndex, List[Tuple[str, ...]], np.ndarray]:
+        """
+        Embeddings e índice IVF de `nodes` (componentes con `name` y las propiedades de
+        `COLD_START_PROPERTIES`). Los componentes sin vector entrenado usan el de `ColdStart`;
+        los que tampoco tienen uno quedan fuera del índice.
+        """
+        vectors, trained = component_embeddings(len(nodes), user_count, edges, dimensions, seed)
+        metadata = [_metadata(node) for node in nodes]
+        cold_start = ColdStart(vectors[trained], [m for m, flag in zip(metadata, trained) if flag])
+        keep = trained.copy()
+        for row in np.flatnonzero(~trained).tolist():
+            vector = cold_start.vector(metadata[row])
+            if vector is not None:
+                vectors[row], keep[row] = vector, True
+        rows = np.flatnonzero(keep)
+        index = IVFIndex.build([nodes[row]["name"] for row in rows.tolist()], vectors[rows], seed=seed)
+        return index, [metadata[row] for row in rows.tolist()], trained[rows]
+
+    async def _build(self) -> IVFIndex:
+        # Entrena desde el store y guarda el resultado en `path`
+        nodes, user_count, edges = await self._export()
+        index, metadata, trained = await run_in_threadpool(self.train, nodes, user_count, edges)
+        self._install(index, metadata, trained)
+        self.source = "store"
+        arrays = self.snapshot()
+        try:
+            if arrays is not None:
+                await run_in_threadpool(IVFIndex.write, self.path, arrays)
+        except OSError as error:
+            self._dirty = True
+            logger.warning("No se pudo guardar el índice de componentes: %s", error)
+        return index
+
+    def add(self, node: Dict[str, Any]) -> bool:
+        """
+        Agrega un componente nuevo con el vector de `ColdStart`. Un componente que ya está en
+        el índice conserva su vector. Retorna si quedó indexado.
+        """
+        index, name = self.tracked(), node.get("name")
+        if index is None or name is None:
+            return False
+        if name in index:
+            return True
+        vector = self._cold_start.vector(_metadata(node)) if self._cold_start else None
+        if vector is None:
+            return False
+        index.add(name, vector)
+        self._metadata[name] = _metadata(node)
+        self._dirty = True
+        return True
+
+    def remove(self, names: Sequence[Any]):
+        index = self.tracked()
+        if index is None:
+            return
+        for name in names:
+            if index.remove(name):
+                self._trained.discard(name)
+                self._metadata.pop(name, None)
+                self._dirty = True
+
+    async def similar(self, name: str, k: int = 10, nprobe: int = COMPONENT_INDEX_NPROBE) -> Optional[List[Dict[str, Any]]]:
+        """
+        Los `k` componentes más parecidos a `name`, o None si no está indexado.
+        """
+        index = await self.get()
+        vector = index.vector(name)
+        if vector is None:
+            return None
+        return [{"name": other, "score": score, "trained": other in self._trained}
+                for other, score in index.search(vector, k=k, nprobe=nprobe, exclude=[name])]
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._value
+        return dict(index.stats() if index else {"vectors": 0},
+                    trained=len(self._trained), source=self.source, unsaved_changes=self._dirty, **self.build_stats())
@@ -0,0 +1,358 @@
+"""
+Matriz dispersa de interacciones origen×destino para un tipo de relación
+(por ejemplo User×Component con PURCHASED).
+
+Se guarda de dos formas:
+  - la adyacencia por fila y por columna (conjuntos de ids), que es la fuente de verdad y
+    se actualiza en cada escritura;
+  - una base compacta en CSR de SciPy: la matriz binaria `matrix` (filas×columnas) y su
+    co-ocurrencia `cooccurrence` = `matrixᵀ · matrix` (columnas×columnas), donde la celda
+    (i, j) es cuántas filas tienen a la vez i y j (por ejemplo, usuarios que compraron ambos).
+
+Las escrituras no reconstruyen la base: suman o restan su efecto en un delta por columna
+(O(grado de la fila)). Las lecturas combinan la fila de la base con su delta. Cuando el
+delta acumula `INTERACTIONS_REBUILD_THRESHOLD` cambios, la base se recompacta desde la
+adyacencia: `start_compaction` toma las coordenadas, `build_base` arma las matrices sin tocar
+el objeto (puede correr en otro hilo) y `finish_compaction` las instala. Las escrituras que
+llegan entre medio se anotan también en un delta nuevo, que pasa a ser el de la base nueva.
+
+La co-ocurrencia es opcional (`cooccurrence=False`): para las relaciones que solo se leen
+por fila o por columna no se calcula `matrixᵀ · matrix` ni se lleva su delta.
+"""
+
+import os
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from scipy import sparse
+
+# Cambios acumulados en el delta antes de recompactar la base CSR
+INTERACTIONS_REBUILD_THRESHOLD = int(os.getenv("INTERACTIONS_REBUILD_THRESHOLD", "10000"))
+
+METRICS = ("count", "cosine")
+
+
+def top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> List[int]:
+    """
+    Posiciones de los `k` puntajes más altos, de mayor a menor. Los empates se ordenan por id
+    para que la respuesta sea estable; solo se ordenan los candidatos que alcanzan el k-ésimo puntaje.
+    """
+    if len(scores) > k:
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((ids[candidates], -scores[candidates]))[:k]
+    return candidates[order].tolist()
+
+
+class InteractionMatrix:
+
+    def __init__(self, rebuild_threshold: int = INTERACTIONS_REBUILD_THRESHOLD, cooccurrence: bool = True):
+        self.rebuild_threshold = rebuild_threshold
+        self.with_cooccurrence = cooccurrence
+        self.rows: Dict[Any, int] = {}
+        self.cols: Dict[Any, int] = {}
+        # Los ids de filas/columnas eliminadas quedan con nombre None y no se reutilizan
+        self.row_names: List[Any] = []
+        self.col_names: List[Any] = []
+        self._row_items: List[Set[int]] = []
+        self._col_items: List[Set[int]] = []
+
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.cooccurrence = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._degree = np.zeros(0, dtype=np.float32)
+        self._delta: Dict[int, Counter] = defaultdict(Counter)
+        # Columnas con altas o bajas desde la última compactación (la base CSR no las refleja)
+        self._changed: Set[int] = set()
+        # `matrix` transpuesta (columnas×filas), armada en la primera lectura por columnas
+        self._by_col: Optional[sparse.csr_matrix] = None
+        # Delta y columnas cambiadas desde que empezó la compactación en curso (None si no hay)
+        self._next: Optional[Tuple[Dict[int, Counter], Set[int]]] = None
+        self._next_pending = 0
+        self._compaction_started = 0.0
+        self.pending = 0
+        self.rebuilds = 0
+        self.build_seconds = 0.0
+
+    # ----------------------------------------------------------------- Ids
+
+    def _row_id(self, value: Any) -> int:
+        row = self.rows.get(value)
+        if row is None:
+            row = self.rows[value] = len(self.row_names)
+            self.row_names.append(value)
+            self._row_items.append(set())
+        return row
+
+    def _col_id(self, value: Any) -> int:
+        col = self.cols.get(value)
+        if col is None:
+            col = self.cols[value] = len(self.col_names)
+            self.col_names.append(value)
+            self._col_items.append(set())
+        return col
+
+    # ----------------------------------------------------------------- Escrituras
+
+    def load(self, pairs: Iterable[Tuple[Any, Any]]):
+        """
+        Carga inicial: agrega los pares a la adyacencia y recompacta una sola vez.
+        """
+        for from_value, to_value in pairs:
+            if from_value is None or to_value is None:
+                continue
+            row, col = self._row_id(from_value), self._col_id(to_value)
+            self._row_items[row].add(col)
+            self._col_items[col].add(row)
+        self.compact()
+
+    def _record(self, delta: Dict[int, Counter], changed: Set[int], row: int, col: int, sign: int):
+        # Efecto de agregar/quitar (row, col) en la co-ocurrencia: col con cada columna de la fila
+        if self.with_cooccurrence:
+            for other in self._row_items[row]:
+                delta[col][other] += sign
+                if other != col:
+                    delta[other][col] += sign
+        changed.add(col)
+
+    def _shift(self, row: int, col: int, sign: int):
+        self._record(self._delta, self._changed, row, col, sign)
+        if self._next is not None:
+            self._record(*self._next, row, col, sign)
+            self._next_pending += 1
+        self.pending += 1
+
+    def add(self, from_value: Any, to_value: Any):
+        if from_value is None or to_value is None:
+            return
+        row, col = self._row_id(from_value), self._col_id(to_value)
+        if col in self._row_items[row]:
+            return
+        self._row_items[row].add(col)
+        self._col_items[col].add(row)
+        self._shift(row, col, 1)
+
+    def remove(self, from_value: Any, to_value: Any):
+        row, col = self.rows.get(from_value), self.cols.get(to_value)
+        if row is None or col is None or col not in self._row_items[row]:
+            return
+        self._shift(row, col, -1)
+        self._row_items[row].discard(col)
+        self._col_items[col].discard(row)
+
+    def remove_rows(self, values: Iterable[Any]):
+        for value in values:
+            row = self.rows.pop(value, None)
+            if row is None:
+                continue
+            for col in list(self._row_items[row]):
+                self._shift(row, col, -1)
+                self._row_items[row].discard(col)
+                self._col_items[col].discard(row)
+            self.row_names[row] = None
+
+    def remove_cols(self, values: Iterable[Any]):
+        for value in values:
+            col = self.cols.pop(value, None)
+            if col is None:
+                continue
+            for row in list(self._col_items[col]):
+                self._shift(row, col, -1)
+                self._row_items[row].discard(col)
+                self._col_items[col].discard(row)
+            self.col_names[col] = None
+
+    # ----------------------------------------------------------------- Compactación
+
+    @property
+    def compacting(self) -> bool:
+        return self._next is not None
+
+    def needs_compaction(self) -> bool:
+        return self.pending >= self.rebuild_threshold and not self.compacting
+
+    def start_compaction(self) -> tuple:
+        """
+        Coordenadas (filas, columnas, forma) de la adyacencia actual, para `build_base`.
+        Desde aquí las escrituras se anotan también en el delta de la base nueva.
+        """
+        self._compaction_started = time.perf_counter()
+        self._next = (defaultdict(Counter), set())
+        self._next_pending = 0
+        shape = (len(self.row_names), len(self.col_names))
+        nnz = sum(len(items) for items in self._row_items)
+        rows = np.fromiter((row for row, items in enumerate(self._row_items) for _ in items), dtype=np.int32, count=nnz)
+        cols = np.fromiter((col for items in self._row_items for col in items), dtype=np.int32, count=nnz)
+        return rows, cols, shape, self.with_cooccurrence
+
+    @staticmethod
+    def build_base(rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int],
+                   cooccurrence: bool = True) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """
+        Base CSR (matriz y co-ocurrencia) de las coordenadas. No usa la instancia.
+        """
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape)
+        if cooccurrence:
+            return matrix, (matrix.T @ matrix).tocsr()
+        return matrix, sparse.csr_matrix((shape[1], shape[1]), dtype=np.float32)
+
+    def finish_compaction(self, base: Tuple[sparse.csr_matrix, sparse.csr_matrix]):
+        self.matrix, self.cooccurrence = base
+        self._degree = self.cooccurrence.diagonal()
+        self._delta, self._changed = self._next
+        self._next = None
+        self._by_col = None
+        self.pending = self._next_pending
+        self.rebuilds += 1
+        self.build_seconds = time.perf_counter() - self._compaction_started
+
+    def cancel_compaction(self):
+        self._next = None
+
+    def compact(self):
+        """
+        Reconstruye la base CSR desde la adyacencia en el hilo actual y vacía el delta.
+        """
+        self.finish_compaction(self.build_base(*self.start_compaction()))
+
+    # ----------------------------------------------------------------- Lecturas
+
+    def _require_cooccurrence(self):
+        if not self.with_cooccurrence:
+            raise ValueError("La matriz se construyó sin co-ocurrencia")
+
+    def degree(self, col: int) -> float:
+        """
+        Filas con interacción en la columna (la diagonal de la co-ocurrencia).
+        """
+        base = self._degree[col] if col < len(self._degree) else 0.0
+        return float(base + self._delta.get(col, {}).get(col, 0))
+
+    def _degrees(self, indices: np.ndarray) -> np.ndarray:
+        degrees = np.zeros(len(indices), dtype=np.float32)
+        in_base = indices < len(self._degree)
+        degrees[in_base] = self._degree[indices[in_base]]
+        if self._delta:
+            for position, index in enumerate(indices.tolist()):
+                delta = self._delta.get(index)
+                if delta:
+                    degrees[position] += delta.get(index, 0)
+        return degrees
+
+    def _cooccurrence_row(self, col: int) -> Tuple[np.ndarray, np.ndarray]:
+        if col < self.cooccurrence.shape[0]:
+            start, end = self.cooccurrence.indptr[col], self.cooccurrence.indptr[col + 1]
+            indices, counts = self.cooccurrence.indices[start:end], self.cooccurrence.data[start:end]
+        else:
+            indices, counts = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        delta = self._delta.get(col)
+        if not delta:
+            return indices, counts
+        merged = dict(zip(indices.tolist(), counts.tolist()))
+        for other, change in delta.items():
+            merged[other] = merged.get(other, 0.0) + change
+        return (np.fromiter(merged.keys(), dtype=np.int32, count=len(merged)),
+                np.fromiter(merged.values(), dtype=np.float32, count=len(merged)))
+
+    def items(self, value: Any) -> List[Any]:
+        """
+        Columnas con las que la fila `value` tiene interacción (por ejemplo, lo que compró un usuario).
+        """
+        row = self.rows.get(value)
+        return [self.col_names[col] for col in self._row_items[row]] if row is not None else []
+
+    def column_interactions(self, values: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Todas las interacciones de las columnas `values` como dos arreglos paralelos: el id de
+        la fila y la posición de la columna en `values` (por ejemplo, qué usuarios buscaron
+        cada componente de un proveedor). Las columnas sin cambios desde la última
+        compactación salen de un corte de la base CSR y el resto de la adyacencia.
+        """
+        base, changed = [], []
+        for position, value in enumerate(values):
+            col = self.cols.get(value)
+            if col is not None:
+                (changed if col in self._changed or col >= self.matrix.shape[1] else base).append((position, col))
+
+        rows, positions = [], []
+        if base:
+            if self._by_col is None:
+                self._by_col = self.matrix.T.tocsr()
+            block = self._by_col[[col for _, col in base]].tocoo()
+            rows.append(block.col.astype(np.int64))
+            positions.append(np.asarray([position for position, _ in base], dtype=np.int64)[block.row])
+        for position, col in changed:
+            items = self._col_items[col]
+            rows.append(np.fromiter(items, dtype=np.int64, count=len(items)))
+            positions.append(np.full(len(items), position, dtype=np.int64))
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(positions)
+
+    def column_counts(self, values: Iterable[Any]) -> Dict[Any, float]:
+        """
+        En cuántas de las filas `values` aparece cada columna (por ejemplo, cuántos de los
+        proveedores preferidos de un usuario surten cada componente).
+        """
+        counts: Dict[Any, float] = Counter()
+        for value in values:
+            for name in self.items(value):
+                counts[name] += 1
+        return dict(counts)
+
+    def cooccurrence_scores(self, values: Iterable[Any]) -> Dict[Any, float]:
+        """
+        Suma de las filas de co-ocurrencia de `values`: para cada columna, cuántas veces
+        aparece junto a alguna de ellas (sin contar las columnas de `values`).
+        """
+        self._require_cooccurrence()
+        values = set(values)
+        total = np.zeros(len(self.col_names), dtype=np.float32)
+        for value in values:
+            col = self.cols.get(value)
+            if col is not None:
+                indices, counts = self._cooccurrence_row(col)
+                total[indices] += counts
+        return {self.col_names[col]: float(total[col]) for col in np.flatnonzero(total > 0).tolist()
+                if self.col_names[col] is not None and self.col_names[col] not in values}
+
+    def co_occurring(self, value: Any, k: int = 10, metric: str = "count",
+                     exclude: Optional[Set[Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Las `k` columnas que más comparten filas con `value` (sin incluirla), ordenadas por
+        `count` (filas en común) o `cosine` (count / √(grado_a · grado_b)).
+        Retorna None si `value` no tiene ninguna interacción registrada.
+        """
+        self._require_cooccurrence()
+        col = self.cols.get(value)
+        if col is None:
+            return None
+
+        indices, counts = self._cooccurrence_row(col)
+        keep = (indices != col) & (counts > 0)
+        if exclude:
+            keep &= np.array([self.col_names[index] not in exclude for index in indices.tolist()], dtype=bool)
+        indices, counts = indices[keep], counts[keep]
+        if metric == "cosine" and len(indices):
+            scores = counts / np.sqrt(np.maximum(self._degrees(indices) * self.degree(col), 1.0))
+        else:
+            scores = counts
+
+        ranked = top_k(scores, indices, k)
+        return [{"name": self.col_names[indices[position]], "count": int(counts[position]), "score": float(scores[position])}
+                for position in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": len(self.rows),
+            "columns": len(self.cols),
+            "interactions": sum(len(items) for items in self._row_items),
+            "cooccurrence_nnz": int(self.cooccurrence.nnz),
+            "pending_changes": self.pending,
+            "compacting": self.compacting,
+            "rebuilds": self.rebuilds,
+            "last_build_seconds": self.build_seconds,
+        }
@@ -0,0 +1,73 @@
+"""
+Base de las estructuras en memoria que se construyen desde el store en la primera lectura y
+después se mantienen con los eventos de escritura (combos, tendencias, ranking de
+proveedores, tabla de usuarios para promociones, matrices de interacciones).
+
+La subclase implementa `_build()`. `get()` construye la estructura si todavía no existe o
+quedó desactualizada (`mark_stale`); los eventos de escritura la piden con `tracked()`, que
+retorna None si todavía no se construyó o si se está construyendo (en ese caso la marca para
+reconstruirla, porque la carga en curso puede no ver la escritura).
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Construcciones seguidas si siguen llegando escrituras mientras se construye
+BUILD_ATTEMPTS = 3
+
+
+class LazyBuild(ABC, Generic[T]):
+
+    def __init__(self):
+        self._value: Optional[T] = None
+        self._lock = asyncio.Lock()
+        self._stale = False
+        self.build_seconds = 0.0
+        self.rebuilds = 0
+
+    def mark_stale(self):
+        self._stale = True
+
+    @abstractmethod
+    async def _build(self) -> T:
+        """
+        Construye la estructura desde el store.
+        """
+
+    async def get(self) -> T:
+        """
+        Estructura actual, construyéndola si todavía no existe o quedó desactualizada.
+        """
+        if self._value is not None and not self._stale:
+            return self._value
+        async with self._lock:
+            for _ in range(BUILD_ATTEMPTS):
+                if self._value is not None and not self._stale:
+                    break
+                started = time.perf_counter()
+                self._stale = False
+                self._value = await self._build()
+                self.build_seconds = time.perf_counter() - started
+                self.rebuilds += 1
+        return self._value
+
+    def tracked(self) -> Optional[T]:
+        """
+        Estructura ya construida, o None si no hay que actualizar nada. Si se está
+        construyendo, la marca para reconstruirla.
+        """
+        if self._lock.locked():
+            self._stale = True
+            return None
+        return self._value
+
+    def build_stats(self) -> Dict[str, Any]:
+        return {
+            "stale": self._stale,
+            "rebuilds": self.rebuilds,
+            "last_build_seconds": self.build_seconds,
+        }
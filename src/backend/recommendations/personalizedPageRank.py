@@ -0,0 +1,312 @@
+"""
+PageRank personalizado sobre el grafo de interacciones User–Component–Provider–Category.
+
+El grafo junta las relaciones de `PAGERANK_RELATIONS` (PURCHASED, WANTS, SUPPLIES,
+CATEGORIZED, PROMOTES) en una sola matriz de adyacencia no dirigida n×n, con un peso por
+tipo de relación, y la normaliza por columnas: `transition[j, i]` es la probabilidad de ir
+de i a j.
+
+`personalized_pagerank` itera `R ← α·T·R + (1 − α)·S` con una columna por semilla, así un
+solo producto matriz dispersa × matriz densa avanza todas las semillas a la vez. La masa que
+cae en nodos sin relaciones vuelve a la semilla. Cada columna se detiene al bajar su
+residuo L1 de `tol`; el cálculo termina cuando todas convergen, al llegar a `max_iter` o al
+vencer el presupuesto de latencia (con el último resultado y `converged` en False).
+
+`PageRankService` arma el grafo en la primera lectura desde el store, o desde un snapshot
+de `store.graphSnapshot` con `PAGERANK_SNAPSHOT_DIR` (si no se puede leer, desde el store),
+fuera del event loop. Las escrituras de la API lo marcan desactualizado y se reconstruye en
+la siguiente lectura, a lo sumo una vez cada `PAGERANK_REBUILD_INTERVAL` segundos.
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from starlette.concurrency import run_in_threadpool
+from recommendations.lazyBuild import LazyBuild
+from store.graphSnapshot import GraphSnapshot
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import LABELS, relationship_specs
+
+logger = logging.getLogger(__name__)
+
+# Snapshot de `utils/exportSnapshot.py` del que se arma el grafo (si no, del store)
+PAGERANK_SNAPSHOT_DIR = os.getenv("PAGERANK_SNAPSHOT_DIR")
+# Segundos mínimos entre reconstrucciones del grafo después de una escritura
+PAGERANK_REBUILD_INTERVAL = float(os.getenv("PAGERANK_REBUILD_INTERVAL", "300"))
+# Presupuesto de latencia por defecto de la iteración
+PAGERANK_LATENCY_BUDGET_MS = float(os.getenv("PAGERANK_LATENCY_BUDGET_MS", "200"))
+# Semillas por producto matriz-matriz (con más, el estado deja de caber en caché y cada
+# semilla sale más cara)
+PAGERANK_MAX_BATCH = 16
+
+DEFAULT_ALPHA = 0.85
+DEFAULT_TOLERANCE = 1e-6
+DEFAULT_MAX_ITERATIONS = 100
+
+PAGERANK_LABELS = ("User", "Component", "Provider", "Category")
+
+# Tipo de relación -> peso de la arista en la caminata
+PAGERANK_RELATIONS: Dict[str, float] = {
+    "PURCHASED": 1.0,
+    "WANTS": 0.8,
+    "SUPPLIES": 0.5,
+    "CATEGORIZED": 0.5,
+    "PROMOTES": 0.3,
+}
+
+RELATIONS: Dict[str, RelationshipSpec] = relationship_specs(PAGERANK_RELATIONS)
+
+
+class PageRankResult(NamedTuple):
+    scores: np.ndarray
+    iterations: int
+    residuals: np.ndarray
+    converged: np.ndarray
+    budget_exhausted: bool
+
+
+class PageRankGraph:
+
+    def __init__(self, names: Dict[str, List[Any]], edges: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 weights: Optional[Dict[str, float]] = None):
+        """
+        `names` tiene los identificadores de cada label (el id local es la posición) y
+        `edges` los pares (ids origen, ids destino) de cada tipo de relación.
+        """
+        weights = dict(PAGERANK_RELATIONS, **(weights or {}))
+        self.names = {label: list(names.get(label, ())) for label in PAGERANK_LABELS}
+        self.ids = {label: {name: index for index, name in enumerate(values)} for label, values in self.names.items()}
+        self.offsets: Dict[str, int] = {}
+        total = 0
+        for label in PAGERANK_LABELS:
+            self.offsets[label] = total
+            total += len(self.names[label])
+        self.size = total
+
+        rows, cols, values = [], [], []
+        for rel_type, (sources, targets) in edges.items():
+            spec = RELATIONS[rel_type]
+            sources = np.asarray(sources, dtype=np.int64) + self.offsets[spec.from_label]
+            targets = np.asarray(targets, dtype=np.int64) + self.offsets[spec.to_label]
+            weight = np.full(len(sources), weights[rel_type], dtype=np.float32)
+            # No dirigido: la caminata puede ir de un usuario a un componente y de vuelta a otro usuario
+            rows += [sources, targets]
+            cols += [targets, sources]
+            values += [weight, weight]
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        values = np.concatenate(values) if values else np.zeros(0, dtype=np.float32)
+
+        adjacency = sparse.csr_matrix((values, (rows, cols)), shape=(total, total), dtype=np.float32)
+        adjacency.sum_duplicates()
+        self.adjacency = adjacency
+        degree = np.asarray(adjacency.sum(axis=0)).ravel()
+        self.dangling = degree == 0
+        scale = np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0).astype(np.float32)
+        # Simétrica: transition = A · D⁻¹ (cada columna suma 1)
+        self.transition = (adjacency @ sparse.diags(scale)).tocsr()
+        self.edges = int(len(values) // 2)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GraphSnapshot, weights: Optional[Dict[str, float]] = None) -> "PageRankGraph":
+        names = {label: snapshot.names(label) for label in PAGERANK_LABELS if label in snapshot.labels}
+        edges = {}
+        for rel_type in RELATIONS:
+            if rel_type in snapshot.relationships:
+                matrix = snapshot.csr(rel_type)
+                edges[rel_type] = (np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr)), np.asarray(matrix.indices))
+        return cls(names, edges, weights)
+
+    def node(self, label: str, name: Any) -> Optional[int]:
+        index = self.ids.get(label, {}).get(name)
+        return None if index is None else self.offsets[label] + index
+
+    def label_range(self, label: str) -> Tuple[int, int]:
+        start = self.offsets[label]
+        return start, start + len(self.names[label])
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.adjacency.indices[self.adjacency.indptr[node]:self.adjacency.indptr[node + 1]]
+
+
+async def stream_graph(store: GraphStore) -> Tuple[Dict[str, List[Any]], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Identificadores por label y aristas por tipo de relación leídos del store, listos para
+    `PageRankGraph(names, edges)`.
+    """
+    names: Dict[str, List[Any]] = {}
+    ids: Dict[str, Dict[Any, int]] = {}
+    for label in PAGERANK_LABELS:
+        identifier = LABELS[label].identifier
+        values = ids[label] = {}
+        async for node in store.stream_nodes(label, fields=[identifier]):
+            value = node.get(identifier)
+            if value is not None and value not in values:
+                values[value] = len(values)
+        names[label] = list(values)
+
+    edges = {}
+    for rel_type, spec in RELATIONS.items():
+        from_ids, to_ids = ids[spec.from_label], ids[spec.to_label]
+        sources, targets = [], []
+        async for from_value, to_value, _ in store.stream_relationships(spec, with_properties=False):
+            source, target = from_ids.get(from_value), to_ids.get(to_value)
+            if source is not None and target is not None:
+                sources.append(source)
+                targets.append(target)
+        edges[rel_type] = (np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64))
+    return names, edges
+
+
+def personalized_pagerank(graph: PageRankGraph, seeds: Sequence[int], alpha: float = DEFAULT_ALPHA,
+                          tol: float = DEFAULT_TOLERANCE, max_iter: int = DEFAULT_MAX_ITERATIONS,
+                          deadline: Optional[float] = None) -> PageRankResult:
+    """
+    PageRank personalizado de cada nodo de `seeds` (una columna por semilla). `deadline` es
+    un `time.perf_counter()` después del cual se retorna lo calculado hasta ese momento;
+    siempre se hace al menos una iteración. Los puntajes son float32, así que `tol` por
+    debajo de ~1e-7 no se alcanza y la iteración termina por `max_iter` o por el plazo.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    count = len(seeds)
+    scores = np.zeros((graph.size, count), dtype=np.float32)
+    residuals = np.full(count, np.inf, dtype=np.float64)
+    converged = np.zeros(count, dtype=bool)
+    iterations = 0
+    budget_exhausted = False
+
+    # Estado de las semillas activas como filas (semillas × nodos): `current @ Tᵀ` usa la
+    # transpuesta sin copiarla y cada fila queda contigua para las sumas por semilla
+    active = np.arange(count)
+    current = np.zeros((count, graph.size), dtype=np.float32)
+    current[active, seeds] = 1.0
+    transposed = graph.transition.T
+
+    while len(active) and iterations < max_iter:
+        updated = np.asarray(current @ transposed)
+        updated *= alpha
+        # Teletransporte a la semilla más la masa de los nodos sin relaciones
+        restart = (1.0 - alpha) + alpha * current[:, graph.dangling].sum(axis=1)
+        updated[np.arange(len(active)), seeds[active]] += restart
+        current -= updated
+        np.abs(current, out=current)
+        residuals[active] = current.sum(axis=1)
+        current = updated
+        iterations += 1
+
+        done = residuals[active] < tol
+        out_of_time = deadline is not None and time.perf_counter() >= deadline
+        if done.any():
+            scores[:, active[done]] = current[done].T
+            converged[active[done]] = True
+            active, current = active[~done], current[~done]
+        if len(active) and out_of_time:
+            budget_exhausted = True
+            break
+
+    scores[:, active] = current.T
+    return PageRankResult(scores, iterations, residuals, converged, budget_exhausted)
+
+
+def top_nodes(graph: PageRankGraph, scores: np.ndarray, label: str, k: int,
+              exclude: Sequence[int] = ()) -> List[Dict[str, Any]]:
+    """
+    Los `k` nodos de `label` con más puntaje en la columna `scores`, sin los de `exclude`
+    (ids globales). Los empates se ordenan por id.
+    """
+    start, end = graph.label_range(label)
+    candidates = scores[start:end].copy()
+    excluded = np.asarray([node - start for node in exclude if start <= node < end], dtype=np.int64)
+    candidates[excluded] = 0.0
+    positive = np.flatnonzero(candidates > 0)
+    if len(positive) > k:
+        threshold = np.partition(candidates[positive], len(positive) - k)[len(positive) - k]
+        positive = positive[candidates[positive] >= threshold]
+    order = np.lexsort((positive, -candidates[positive]))[:k]
+    return [{"name": graph.names[label][index], "score": float(candidates[index])} for index in positive[order]]
+
+
+class PageRankService(LazyBuild[PageRankGraph]):
+
+    def __init__(self, store: GraphStore, snapshot_dir: Optional[str] = PAGERANK_SNAPSHOT_DIR,
+                 rebuild_interval: float = PAGERANK_REBUILD_INTERVAL):
+        super().__init__()
+        self.store = store
+        self.snapshot_dir = snapshot_dir
+        self.rebuild_interval = rebuild_interval
+        self.source = "snapshot" if snapshot_dir else "store"
+        self._changed = False
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._snapshot_created_at = None
+
+    def mark_changed(self):
+        """
+        Registra una escritura; el grafo se reconstruye pasado `rebuild_interval`.
+        """
+        self._changed = True
+
+    def _snapshot_version(self) -> Optional[str]:
+        try:
+            return GraphSnapshot(self.snapshot_dir).manifest.get("created_at")
+        except (OSError, ValueError):
+            return None
+
+    def _outdated(self) -> bool:
+        """
+        Marca el grafo para reconstruirlo si hubo escrituras o cambió el snapshot. Se revisa a
+        lo sumo una vez por `rebuild_interval`, así el manifest no se lee en cada petición.
+        """
+        now = time.monotonic()
+        if self._value is None or now - self._checked_at < self.rebuild_interval:
+            return False
+        self._checked_at = now
+        outdated = self._changed and self.source == "store"
+        if self.snapshot_dir and not outdated:
+            outdated = self._snapshot_version() != self._snapshot_created_at
+        if outdated:
+            self.mark_stale()
+        return outdated
+
+    def _load_snapshot(self) -> Tuple[PageRankGraph, Optional[str]]:
+        snapshot = GraphSnapshot(self.snapshot_dir)
+        return PageRankGraph.from_snapshot(snapshot), snapshot.manifest.get("created_at")
+
+    async def _build(self) -> PageRankGraph:
+        self._changed = False
+        graph = None
+        if self.snapshot_dir:
+            try:
+                graph, self._snapshot_created_at = await run_in_threadpool(self._load_snapshot)
+                self.source = "snapshot"
+            except (OSError, ValueError, KeyError) as error:
+                logger.warning("No se pudo leer el snapshot %s (%s); el grafo se arma desde el store.", self.snapshot_dir, error)
+                self._snapshot_created_at = None
+        if graph is None:
+            names, edges = await stream_graph(self.store)
+            graph = await run_in_threadpool(PageRankGraph, names, edges)
+            self.source = "store"
+        self._built_at = self._checked_at = time.monotonic()
+        return graph
+
+    async def graph(self) -> PageRankGraph:
+        """
+        Grafo actual, reconstruyéndolo si no existe o quedó desactualizado.
+        """
+        self._outdated()
+        return await self.get()
+
+    def stats(self) -> Dict[str, Any]:
+        graph = self._value
+        return {
+            "nodes": graph.size if graph else 0,
+            "edges": graph.edges if graph else 0,
+            "source": self.source,
+            "stale": self._stale or self._changed,
+            "age_seconds": time.monotonic() - self._built_at if graph else None,
+            "rebuilds": self.rebuilds,
+            "last_build_seconds": self.build_seconds,
+        }
@@ -0,0 +1,266 @@
+"""
+Usuarios a los que un proveedor le conviene promocionar (PROMOTES).
+
+El puntaje de un usuario para el proveedor P suma, por cada componente que P surte
+(SUPPLIES) y que el usuario desea (WANTS) o buscó (SEARCHED), el peso de la señal en
+`TARGETING_WEIGHTS`, multiplicado por `OVER_BUDGET_FACTOR` si el precio del componente
+supera el `budget` del usuario. El total se multiplica por `1 + OFFERS_BOOST` si el usuario
+tiene `looking_for_offers`. Por defecto se excluyen los usuarios a los que P ya les promociona algo.
+
+Se puntúan todos los usuarios a la vez con NumPy: de las matrices de `RecommendationIndex`
+se cortan las columnas de los componentes de P (pares usuario-componente), el ajuste por
+presupuesto se aplica a todos los pares y `np.bincount` suma por usuario. El `budget` y
+`looking_for_offers` de todos los usuarios se guardan en arreglos en memoria que se arman en
+la primera lectura; los usuarios nuevos se agregan y un cambio de esas propiedades los
+marca para reconstruirlos. Solo se consultan a la base los precios de los componentes de P.
+
+Las relaciones PROMOTES no pasan por las matrices de `RecommendationIndex`: solo se leen los
+usuarios de cada proveedor, así que se guardan como un conjunto por proveedor en la misma
+tabla, y una campaña los agrega en bloque (`promotions_created`).
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+import numpy as np
+from recommendations.interactionMatrix import InteractionMatrix, top_k
+from recommendations.lazyBuild import LazyBuild
+from recommendations.userRecommender import PRICE_BATCH_SIZE
+from store.graphStore import GraphStore
+from utils.labelRegistry import relationship_specs
+
+# Relaciones PROMOTES por consulta al crear una campaña
+PROMOTES_CHUNK_SIZE = int(os.getenv("PROMOTES_CHUNK_SIZE", "1000"))
+
+TARGETING_WEIGHTS: Dict[str, float] = {
+    "wanted": 1.0,
+    "searched": 0.5,
+}
+SIGNAL_RELATIONS = {"wanted": "WANTS", "searched": "SEARCHED"}
+# Factor de los componentes que el usuario no puede pagar (precio > budget)
+OVER_BUDGET_FACTOR = 0.25
+# Aumento relativo del puntaje de los usuarios con looking_for_offers
+OFFERS_BOOST = 0.5
+USER_PROPERTIES = ("budget", "looking_for_offers")
+
+PROMOTES = relationship_specs(["PROMOTES"])["PROMOTES"]
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return bool(value) if value is not None and value == value else False
+
+
+class UserTable:
+
+    def __init__(self):
+        self.ids: Dict[Any, int] = {}
+        self.names: List[Any] = []
+        self._budgets: List[float] = []
+        self._offers: List[bool] = []
+        self._arrays = None
+        # Tipo de relación -> (matriz, id de usuario de cada fila de la matriz o -1)
+        self._row_maps: Dict[str, tuple] = {}
+        # Proveedor -> usuarios a los que promociona (PROMOTES), y usuario -> proveedores
+        self.promoted: Dict[Any, Set[Any]] = {}
+        self._promoters: Dict[Any, Set[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, properties: Dict[str, Any]):
+        name = properties.get("name")
+        if name is None:
+            return
+        user = self.ids.get(name)
+        if user is None:
+            user = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self._budgets.append(np.nan)
+            self._offers.append(False)
+        self._budgets[user] = _number(properties.get("budget"))
+        self._offers[user] = _flag(properties.get("looking_for_offers"))
+        self._arrays = None
+
+    def remove(self, values: Sequence[Any]):
+        # Los ids no se reutilizan: el usuario queda sin nombre y nunca recibe puntaje
+        for value in values:
+            user = self.ids.pop(value, None)
+            if user is not None:
+                self.names[user] = None
+                self._offers[user] = False
+            for provider in self._promoters.pop(value, ()):
+                self._discard(self.promoted, provider, value)
+        self._arrays = None
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[Any]], key: Any, value: Any):
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
+
+    def add_promotions(self, provider: Any, users: Iterable[Any]):
+        promoted = self.promoted.setdefault(provider, set())
+        for user in users:
+            promoted.add(user)
+            self._promoters.setdefault(user, set()).add(provider)
+
+    def remove_promotions(self, pairs: Iterable[Tuple[Any, Any]]):
+        for provider, user in pairs:
+            self._discard(self.promoted, provider, user)
+            self._discard(self._promoters, user, provider)
+
+    def remove_providers(self, values: Sequence[Any]):
+        for provider in values:
+            for user in self.promoted.pop(provider, ()):
+                self._discard(self._promoters, user, provider)
+
+    def arrays(self):
+        """
+        (budget, looking_for_offers, activo) de todos los ids como arreglos de NumPy.
+        """
+        if self._arrays is None:
+            self._arrays = (np.asarray(self._budgets, dtype=np.float64), np.asarray(self._offers, dtype=bool),
+                            np.asarray([name is not None for name in self.names], dtype=bool))
+        return self._arrays
+
+    def row_map(self, rel_type: str, matrix: InteractionMatrix) -> np.ndarray:
+        """
+        Id de usuario de cada fila de `matrix` (-1 si no está en la tabla). Se extiende solo
+        con las filas nuevas; si la matriz se reconstruyó se arma de nuevo.
+        """
+        cached = self._row_maps.get(rel_type)
+        mapped = cached[1] if cached is not None and cached[0] is matrix else np.zeros(0, dtype=np.int64)
+        if len(mapped) < len(matrix.row_names):
+            extra = np.fromiter((self.ids.get(name, -1) for name in matrix.row_names[len(mapped):]),
+                                dtype=np.int64, count=len(matrix.row_names) - len(mapped))
+            mapped = np.concatenate([mapped, extra])
+            self._row_maps[rel_type] = (matrix, mapped)
+        return mapped
+
+
+def score_users(table: UserTable, signals: Dict[str, tuple], prices: np.ndarray, k: int,
+                exclude: Iterable[Any] = ()) -> Dict[str, Any]:
+    """
+    Los `k` usuarios con más puntaje. `signals` trae, por señal, los ids de usuario y la
+    posición en `prices` del componente de cada par usuario-componente.
+    """
+    budgets, offers, active = table.arrays()
+    size = len(table.names)
+    scores = np.zeros(size, dtype=np.float64)
+    counts, in_budget = {}, np.zeros(size, dtype=np.int64)
+    for signal, (users, positions) in signals.items():
+        # price > budget es False si falta alguno de los dos: sin datos no se penaliza
+        over = prices[positions] > budgets[users]
+        weights = np.where(over, OVER_BUDGET_FACTOR, 1.0) * TARGETING_WEIGHTS[signal]
+        scores += np.bincount(users, weights=weights, minlength=size)
+        counts[signal] = np.bincount(users, minlength=size)
+        in_budget += np.bincount(users[~over], minlength=size)
+    scores *= np.where(offers, 1.0 + OFFERS_BOOST, 1.0)
+    scores[~active] = 0.0
+    excluded = np.asarray([table.ids[value] for value in exclude if value in table.ids], dtype=np.int64)
+    scores[excluded] = 0.0
+
+    candidates = np.flatnonzero(scores > 0)
+    best = candidates[top_k(scores[candidates], candidates, k)] if len(candidates) else []
+    items = [{
+        "name": table.names[user],
+        "score": float(scores[user]),
+        **{signal: int(counts[signal][user]) for signal in signals},
+        "in_budget": int(in_budget[user]),
+        "budget": None if np.isnan(budgets[user]) else float(budgets[user]),
+        "looking_for_offers": bool(offers[user]),
+    } for user in np.asarray(best, dtype=np.int64).tolist()]
+    return {"candidates": len(candidates), "excluded": len(excluded), "items": items}
+
+
+class PromotionTargeting(LazyBuild[UserTable]):
+
+    def __init__(self, store: GraphStore):
+        super().__init__()
+        self.store = store
+
+    async def _build(self) -> UserTable:
+        table = UserTable()
+        async for node in self.store.stream_nodes("User", fields=["name", *USER_PROPERTIES]):
+            table.add(node)
+        async for provider, user, _ in self.store.stream_relationships(PROMOTES, with_properties=False):
+            table.add_promotions(provider, (user,))
+        return table
+
+    # ----------------------------------------------------------------- Eventos de escritura
+
+    def user_created(self, properties: Dict[str, Any]):
+        table = self.tracked()
+        if table is not None:
+            table.add(properties)
+
+    def users_deleted(self, values: Sequence[Any]):
+        table = self.tracked()
+        if table is not None:
+            table.remove(values)
+
+    def promotions_created(self, provider: Any, users: Sequence[Any]):
+        table = self.tracked()
+        if table is not None:
+            table.add_promotions(provider, users)
+
+    def promotions_deleted(self, pairs: Sequence[Tuple[Any, Any]]):
+        table = self.tracked()
+        if table is not None:
+            table.remove_promotions(pairs)
+
+    def providers_deleted(self, values: Sequence[Any]):
+        table = self.tracked()
+        if table is not None:
+            table.remove_providers(values)
+
+    # ----------------------------------------------------------------- Consultas
+
+    async def _prices(self, components: Sequence[Any]) -> np.ndarray:
+        prices = {}
+        for start in range(0, len(components), PRICE_BATCH_SIZE):
+            chunk = components[start:start + PRICE_BATCH_SIZE]
+            for node in await self.store.find_nodes_in("Component", "name", chunk, fields=["name", "price"]):
+                prices[node["name"]] = _number(node.get("price"))
+        return np.asarray([prices.get(component, np.nan) for component in components], dtype=np.float64)
+
+    async def targets(self, index, provider: Any, k: int, exclude_promoted: bool = True) -> Dict[str, Any]:
+        """
+        Los `k` mejores usuarios para una promoción de `provider`. `index` es el
+        `RecommendationIndex` del que salen las matrices de relaciones.
+        """
+        table = await self.get()
+        components = (await index.matrix("SUPPLIES")).items(provider)
+        matrices = {signal: await index.matrix(rel_type) for signal, rel_type in SIGNAL_RELATIONS.items()}
+        exclude = table.promoted.get(provider, ()) if exclude_promoted else ()
+        prices = await self._prices(components)
+
+        started = time.perf_counter()
+        signals = {}
+        for signal, matrix in matrices.items():
+            rows, positions = matrix.column_interactions(components)
+            users = table.row_map(SIGNAL_RELATIONS[signal], matrix)[rows]
+            known = users >= 0
+            signals[signal] = (users[known], positions[known])
+        result = score_users(table, signals, prices, k, exclude)
+        return dict(result, provider=provider, components=len(components), users=len(table),
+                    scoring_ms=(time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        table = self._value
+        return {
+            "users": len(table) if table is not None else 0,
+            "promoting_providers": len(table.promoted) if table is not None else 0,
+            **self.build_stats(),
+        }
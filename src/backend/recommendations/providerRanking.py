@@ -0,0 +1,368 @@
+"""
+Ranking de proveedores por categoría.
+
+Para cada par (categoría, proveedor) se mantienen en memoria tres señales:
+  - `association`: `association_level` de Provider -ASSOCIATED_WITH-> Category;
+  - `stock`: suma del `stock` de Provider -SUPPLIES-> Component de los componentes de la
+    categoría (Component -CATEGORIZED-> Category), relativa al proveedor con más stock;
+  - `satisfaction`: promedio del `satisfaction` (Good/Neutral/Bad) de Review -REVIEWS->
+    Component sobre esos componentes, suavizado hacia 0.5 con `SATISFACTION_PRIOR` reseñas.
+
+El puntaje es la suma ponderada por `RANKING_WEIGHTS`. Las sumas por par se arman en la
+primera lectura recorriendo una vez las cuatro relaciones y después cada evento de escritura
+las ajusta sumando o restando solo lo que cambió (por ejemplo, una reseña nueva suma a los
+proveedores de su componente en cada categoría del componente), sin volver a la base. Cada
+categoría guarda su ranking ordenado: una escritura solo la marca y se vuelve a ordenar en
+la siguiente lectura, así que leer es tomar los primeros `k`. Un cambio de identificador
+marca todo para reconstruirlo.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from recommendations.lazyBuild import LazyBuild
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import relationship_specs
+
+RANKING_WEIGHTS: Dict[str, float] = {
+    "association": 1.0,
+    "stock": 1.0,
+    "satisfaction": 1.0,
+}
+# Mayor `association_level` que genera `utils/createCSV.py` (de 1 a 11)
+ASSOCIATION_SCALE = 11.0
+SATISFACTION_SCORES = {"good": 1.0, "neutral": 0.5, "bad": 0.0}
+# Reseñas neutrales que se suman a cada promedio: con pocas reseñas el promedio se acerca a 0.5
+SATISFACTION_PRIOR = 2.0
+RANKING_LABELS = ("Provider", "Component", "Review", "Category")
+
+RELATIONS: Dict[str, RelationshipSpec] = relationship_specs(("SUPPLIES", "CATEGORIZED", "REVIEWS", "ASSOCIATED_WITH"))
+# Propiedad de la relación que usa cada señal (CATEGORIZED solo aporta la pertenencia)
+PROPERTIES = {"SUPPLIES": "stock", "REVIEWS": "satisfaction", "ASSOCIATED_WITH": "association_level"}
+
+
+def _number(value: Any) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if number == number else 0.0
+
+
+def satisfaction(value: Any) -> Optional[float]:
+    """
+    `satisfaction` de la reseña en [0, 1], o None si no es Good/Neutral/Bad.
+    """
+    return SATISFACTION_SCORES.get(value.strip().lower()) if isinstance(value, str) else None
+
+
+class _Totals:
+    __slots__ = ("stock", "components", "satisfaction", "reviews")
+
+    def __init__(self):
+        self.stock = 0.0
+        self.components = 0
+        self.satisfaction = 0.0
+        self.reviews = 0
+
+
+class ProviderTable:
+
+    def __init__(self):
+        self.categories: Set[Any] = set()
+        # proveedor -> componente -> stock, y el inverso
+        self._supplies: Dict[Any, Dict[Any, float]] = {}
+        self._suppliers: Dict[Any, Dict[Any, float]] = {}
+        # componente -> categorías, y el inverso
+        self._component_categories: Dict[Any, Set[Any]] = {}
+        self._category_components: Dict[Any, Set[Any]] = {}
+        # componente -> reseña -> satisfacción (None si no es válida), el inverso y las sumas por componente
+        self._reviews: Dict[Any, Dict[Any, Optional[float]]] = {}
+        self._reviewed: Dict[Any, Set[Any]] = {}
+        self._review_totals: Dict[Any, Tuple[float, int]] = {}
+        # categoría -> proveedor -> association_level, y las categorías de cada proveedor
+        self._associations: Dict[Any, Dict[Any, float]] = {}
+        self._associated: Dict[Any, Set[Any]] = {}
+        # categoría -> proveedor -> sumas de sus componentes en la categoría
+        self._totals: Dict[Any, Dict[Any, _Totals]] = {}
+        self._ranked: Dict[Any, List[Dict[str, Any]]] = {}
+        self.dirty: Set[Any] = set()
+
+    def __len__(self) -> int:
+        return sum(len(providers) for providers in self._totals.values())
+
+    def _shift(self, category: Any, provider: Any, stock: float, components: int, total: float, reviews: int):
+        providers = self._totals.setdefault(category, {})
+        totals = providers.get(provider)
+        if totals is None:
+            totals = providers[provider] = _Totals()
+        totals.stock += stock
+        totals.components += components
+        totals.satisfaction += total
+        totals.reviews += reviews
+        if totals.components <= 0:
+            del providers[provider]
+            if not providers:
+                del self._totals[category]
+        self.dirty.add(category)
+
+    def _link(self, provider: Any, component: Any, category: Any, sign: int):
+        stock = self._supplies[provider][component]
+        total, reviews = self._review_totals.get(component, (0.0, 0))
+        self._shift(category, provider, sign * stock, sign, sign * total, sign * reviews)
+
+    # ----------------------------------------------------------------- SUPPLIES
+
+    def set_supply(self, provider: Any, component: Any, stock: float):
+        self.remove_supply(provider, component)
+        self._supplies.setdefault(provider, {})[component] = stock
+        self._suppliers.setdefault(component, {})[provider] = stock
+        for category in self._component_categories.get(component, ()):
+            self._link(provider, component, category, 1)
+
+    def update_supply(self, provider: Any, component: Any, stock: float):
+        # Solo si la relación existe: actualizar propiedades no crea relaciones
+        if component in self._supplies.get(provider, {}):
+            self.set_supply(provider, component, stock)
+
+    def remove_supply(self, provider: Any, component: Any):
+        if component not in self._supplies.get(provider, {}):
+            return
+        for category in self._component_categories.get(component, ()):
+            self._link(provider, component, category, -1)
+        for first, second, index in ((provider, component, self._supplies), (component, provider, self._suppliers)):
+            del index[first][second]
+            if not index[first]:
+                del index[first]
+
+    # ----------------------------------------------------------------- CATEGORIZED
+
+    def add_category(self, component: Any, category: Any):
+        if category in self._component_categories.get(component, ()):
+            return
+        self._component_categories.setdefault(component, set()).add(category)
+        self._category_components.setdefault(category, set()).add(component)
+        for provider in self._suppliers.get(component, ()):
+            self._link(provider, component, category, 1)
+
+    def remove_category(self, component: Any, category: Any):
+        if category not in self._component_categories.get(component, ()):
+            return
+        for provider in self._suppliers.get(component, ()):
+            self._link(provider, component, category, -1)
+        for first, second, index in ((component, category, self._component_categories),
+                                     (category, component, self._category_components)):
+            index[first].discard(second)
+            if not index[first]:
+                del index[first]
+
+    # ----------------------------------------------------------------- REVIEWS
+
+    def _shift_reviews(self, component: Any, value: Optional[float], sign: int):
+        if value is None:
+            return
+        total, reviews = self._review_totals.get(component, (0.0, 0))
+        total, reviews = total + sign * value, reviews + sign
+        if reviews:
+            self._review_totals[component] = (total, reviews)
+        else:
+            self._review_totals.pop(component, None)
+        for category in self._component_categories.get(component, ()):
+            for provider in self._suppliers.get(component, ()):
+                self._shift(category, provider, 0.0, 0, sign * value, sign)
+
+    def set_review(self, review: Any, component: Any, value: Optional[float]):
+        self.remove_review(review, component)
+        self._reviews.setdefault(component, {})[review] = value
+        self._reviewed.setdefault(review, set()).add(component)
+        self._shift_reviews(component, value, 1)
+
+    def update_review(self, review: Any, component: Any, value: Optional[float]):
+        if review in self._reviews.get(component, {}):
+            self.set_review(review, component, value)
+
+    def remove_review(self, review: Any, component: Any):
+        reviews = self._reviews.get(component, {})
+        if review not in reviews:
+            return
+        self._shift_reviews(component, reviews.pop(review), -1)
+        if not reviews:
+            del self._reviews[component]
+        self._reviewed[review].discard(component)
+        if not self._reviewed[review]:
+            del self._reviewed[review]
+
+    # ----------------------------------------------------------------- ASSOCIATED_WITH
+
+    def set_association(self, provider: Any, category: Any, level: float):
+        self._associations.setdefault(category, {})[provider] = level
+        self._associated.setdefault(provider, set()).add(category)
+        self.dirty.add(category)
+
+    def update_association(self, provider: Any, category: Any, level: float):
+        if provider in self._associations.get(category, {}):
+            self.set_association(provider, category, level)
+
+    def remove_association(self, provider: Any, category: Any):
+        associations = self._associations.get(category, {})
+        if associations.pop(provider, None) is None:
+            return
+        if not associations:
+            del self._associations[category]
+        self._associated[provider].discard(category)
+        if not self._associated[provider]:
+            del self._associated[provider]
+        self.dirty.add(category)
+
+    # ----------------------------------------------------------------- Nodos
+
+    def remove_nodes(self, label: str, values: Iterable[Any]):
+        # DETACH DELETE: se quitan todas sus relaciones
+        for value in values:
+            if label == "Provider":
+                for component in list(self._supplies.get(value, ())):
+                    self.remove_supply(value, component)
+                for category in list(self._associated.get(value, ())):
+                    self.remove_association(value, category)
+            elif label == "Component":
+                for provider in list(self._suppliers.get(value, ())):
+                    self.remove_supply(provider, value)
+                for category in list(self._component_categories.get(value, ())):
+                    self.remove_category(value, category)
+                for review in list(self._reviews.get(value, ())):
+                    self.remove_review(review, value)
+            elif label == "Review":
+                for component in list(self._reviewed.get(value, ())):
+                    self.remove_review(value, component)
+            elif label == "Category":
+                for component in list(self._category_components.get(value, ())):
+                    self.remove_category(component, value)
+                for provider in list(self._associations.get(value, ())):
+                    self.remove_association(provider, value)
+                self.categories.discard(value)
+                self._ranked.pop(value, None)
+                self.dirty.discard(value)
+
+    # ----------------------------------------------------------------- Ranking
+
+    def _rank(self, category: Any) -> List[Dict[str, Any]]:
+        totals = self._totals.get(category, {})
+        associations = self._associations.get(category, {})
+        max_stock = max((entry.stock for entry in totals.values()), default=0.0)
+        empty = _Totals()
+        items = []
+        for provider in set(totals) | set(associations):
+            entry = totals.get(provider, empty)
+            level = associations.get(provider)
+            signals = {
+                "association": min(max((level or 0.0) / ASSOCIATION_SCALE, 0.0), 1.0),
+                "stock": entry.stock / max_stock if max_stock > 0 else 0.0,
+                "satisfaction": (entry.satisfaction + 0.5 * SATISFACTION_PRIOR) / (entry.reviews + SATISFACTION_PRIOR),
+            }
+            items.append({
+                "name": provider,
+                "score": sum(RANKING_WEIGHTS[signal] * value for signal, value in signals.items()),
+                "association_level": level,
+                "stock": entry.stock,
+                "components": entry.components,
+                "reviews": entry.reviews,
+                "signals": signals,
+            })
+        items.sort(key=lambda item: (-item["score"], str(item["name"])))
+        return items
+
+    def ranking(self, category: Any) -> List[Dict[str, Any]]:
+        """
+        Proveedores de la categoría ordenados por puntaje; solo se reordena si cambió algo.
+        """
+        if category in self.dirty or category not in self._ranked:
+            self._ranked[category] = self._rank(category)
+            self.dirty.discard(category)
+        return self._ranked[category]
+
+
+class ProviderRanking(LazyBuild[ProviderTable]):
+
+    def __init__(self, store: GraphStore):
+        super().__init__()
+        self.store = store
+
+    async def _build(self) -> ProviderTable:
+        table = ProviderTable()
+        async for node in self.store.stream_nodes("Category", fields=["name"]):
+            if node.get("name") is not None:
+                table.categories.add(node["name"])
+        # Primero la pertenencia a categorías para que cada relación sume una sola vez
+        for rel_type in ("CATEGORIZED", "SUPPLIES", "REVIEWS", "ASSOCIATED_WITH"):
+            async for from_value, to_value, properties in self.store.stream_relationships(RELATIONS[rel_type]):
+                self._apply(table, rel_type, from_value, to_value, properties, created=True)
+        return table
+
+    @staticmethod
+    def _apply(table: ProviderTable, rel_type: str, from_value: Any, to_value: Any,
+               properties: Optional[Dict[str, Any]], created: bool):
+        properties = properties or {}
+        if rel_type == "CATEGORIZED":
+            table.add_category(from_value, to_value)
+        elif rel_type == "SUPPLIES":
+            (table.set_supply if created else table.update_supply)(from_value, to_value, _number(properties.get("stock")))
+        elif rel_type == "REVIEWS":
+            (table.set_review if created else table.update_review)(from_value, to_value, satisfaction(properties.get("satisfaction")))
+        elif rel_type == "ASSOCIATED_WITH":
+            (table.set_association if created else table.update_association)(
+                from_value, to_value, _number(properties.get("association_level")))
+
+    # ----------------------------------------------------------------- Eventos de escritura
+
+    def category_created(self, name: Any):
+        table = self.tracked()
+        if table is not None and name is not None:
+            table.categories.add(name)
+
+    def relationship_created(self, rel_type: str, from_value: Any, to_value: Any, properties: Optional[Dict[str, Any]]):
+        table = self.tracked()
+        if table is not None:
+            self._apply(table, rel_type, from_value, to_value, properties, created=True)
+
+    def relationships_updated(self, rel_type: str, pairs: Iterable[Tuple[Any, Any]], set_props: Optional[Dict[str, Any]] = None,
+                              remove_props: Iterable[str] = ()):
+        prop = PROPERTIES.get(rel_type)
+        if prop is None or (prop not in (set_props or {}) and prop not in remove_props):
+            return
+        table = self.tracked()
+        if table is not None:
+            for from_value, to_value in pairs:
+                self._apply(table, rel_type, from_value, to_value, set_props, created=False)
+
+    def relationships_deleted(self, rel_type: str, pairs: Iterable[Tuple[Any, Any]]):
+        table = self.tracked()
+        if table is None:
+            return
+        remove = {"SUPPLIES": table.remove_supply, "CATEGORIZED": table.remove_category,
+                  "REVIEWS": table.remove_review, "ASSOCIATED_WITH": table.remove_association}[rel_type]
+        for from_value, to_value in pairs:
+            remove(from_value, to_value)
+
+    def nodes_deleted(self, label: str, values: Sequence[Any]):
+        table = self.tracked()
+        if table is not None:
+            table.remove_nodes(label, values)
+
+    # ----------------------------------------------------------------- Consultas
+
+    async def top(self, category: Any, k: int) -> Optional[Dict[str, Any]]:
+        """
+        Los `k` proveedores con más puntaje en la categoría, o None si la categoría no existe.
+        """
+        table = await self.get()
+        if category not in table.categories:
+            return None
+        ranking = table.ranking(category)
+        return {"category": category, "providers": len(ranking), "items": ranking[:k]}
+
+    def stats(self) -> Dict[str, Any]:
+        table = self._value
+        return {
+            "categories": len(table.categories) if table is not None else 0,
+            "pairs": len(table) if table is not None else 0,
+            "dirty_categories": len(table.dirty) if table is not None else 0,
+            **self.build_stats(),
+        }
@@ -0,0 +1,292 @@
+"""
+Índice de recomendaciones en memoria.
+
+Mantiene una `InteractionMatrix` por tipo de relación de `utils.labelRegistry.RELATION_FILES`
+(por ejemplo User×Component para PURCHASED), salvo PROMOTES, que vive en
+`recommendations.promotionTargeting`. Cada matriz se construye en la primera lectura
+recorriendo las relaciones del store y después se mantiene con los eventos que envían los
+handlers de escritura (`relationship_created`, `relationships_deleted`, `nodes_deleted`),
+sin volver a la base. Si una escritura llega mientras la matriz se construye, o cambia un
+identificador, la matriz se reconstruye en la siguiente lectura. La construcción y las
+recompactaciones de la base CSR corren en el threadpool; solo las relaciones de
+`COOCCURRENCE_RELATIONS` calculan co-ocurrencia.
+
+Los mismos eventos invalidan `user_results`, la caché de recomendaciones por usuario
+(ver `recommendations.userRecommender`), marcan desactualizado el grafo de `pagerank`
+(ver `recommendations.personalizedPageRank`) y mantienen el índice de componentes
+similares `similar` (ver `recommendations.componentEmbeddings`) y el grafo de
+compatibilidades de `bundles` (ver `recommendations.bundleBuilder`), los contadores de
+`trending` (ver `recommendations.trendingCounters`), el ranking de proveedores por categoría
+`provider_ranking` (ver `recommendations.providerRanking`) y la tabla de usuarios de
+`promotions` (ver `recommendations.promotionTargeting`).
+"""
+
+import os
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from recommendations.bundleBuilder import BundleBuilder
+from recommendations.componentEmbeddings import ComponentSimilarityIndex
+from recommendations.interactionMatrix import InteractionMatrix
+from recommendations.lazyBuild import LazyBuild
+from recommendations.personalizedPageRank import PAGERANK_LABELS, PAGERANK_RELATIONS, PageRankService
+from recommendations.promotionTargeting import USER_PROPERTIES, PromotionTargeting
+from recommendations.providerRanking import RANKING_LABELS, RELATIONS as RANKING_RELATIONS, ProviderRanking
+from recommendations.trendingCounters import TrendingService
+from recommendations.userRecommender import UserResultCache
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import get_identifier_key, relationship_specs
+
+# Si la API construye las matrices al arrancar en lugar de en la primera lectura
+RECOMMENDATIONS_PRELOAD = os.getenv("RECOMMENDATIONS_PRELOAD", "false").lower() == "true"
+
+# Relaciones cuya co-ocurrencia se consulta ("también compraron"); el resto solo se lee
+# por fila o por columna
+COOCCURRENCE_RELATIONS = ("PURCHASED",)
+
+# Tipo de relación -> especificación (labels y llaves del registro)
+RELATIONS: Dict[str, RelationshipSpec] = relationship_specs()
+# Relaciones con matriz de interacciones. Las campañas crean miles de PROMOTES por proveedor
+# y de ellas solo se leen los usuarios de cada proveedor
+MATRIX_RELATIONS: Dict[str, RelationshipSpec] = {rel_type: spec for rel_type, spec in RELATIONS.items()
+                                                 if rel_type != "PROMOTES"}
+
+
+class MatrixBuild(LazyBuild[InteractionMatrix]):
+
+    def __init__(self, store: GraphStore, spec: RelationshipSpec):
+        super().__init__()
+        self.store = store
+        self.spec = spec
+
+    async def _build(self) -> InteractionMatrix:
+        matrix = InteractionMatrix(cooccurrence=self.spec.rel_type in COOCCURRENCE_RELATIONS)
+        pairs = [(from_value, to_value) async for from_value, to_value, _ in
+                 self.store.stream_relationships(self.spec, with_properties=False)]
+        # La matriz todavía no está publicada: nadie más la toca mientras se carga
+        await run_in_threadpool(matrix.load, pairs)
+        return matrix
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        matrix = self._value
+        return None if matrix is None else dict(matrix.stats(), stale=self._stale)
+
+
+class RecommendationIndex:
+
+    def __init__(self, store: GraphStore):
+        self.store = store
+        self._matrices: Dict[str, MatrixBuild] = {rel_type: MatrixBuild(store, spec) for rel_type, spec in MATRIX_RELATIONS.items()}
+        self.user_results = UserResultCache()
+        self.pagerank = PageRankService(store)
+        self.similar = ComponentSimilarityIndex(store)
+        self.bundles = BundleBuilder(store)
+        self.trending = TrendingService(store)
+        self.provider_ranking = ProviderRanking(store)
+        self.promotions = PromotionTargeting(store)
+
+    async def matrix(self, rel_type: str) -> InteractionMatrix:
+        """
+        Matriz del tipo de relación, construyéndola si todavía no existe o quedó desactualizada.
+        """
+        build = self._matrices.get(rel_type)
+        if build is None:
+            raise ValueError(f"Tipo de relación sin matriz de interacciones: '{rel_type}'. Usa: {list(MATRIX_RELATIONS)}")
+        matrix = await build.get()
+        if matrix.needs_compaction():
+            await self._compact(matrix)
+        return matrix
+
+    @staticmethod
+    async def _compact(matrix: InteractionMatrix):
+        """
+        Recompacta la base CSR en el threadpool. Las escrituras siguen llegando a la matriz
+        mientras tanto y las lecturas usan la base anterior con su delta.
+        """
+        coordinates = matrix.start_compaction()
+        try:
+            base = await run_in_threadpool(InteractionMatrix.build_base, *coordinates)
+        except BaseException:
+            matrix.cancel_compaction()
+            raise
+        matrix.finish_compaction(base)
+
+    async def preload(self, rel_types: Optional[Sequence[str]] = None):
+        for rel_type in rel_types or MATRIX_RELATIONS:
+            await self.matrix(rel_type)
+
+    def _spec_matches(self, from_label: str, rel_type: str, to_label: str) -> bool:
+        spec = RELATIONS.get(rel_type)
+        return spec is not None and (spec.from_label, spec.to_label) == (from_label, to_label)
+
+    @staticmethod
+    def _ranking_matches(from_label: str, rel_type: str, to_label: str) -> bool:
+        spec = RANKING_RELATIONS.get(rel_type)
+        return spec is not None and (spec.from_label, spec.to_label) == (from_label, to_label)
+
+    def _tracked(self, from_label: str, rel_type: str, to_label: str) -> Optional[InteractionMatrix]:
+        """
+        Matriz ya construida para la relación, o None si no hay que actualizar nada.
+        Si la matriz se está construyendo, la marca para reconstruirla.
+        """
+        build = self._matrices.get(rel_type)
+        if build is None or not self._spec_matches(from_label, rel_type, to_label):
+            return None
+        return build.tracked()
+
+    # ----------------------------------------------------------------- Eventos de escritura
+
+    def node_created(self, label: str, properties: Dict[str, Any]):
+        if label == "Component":
+            self.similar.add(properties)
+            self.bundles.component_created(properties)
+        elif label == "Category":
+            self.provider_ranking.category_created(properties.get("name"))
+        elif label == "User":
+            self.promotions.user_created(properties)
+
+    def relationship_created(self, from_label: str, rel_type: str, to_label: str, from_value: Any, to_value: Any,
+                             properties: Optional[Dict[str, Any]] = None):
+        if from_label == "User":
+            self.user_results.invalidate([from_value])
+        if rel_type in PAGERANK_RELATIONS:
+            self.pagerank.mark_changed()
+        if (from_label, rel_type, to_label) == ("Component", "COMPLEMENTS", "Component"):
+            self.bundles.relationship_created(from_value, to_value, properties)
+        if self._spec_matches(from_label, rel_type, to_label):
+            self.trending.relationship_created(rel_type, from_value, to_value, properties)
+        if self._ranking_matches(from_label, rel_type, to_label):
+            self.provider_ranking.relationship_created(rel_type, from_value, to_value, properties)
+        if (from_label, rel_type, to_label) == ("Provider", "PROMOTES", "User"):
+            self.promotions.promotions_created(from_value, [to_value])
+        matrix = self._tracked(from_label, rel_type, to_label)
+        if matrix is not None:
+            matrix.add(from_value, to_value)
+
+    def promotions_created(self, provider: Any, users: Sequence[Any]):
+        """
+        Se crearon en bloque las relaciones PROMOTES de `provider` a `users` (una campaña).
+        Equivale a `relationship_created` por cada usuario, con un solo evento por bloque.
+        """
+        self.pagerank.mark_changed()
+        self.promotions.promotions_created(provider, users)
+
+    def relationships_updated(self, from_label: str, rel_type: str, to_label: str, pairs: Iterable[Tuple[Any, Any]],
+                              set_props: Optional[Dict[str, Any]] = None, remove_props: Sequence[str] = ()):
+        """
+        Se agregaron o cambiaron `set_props`, o se eliminaron `remove_props`, de las relaciones
+        de `pairs`. Las matrices no usan propiedades de relaciones; los combos, las tendencias y
+        el ranking de proveedores sí.
+        """
+        pairs = list(pairs)
+        if (from_label, rel_type, to_label) == ("Component", "COMPLEMENTS", "Component"):
+            self.bundles.relationships_updated(pairs, set_props, remove_props)
+        if self._spec_matches(from_label, rel_type, to_label):
+            self.trending.relationships_updated(rel_type, set_props, remove_props)
+        if self._ranking_matches(from_label, rel_type, to_label):
+            self.provider_ranking.relationships_updated(rel_type, pairs, set_props, remove_props)
+
+    def relationships_deleted(self, from_label: str, rel_type: str, to_label: str, pairs: Iterable[Tuple[Any, Any]]):
+        pairs = list(pairs)
+        if from_label == "User":
+            self.user_results.invalidate(from_value for from_value, _ in pairs)
+        if rel_type in PAGERANK_RELATIONS:
+            self.pagerank.mark_changed()
+        if (from_label, rel_type, to_label) == ("Component", "COMPLEMENTS", "Component"):
+            self.bundles.relationships_deleted(pairs)
+        if self._spec_matches(from_label, rel_type, to_label):
+            self.trending.relationships_deleted(rel_type, pairs)
+        if self._ranking_matches(from_label, rel_type, to_label):
+            self.provider_ranking.relationships_deleted(rel_type, pairs)
+        if (from_label, rel_type, to_label) == ("Provider", "PROMOTES", "User"):
+            self.promotions.promotions_deleted(pairs)
+        matrix = self._tracked(from_label, rel_type, to_label)
+        if matrix is not None:
+            for from_value, to_value in pairs:
+                matrix.remove(from_value, to_value)
+
+    def nodes_deleted(self, label: str, values: Sequence[Any]):
+        # DETACH DELETE: se quitan sus filas o columnas en todas las matrices donde aparece el label
+        if label == "User":
+            self.user_results.invalidate(values)
+            self.trending.users_deleted(values)
+            self.promotions.users_deleted(values)
+        elif label in ("Component", "Provider"):
+            self.user_results.clear()
+        if label == "Provider":
+            self.promotions.providers_deleted(values)
+        if label in PAGERANK_LABELS:
+            self.pagerank.mark_changed()
+        if label == "Component":
+            self.similar.remove(values)
+            self.bundles.components_deleted(values)
+            self.trending.components_deleted(values)
+        if label in RANKING_LABELS:
+            self.provider_ranking.nodes_deleted(label, values)
+        for rel_type, spec in MATRIX_RELATIONS.items():
+            if label not in (spec.from_label, spec.to_label):
+                continue
+            matrix = self._tracked(spec.from_label, rel_type, spec.to_label)
+            if matrix is None:
+                continue
+            if spec.from_label == label:
+                matrix.remove_rows(values)
+            if spec.to_label == label:
+                matrix.remove_cols(values)
+
+    def nodes_updated(self, label: str, key: str, values: Sequence[Any], properties: Iterable[str]):
+        """
+        Se agregaron, cambiaron o eliminaron `properties` de los nodos con `key` en `values`.
+        Si entre ellas está el identificador (name/title), las matrices del label se
+        reconstruyen en la siguiente lectura.
+        """
+        properties = set(properties)
+        identifier = get_identifier_key(label)
+        if identifier in properties:
+            for rel_type, spec in MATRIX_RELATIONS.items():
+                if label in (spec.from_label, spec.to_label):
+                    self._matrices[rel_type].mark_stale()
+            if label in PAGERANK_LABELS:
+                self.pagerank.mark_changed()
+            if label == "Component":
+                self.similar.mark_stale()
+                self.bundles.mark_stale()
+            if label in ("User", "Component"):
+                self.trending.mark_stale()
+            if label in RANKING_LABELS:
+                self.provider_ranking.mark_stale()
+            if label in ("User", "Provider"):
+                self.promotions.mark_stale()
+
+        if label == "User" and properties.intersection(USER_PROPERTIES):
+            self.promotions.mark_stale()
+        if label == "User":
+            # budget y preferred_brands son parte del cálculo
+            if key == identifier and identifier not in properties:
+                self.user_results.invalidate(values)
+            else:
+                self.user_results.clear()
+        elif identifier in properties or (label == "Component" and "price" in properties):
+            self.user_results.clear()
+        if label == "Component" and "price" in properties:
+            self.bundles.mark_stale()
+
+    def stats(self) -> Dict[str, Any]:
+        matrices = {rel_type: build.stats() for rel_type, build in self._matrices.items()}
+        return {
+            "matrices": {rel_type: stats for rel_type, stats in matrices.items() if stats is not None},
+            "user_results": self.user_results.stats(),
+            "pagerank": self.pagerank.stats(),
+            "similar_components": self.similar.stats(),
+            "bundles": self.bundles.stats(),
+            "trending": self.trending.stats(),
+            "provider_ranking": self.provider_ranking.stats(),
+            "promotions": self.promotions.stats(),
+        }
+
+
+def get_recommendations(request: Request) -> RecommendationIndex:
+    """
+    Dependencia de FastAPI: retorna el índice de recomendaciones compartido que vive en `app.state`.
+    """
+    return request.app.state.recommendations
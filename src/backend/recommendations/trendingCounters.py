@@ -0,0 +1,372 @@
+"""
+Componentes en tendencia: conteos por componente en ventanas de tiempo, sin recorrer las
+relaciones en cada consulta.
+
+Por cada tipo de relación de `TRENDING_RELATIONS` (PURCHASED, SEARCHED y WANTS, con su
+propiedad de fecha) `BucketedCounters` guarda cuántas relaciones recibió cada componente
+por día y por semana. Solo se conservan los últimos `TRENDING_RETENTION_DAYS` días antes
+del evento más reciente: los buckets más viejos se descartan a medida que llegan eventos
+nuevos.
+
+Una consulta suma los buckets de la ventana (por día hasta `TRENDING_DAILY_WINDOW` días,
+por semana en ventanas más largas, con días sueltos en los bordes) y pondera cada bucket
+con decaimiento exponencial por su antigüedad: un evento de hace `half_life` días vale la
+mitad que uno de la fecha de consulta.
+
+`TrendingService` arma los contadores recorriendo una vez las relaciones del store en la
+primera lectura y después los mantiene con los eventos de creación y eliminación de
+relaciones. Para descontar una relación eliminada guarda el día de cada relación contada,
+indexado por usuario y por componente (`EdgeDays`): eliminar un nodo cuesta O(grado).
+Si cambia una fecha o un identificador, los contadores se vuelven a armar en la siguiente
+lectura.
+"""
+
+import datetime
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from recommendations.interactionMatrix import top_k
+from recommendations.lazyBuild import LazyBuild
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import relationship_specs
+
+# Días de historia que se conservan antes del evento más reciente (también la ventana máxima)
+TRENDING_RETENTION_DAYS = int(os.getenv("TRENDING_RETENTION_DAYS", "365"))
+# Ventanas de hasta estos días se suman por día; las más largas por semana
+TRENDING_DAILY_WINDOW = 28
+
+WEEK = 7
+
+# Tipo de relación -> propiedad con la fecha del evento
+TRENDING_RELATIONS: Dict[str, str] = {
+    "PURCHASED": "purchase_date",
+    "SEARCHED": "search_date",
+    "WANTS": "added_date",
+}
+
+RELATIONS: Dict[str, RelationshipSpec] = relationship_specs(TRENDING_RELATIONS)
+
+
+def event_day(value: Any) -> Optional[int]:
+    """
+    Día (ordinal de `datetime.date`) de una fecha del grafo: texto ISO ('2024-01-27' o con
+    hora), `date`/`datetime` o fecha del driver de Neo4j. None si no se puede leer.
+    """
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if isinstance(value, datetime.datetime):
+        return value.date().toordinal()
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    if isinstance(value, str):
+        try:
+            return datetime.date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_window(value: str) -> int:
+    """
+    Días de una ventana como '7d' o '4w'.
+    """
+    value = value.strip().lower()
+    units = {"d": 1, "w": WEEK}
+    if len(value) < 2 or value[-1] not in units or not value[:-1].isdigit() or int(value[:-1]) == 0:
+        raise ValueError(f"Ventana inválida: '{value}'. Usa por ejemplo 7d o 4w")
+    return int(value[:-1]) * units[value[-1]]
+
+
+class BucketedCounters:
+
+    def __init__(self, retention_days: int = TRENDING_RETENTION_DAYS):
+        self.retention_days = retention_days
+        # día (o semana) -> id de componente -> relaciones
+        self.days: Dict[int, Dict[int, int]] = {}
+        self.weeks: Dict[int, Dict[int, int]] = {}
+        self.latest: Optional[int] = None
+        self.events = 0
+
+    @property
+    def cutoff(self) -> Optional[int]:
+        # Los días hasta este (inclusive) ya no se conservan
+        return None if self.latest is None else self.latest - self.retention_days
+
+    def retained(self, day: int) -> bool:
+        return self.latest is None or day > self.cutoff
+
+    def _apply(self, buckets: Dict[int, Dict[int, int]], key: int, component: int, amount: int):
+        bucket = buckets.setdefault(key, {})
+        count = bucket.get(component, 0) + amount
+        if count > 0:
+            bucket[component] = count
+        else:
+            bucket.pop(component, None)
+            if not bucket:
+                del buckets[key]
+
+    def add(self, component: int, day: int, amount: int = 1) -> bool:
+        """
+        Suma (o con `amount` negativo, resta) relaciones del componente en el día. Retorna
+        False si el día ya quedó fuera de la historia. Un día nuevo más reciente que todos
+        descarta los buckets que quedan fuera.
+        """
+        if not self.retained(day):
+            return False
+        self._apply(self.days, day, component, amount)
+        self._apply(self.weeks, day // WEEK, component, amount)
+        self.events += amount
+        if amount > 0 and (self.latest is None or day > self.latest):
+            self.latest = day
+            self._prune()
+        return True
+
+    def _prune(self):
+        cutoff = self.cutoff
+        for day in [day for day in self.days if day <= cutoff]:
+            self.events -= sum(self.days.pop(day).values())
+        # Una semana se descarta cuando todos sus días quedaron fuera; las ventanas nunca
+        # empiezan antes del corte, así que de una semana parcial solo se leen sus días
+        for week in [week for week in self.weeks if (week + 1) * WEEK - 1 <= cutoff]:
+            del self.weeks[week]
+
+    def remove_component(self, component: int):
+        for buckets in (self.days, self.weeks):
+            for key in list(buckets):
+                count = buckets[key].pop(component, 0)
+                if buckets is self.days:
+                    self.events -= count
+                if not buckets[key]:
+                    del buckets[key]
+
+    def _buckets(self, start: int, end: int) -> List[Tuple[Dict[int, int], float]]:
+        """
+        Buckets que cubren los días [start, end] con la antigüedad (en días respecto de `end`)
+        de cada uno; las semanas completas usan la de su día central.
+        """
+        if end - start + 1 <= TRENDING_DAILY_WINDOW:
+            return [(self.days[day], end - day) for day in range(start, end + 1) if day in self.days]
+        first_week, last_week = -(-start // WEEK), (end + 1) // WEEK - 1
+        days = list(range(start, first_week * WEEK)) + list(range((last_week + 1) * WEEK, end + 1))
+        buckets = [(self.days[day], end - day) for day in days if day in self.days]
+        buckets += [(self.weeks[week], end - (week * WEEK + WEEK // 2))
+                    for week in range(first_week, last_week + 1) if week in self.weeks]
+        return buckets
+
+    def window(self, start: int, end: int, half_life: float, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Relaciones de cada componente (ids 0..size-1) entre los días `start` y `end`, y el
+        puntaje con decaimiento `0.5^(antigüedad / half_life)`.
+        """
+        buckets = self._buckets(start, end)
+        if not buckets:
+            return np.zeros(size), np.zeros(size)
+        ids = np.concatenate([np.fromiter(bucket.keys(), dtype=np.int64, count=len(bucket)) for bucket, _ in buckets])
+        counts = np.concatenate([np.fromiter(bucket.values(), dtype=np.float64, count=len(bucket)) for bucket, _ in buckets])
+        weights = np.concatenate([np.full(len(bucket), 0.5 ** (age / half_life)) for bucket, age in buckets])
+        return (np.bincount(ids, weights=counts, minlength=size),
+                np.bincount(ids, weights=counts * weights, minlength=size))
+
+
+class EdgeDays:
+    """
+    Días de las relaciones contadas de un tipo, por usuario y componente.
+    """
+
+    def __init__(self):
+        # usuario -> componente -> días
+        self.by_user: Dict[Any, Dict[Any, List[int]]] = {}
+        # componente -> usuarios con alguna relación contada
+        self.by_component: Dict[Any, Set[Any]] = {}
+
+    def add(self, user: Any, component: Any, day: int):
+        self.by_user.setdefault(user, {}).setdefault(component, []).append(day)
+        self.by_component.setdefault(component, set()).add(user)
+
+    def _unlink(self, user: Any, component: Any):
+        users = self.by_component.get(component)
+        if users is not None:
+            users.discard(user)
+            if not users:
+                del self.by_component[component]
+
+    def pop(self, user: Any, component: Any) -> List[int]:
+        components = self.by_user.get(user)
+        days = components.pop(component, []) if components is not None else []
+        if components is not None and not components:
+            del self.by_user[user]
+        self._unlink(user, component)
+        return days
+
+    def pop_user(self, user: Any) -> Dict[Any, List[int]]:
+        components = self.by_user.pop(user, {})
+        for component in components:
+            self._unlink(user, component)
+        return components
+
+    def pop_component(self, component: Any):
+        for user in self.by_component.pop(component, ()):
+            components = self.by_user[user]
+            del components[component]
+            if not components:
+                del self.by_user[user]
+
+    def forget(self, counter: "BucketedCounters"):
+        # Descarta los días que quedaron fuera de la historia del contador
+        for user, components in list(self.by_user.items()):
+            for component, days in list(components.items()):
+                kept = [day for day in days if counter.retained(day)]
+                if kept:
+                    components[component] = kept
+                else:
+                    del components[component]
+                    self._unlink(user, component)
+            if not components:
+                del self.by_user[user]
+
+
+class TrendingService(LazyBuild[Dict[str, BucketedCounters]]):
+
+    def __init__(self, store: GraphStore, retention_days: int = TRENDING_RETENTION_DAYS):
+        super().__init__()
+        self.store = store
+        self.retention_days = retention_days
+        # Tipo de relación -> días de las relaciones contadas
+        self._edges: Dict[str, EdgeDays] = {}
+        self.components: Dict[Any, int] = {}
+        self.names: List[Any] = []
+
+    def _component_id(self, name: Any) -> int:
+        component = self.components.get(name)
+        if component is None:
+            component = self.components[name] = len(self.names)
+            self.names.append(name)
+        return component
+
+    async def _build(self) -> Dict[str, BucketedCounters]:
+        """
+        Contadores de cada tipo de relación (y los días de sus relaciones en `_edges`).
+        """
+        self.components, self.names = {}, []
+        counters, edges = {}, {}
+        for rel_type, spec in RELATIONS.items():
+            date_key = TRENDING_RELATIONS[rel_type]
+            events = []
+            async for from_value, to_value, properties in self.store.stream_relationships(spec):
+                day = event_day((properties or {}).get(date_key))
+                if day is not None:
+                    events.append((from_value, to_value, day))
+            # Primero el día más reciente, para descartar los viejos sin podar bucket por bucket
+            counter = counters[rel_type] = BucketedCounters(self.retention_days)
+            counter.latest = max((day for _, _, day in events), default=None)
+            days = edges[rel_type] = EdgeDays()
+            for from_value, to_value, day in events:
+                if counter.add(self._component_id(to_value), day):
+                    days.add(from_value, to_value, day)
+        self._edges = edges
+        return counters
+
+    def _counter(self, rel_type: str) -> Optional[BucketedCounters]:
+        """
+        Contador ya construido del tipo de relación, o None si no hay que actualizar nada.
+        """
+        if rel_type not in RELATIONS:
+            return None
+        counters = self.tracked()
+        return None if counters is None else counters[rel_type]
+
+    # ----------------------------------------------------------------- Eventos de escritura
+
+    def relationship_created(self, rel_type: str, from_value: Any, to_value: Any, properties: Optional[Dict[str, Any]]):
+        counter = self._counter(rel_type)
+        if counter is None:
+            return
+        day = event_day((properties or {}).get(TRENDING_RELATIONS[rel_type]))
+        latest = counter.latest
+        if day is not None and counter.add(self._component_id(to_value), day):
+            self._edges[rel_type].add(from_value, to_value, day)
+            if counter.latest != latest:
+                self._edges[rel_type].forget(counter)
+
+    def relationships_updated(self, rel_type: str, set_props: Optional[Dict[str, Any]], remove_props: Iterable[str]):
+        date_key = TRENDING_RELATIONS.get(rel_type)
+        if date_key is not None and (date_key in (set_props or {}) or date_key in remove_props):
+            self.mark_stale()
+
+    def relationships_deleted(self, rel_type: str, pairs: Iterable[Tuple[Any, Any]]):
+        counter = self._counter(rel_type)
+        if counter is None:
+            return
+        edges = self._edges[rel_type]
+        for from_value, to_value in pairs:
+            for day in edges.pop(from_value, to_value):
+                counter.add(self.components[to_value], day, -1)
+
+    def components_deleted(self, values: Sequence[Any]):
+        for rel_type in RELATIONS:
+            counter = self._counter(rel_type)
+            if counter is None:
+                continue
+            edges = self._edges[rel_type]
+            for value in set(values):
+                component = self.components.get(value)
+                if component is not None:
+                    counter.remove_component(component)
+                edges.pop_component(value)
+
+    def users_deleted(self, values: Sequence[Any]):
+        for rel_type in RELATIONS:
+            counter = self._counter(rel_type)
+            if counter is None:
+                continue
+            edges = self._edges[rel_type]
+            for value in set(values):
+                for to_value, days in edges.pop_user(value).items():
+                    for day in days:
+                        counter.add(self.components[to_value], day, -1)
+
+    # ----------------------------------------------------------------- Consultas
+
+    async def top(self, rel_type: str, window_days: int, k: int, as_of: datetime.date,
+                  half_life_days: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Los `k` componentes con más puntaje en los `window_days` días que terminan en `as_of`.
+        Por defecto `half_life_days` es la mitad de la ventana.
+        """
+        if rel_type not in RELATIONS:
+            raise ValueError(f"Tipo de relación sin tendencias: '{rel_type}'. Usa: {list(RELATIONS)}")
+        if window_days > self.retention_days:
+            raise ValueError(f"La ventana máxima es de {self.retention_days} días (TRENDING_RETENTION_DAYS)")
+        counter = (await self.get())[rel_type]
+        half_life = half_life_days or window_days / 2
+        end = as_of.toordinal()
+        start = end - window_days + 1
+        if counter.cutoff is not None and start <= counter.cutoff:
+            # Los buckets de esos días ya se descartaron: la suma saldría incompleta
+            raise ValueError(f"La ventana empieza el {datetime.date.fromordinal(start).isoformat()}, pero solo se "
+                             f"conserva la historia desde el {datetime.date.fromordinal(counter.cutoff + 1).isoformat()} "
+                             f"(TRENDING_RETENTION_DAYS días antes del evento más reciente)")
+        counts, scores = counter.window(start, end, half_life, len(self.names))
+        positive = np.flatnonzero(counts > 0)
+        names = np.asarray([str(self.names[component]) for component in positive.tolist()])
+        best = positive[top_k(scores[positive], names, k)] if len(positive) else []
+        return {
+            "type": rel_type,
+            "window_days": window_days,
+            "as_of": as_of.isoformat(),
+            "half_life_days": half_life,
+            "latest_event": None if counter.latest is None else datetime.date.fromordinal(counter.latest).isoformat(),
+            "items": [{"name": self.names[component], "score": float(scores[component]), "count": int(counts[component])}
+                      for component in best],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        counters = self._value or {}
+        return {
+            "types": {rel_type: {"events": counter.events, "days": len(counter.days), "weeks": len(counter.weeks),
+                                 "latest_event": None if counter.latest is None
+                                 else datetime.date.fromordinal(counter.latest).isoformat()}
+                      for rel_type, counter in counters.items()},
+            "components": len(self.components),
+            **self.build_stats(),
+        }
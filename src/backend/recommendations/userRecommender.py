@@ -0,0 +1,184 @@
+"""
+Recomendaciones de componentes por usuario.
+
+Combina cinco señales, cada una normalizada a [0, 1] dividiendo por su máximo:
+  - `also_bought`: co-compras (PURCHASED) de lo que el usuario ya compró;
+  - `wanted`: componentes en su lista de deseos (WANTS);
+  - `searched`: componentes que buscó (SEARCHED);
+  - `related`: co-compras de lo que desea o buscó;
+  - `brand`: cuántos de sus `preferred_brands` surten el componente (SUPPLIES).
+
+El puntaje es la suma ponderada por `SIGNAL_WEIGHTS`. Lo ya comprado no se recomienda y
+`Component.price <= User.budget` es un filtro estricto: los componentes sin precio se descartan.
+
+Todo sale de las matrices de `RecommendationIndex`, salvo el usuario y los precios de los
+candidatos (dos consultas por índice). El resultado se guarda por usuario en
+`UserResultCache`, que se invalida cuando cambian las relaciones o propiedades de ese usuario,
+o completo cuando cambia un precio o se elimina un componente o proveedor; el TTL cubre lo
+demás (por ejemplo, compras de otros usuarios).
+"""
+
+import ast
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from store.graphStore import GraphStore
+
+# Segundos que se guarda el resultado de un usuario
+USER_RECOMMENDATIONS_TTL = float(os.getenv("USER_RECOMMENDATIONS_TTL", "300"))
+# Usuarios con resultado en caché
+USER_RECOMMENDATIONS_CACHE_SIZE = int(os.getenv("USER_RECOMMENDATIONS_CACHE_SIZE", "10000"))
+# Recomendaciones que se calculan y guardan por usuario (el máximo de `k`)
+USER_RECOMMENDATIONS_DEPTH = 50
+# Candidatos por consulta de precios
+PRICE_BATCH_SIZE = 200
+
+SIGNAL_WEIGHTS: Dict[str, float] = {
+    "wanted": 3.0,
+    "also_bought": 2.0,
+    "searched": 1.5,
+    "brand": 1.0,
+    "related": 1.0,
+}
+
+
+def as_list(value: Any) -> List[Any]:
+    """
+    Propiedades de lista que pueden venir como lista o como su texto (`"['a', 'b']"`, así las
+    deja la carga desde CSV).
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    text = str(value).strip()
+    if text.startswith("["):
+        try:
+            parsed = ast.literal_eval(text)
+            if isinstance(parsed, (list, tuple)):
+                return list(parsed)
+        except (ValueError, SyntaxError):
+            text = text.strip("[]")
+    return [item.strip().strip("'\"") for item in text.split(",") if item.strip()]
+
+
+def _normalized(scores: Dict[Any, float]) -> Dict[Any, float]:
+    top = max(scores.values(), default=0.0)
+    return {name: score / top for name, score in scores.items()} if top > 0 else {}
+
+
+class UserResultCache:
+
+    def __init__(self, capacity: int = USER_RECOMMENDATIONS_CACHE_SIZE, ttl: float = USER_RECOMMENDATIONS_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Igual que en `store.nodeCache`: un cálculo que empezó antes de una invalidación no se guarda
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user: Any) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            self._entries.pop(user, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user: Any, result: Dict[str, Any], generation: int):
+        if self.capacity <= 0 or generation != self.generation:
+            return
+        self._entries[user] = (time.monotonic(), result)
+        self._entries.move_to_end(user)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, users: Iterable[Any]):
+        self.generation += 1
+        for user in users:
+            if self._entries.pop(user, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        self.generation += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else None,
+            "cached_users": len(self._entries),
+            "ttl_seconds": self.ttl,
+        }
+
+
+async def _within_budget(store: GraphStore, ranked: List[str], budget: Optional[float], limit: int) -> Dict[str, Any]:
+    """
+    Precios de los primeros candidatos que cumplen el presupuesto, consultados en bloques
+    hasta juntar `limit`.
+    """
+    prices: Dict[str, Any] = {}
+    for start in range(0, len(ranked), PRICE_BATCH_SIZE):
+        chunk = ranked[start:start + PRICE_BATCH_SIZE]
+        for node in await store.find_nodes_in("Component", "name", chunk, fields=["name", "price"]):
+            price = node.get("price")
+            if isinstance(price, (int, float)) and (budget is None or price <= budget):
+                prices[node["name"]] = price
+        if len(prices) >= limit:
+            break
+    return prices
+
+
+async def recommend_for_user(index, store: GraphStore, user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcula las primeras `USER_RECOMMENDATIONS_DEPTH` recomendaciones del usuario
+    (`user` trae name, budget y preferred_brands). `index` es el `RecommendationIndex`.
+    """
+    name = user["name"]
+    purchases = await index.matrix("PURCHASED")
+    wants = (await index.matrix("WANTS")).items(name)
+    searched = (await index.matrix("SEARCHED")).items(name)
+    supplies = await index.matrix("SUPPLIES")
+    purchased = set(purchases.items(name))
+
+    signals = {
+        "also_bought": _normalized(purchases.cooccurrence_scores(purchased)),
+        "wanted": {component: 1.0 for component in wants},
+        "searched": {component: 1.0 for component in searched},
+        "related": _normalized(purchases.cooccurrence_scores(set(wants) | set(searched))),
+        "brand": _normalized(supplies.column_counts(as_list(user.get("preferred_brands")))),
+    }
+
+    scores: Dict[str, float] = {}
+    for signal, values in signals.items():
+        for component, value in values.items():
+            if component not in purchased:
+                scores[component] = scores.get(component, 0.0) + SIGNAL_WEIGHTS[signal] * value
+
+    ranked = sorted(scores, key=lambda component: (-scores[component], str(component)))
+    budget = user.get("budget") if isinstance(user.get("budget"), (int, float)) else None
+    prices = await _within_budget(store, ranked, budget, USER_RECOMMENDATIONS_DEPTH)
+
+    items = []
+    for component in ranked:
+        if component not in prices:
+            continue
+        items.append({
+            "name": component,
+            "price": prices[component],
+            "score": scores[component],
+            "signals": {signal: values[component] for signal, values in signals.items() if component in values},
+        })
+        if len(items) >= USER_RECOMMENDATIONS_DEPTH:
+            break
+
+    return {"user": name, "budget": budget, "candidates": len(scores), "items": items}
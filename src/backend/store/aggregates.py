@@ -0,0 +1,71 @@
+"""
+Motor de agregados numéricos compartido por los stores.
+
+Para cada propiedad numérica calcula, en una sola pasada sobre los nodos del label:
+count, avg, min, max, stddev, los percentiles pedidos y la moda. Las definiciones
+siguen a las funciones de Cypher para que `MemoryStore` y `Neo4jStore` respondan igual:
+  - stddev es la desviación muestral (`stDev`), 0 con un solo valor.
+  - los percentiles interpolan linealmente (`percentileCont`).
+  - la moda es el valor más frecuente; si hay empate, el menor.
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+AVAILABLE_STATS = ("count", "avg", "min", "max", "stddev", "median", "percentiles", "mode")
+DEFAULT_PERCENTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def percentile_cont(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    position = q * (len(sorted_values) - 1)
+    lower, upper = math.floor(position), math.ceil(position)
+    fraction = position - lower
+    return sorted_values[lower] + fraction * (sorted_values[upper] - sorted_values[lower])
+
+
+def mode(values: Iterable[Any]) -> Any:
+    counts = Counter(values)
+    if not counts:
+        return None
+    return min(counts.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+def summarize(values: List[float], percentiles: Sequence[float] = (), with_mode: bool = True) -> Dict[str, Any]:
+    """
+    Estadísticas de una columna de valores numéricos (no vacía).
+    """
+    count = len(values)
+    total = math.fsum(values)
+    avg = total / count
+
+    if count > 1:
+        variance = math.fsum((value - avg) ** 2 for value in values) / (count - 1)
+        stddev = math.sqrt(variance)
+    else:
+        stddev = 0.0
+
+    summary = {
+        "count": count,
+        "avg": avg,
+        "min": min(values),
+        "max": max(values),
+        "stddev": stddev,
+        "percentiles": {},
+    }
+
+    if percentiles:
+        ordered = sorted(values)
+        summary["percentiles"] = {q: percentile_cont(ordered, q) for q in percentiles}
+    if with_mode:
+        summary["mode"] = mode(values)
+    return summary
+
+
+def percentile_key(q: float) -> str:
+    """
+    Nombre de un percentil en la respuesta: 0.9 -> 'p90', 0.999 -> 'p99.9'.
+    """
+    return f"p{q * 100:g}"
@@ -0,0 +1,268 @@
+"""
+Registro de plantillas Cypher de `Neo4jStore`.
+
+Neo4j guarda los planes compilados por texto de consulta, así que cada variación del texto
+es una compilación nueva. Las plantillas solo dejan variar lo que Cypher no permite
+parametrizar (labels, tipos de relación y llaves de búsqueda); todo lo demás va en
+parámetros:
+  - agregar/actualizar propiedades: `SET n += $props`;
+  - eliminar propiedades: el mismo `SET n += $props` con el valor en null
+    (ver `property_changes`), en lugar de un `REMOVE n.a, n.b` por cada combinación.
+
+Los nodos y relaciones se retornan como mapas (`n {.*}`, `properties(r)`, o solo las
+propiedades pedidas con `n {.a, .b}`), así el driver entrega diccionarios y no objetos
+`Node`/`Relationship` que haya que convertir.
+
+Cada identificador se valida antes de entrar al texto y el texto resultante se memoriza,
+así el conjunto de consultas distintas queda acotado por los labels y tipos del esquema.
+"""
+
+import re
+from functools import lru_cache
+from itertools import product
+from typing import Any, Dict, Optional, Sequence
+from utils.labelRegistry import LABELS
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class InvalidIdentifier(ValueError):
+    """
+    Un label, tipo de relación o propiedad que no se puede usar en una consulta.
+    """
+
+
+def _identifier_lookup() -> str:
+    # Una búsqueda por label del registro, cada una por su identificador (name/title): cada
+    # rama la resuelve la constraint de unicidad de ese label, sin recorrer todos los nodos
+    branches = [f"MATCH (n:{label} {{{{{spec.identifier}: $value}}}}) RETURN '{label}' AS label, {{projection}} AS n"
+                for label, spec in LABELS.items()]
+    return "\nUNION ALL\n".join(branches)
+
+
+def _identifiers_lookup() -> str:
+    # Igual que `_identifier_lookup` para una lista de (label, identificador): cada fila
+    # entra solo a la rama de su label, así cada elemento es una búsqueda en un índice
+    branches = [f"WITH i WITH i WHERE $items[i][0] = '{label}' "
+                f"MATCH (n:{label} {{{{{spec.identifier}: $items[i][1]}}}}) RETURN {{projection}} AS n"
+                for label, spec in LABELS.items()]
+    return ("UNWIND range(0, size($items) - 1) AS i\nCALL {{\n"
+            + "\nUNION ALL\n".join(branches)
+            + "\n}}\nRETURN i, n")
+
+
+def _numeric_aggregates(properties: bool, percentiles: bool, mode: bool) -> str:
+    # Un solo recorrido del label: UNWIND de las propiedades (o de keys(n)) y agregación por
+    # propiedad. El total sale del count store, sin recorrer nodos.
+    query = f"""
+    CALL {{{{ MATCH (n:{{label}}) RETURN count(n) AS total }}}}
+    MATCH (n:{{label}})
+    UNWIND {"$properties" if properties else "keys(n)"} AS prop
+    WITH total, prop, n[prop] AS value
+    WHERE toFloatOrNull(value) = value
+    """
+    if percentiles:
+        # Orden previo al collect para leer los percentiles por posición
+        query += "WITH total, prop, value ORDER BY value\n"
+
+    query += """
+    WITH total, prop, count(value) AS count, avg(value) AS avg, min(value) AS min,
+         max(value) AS max, stDev(value) AS stddev, collect(value) AS values
+    WITH total, prop, count, avg, min, max, stddev, values,
+         [q IN $percentiles | [pos IN [q * (size(values) - 1)] |
+             values[toInteger(floor(pos))] + (pos - floor(pos)) * (values[toInteger(ceil(pos))] - values[toInteger(floor(pos))])][0]
+         ] AS percentiles
+    """
+    if mode:
+        # La moda se agrupa sobre la lista ya recolectada, no con otro recorrido del label
+        query += """
+    UNWIND values AS value
+    WITH total, prop, count, avg, min, max, stddev, percentiles, value, count(*) AS frequency
+    ORDER BY frequency DESC, value
+    WITH total, prop, count, avg, min, max, stddev, percentiles, collect(value)[0] AS mode
+    """
+    else:
+        query += "WITH total, prop, count, avg, min, max, stddev, percentiles, null AS mode\n"
+
+    return query + "RETURN total, prop, count, avg, min, max, stddev, percentiles, mode ORDER BY prop\n"
+
+
+def numeric_aggregates_name(properties: bool, percentiles: bool, mode: bool) -> str:
+    """
+    Nombre de la variante de `numeric_aggregates`: sobre `$properties` o sobre `keys(n)`,
+    con o sin orden para los percentiles y con o sin moda.
+    """
+    return ("numeric_aggregates"
+            + ("" if properties else "_all_keys")
+            + ("_percentiles" if percentiles else "")
+            + ("_mode" if mode else ""))
+
+
+def _sample_properties(sample: str) -> str:
+    # Una fila por propiedad; los elementos sin propiedades aportan una fila con prop null
+    return sample + """
+    UNWIND sample AS n
+    UNWIND CASE WHEN size(keys(n)) = 0 THEN [null] ELSE keys(n) END AS prop
+    RETURN total, size(sample) AS sampled, endpoints, prop, count(prop) AS filled
+    """
+
+
+TEMPLATES: Dict[str, str] = {
+    "match_nodes": "MATCH (n:{label})",
+    "match_all_nodes": "MATCH (n)",
+    "find_nodes_in": """
+    MATCH (n:{label})
+    WHERE n.{key} IN $values
+    RETURN {projection} AS n
+    """,
+    "get_node": "MATCH (n:{label} {{{key}: $value}}) RETURN {projection} AS n",
+    "get_any_node": "MATCH (n {{{key}: $value}}) RETURN {projection} AS n",
+    "find_by_identifier": _identifier_lookup(),
+    "find_by_identifiers": _identifiers_lookup(),
+    "count_nodes": "MATCH (n:{label}) RETURN count(n) AS total",
+    "count_all_nodes": "MATCH (n) RETURN count(n) AS total",
+    **{numeric_aggregates_name(*variant): _numeric_aggregates(*variant)
+       for variant in product((True, False), repeat=3)},
+    "node_type_properties": """
+    CALL db.schema.nodeTypeProperties() YIELD nodeLabels, propertyName, propertyTypes
+    RETURN nodeLabels, propertyName, propertyTypes
+    """,
+    "rel_type_properties": """
+    CALL db.schema.relTypeProperties() YIELD relType, propertyName, propertyTypes
+    RETURN relType, propertyName, propertyTypes
+    """,
+    "describe_label": _sample_properties("""
+    CALL {{ MATCH (n:{label}) RETURN count(n) AS total }}
+    MATCH (n:{label})
+    WITH total, n LIMIT $sample_size
+    WITH total, collect(n) AS sample, [] AS endpoints
+    """),
+    "describe_relationship_type": _sample_properties("""
+    CALL {{ MATCH ()-[n:{rel_type}]->() RETURN count(n) AS total }}
+    MATCH (a)-[n:{rel_type}]->(b)
+    WITH total, a, n, b LIMIT $sample_size
+    WITH total, collect(n) AS sample, collect(DISTINCT [head(labels(a)), head(labels(b))]) AS endpoints
+    """),
+    "create_node": "CREATE (n:{label}) SET n += $properties RETURN n {{.*}} AS n",
+    "update_node": """
+    MATCH (n:{label} {{{key}: $value}})
+    SET n += $props
+    RETURN n {{.*}} AS n
+    """,
+    "update_nodes": """
+    MATCH (n:{label})
+    WHERE n.{key} IN $values
+    SET n += $props
+    RETURN count(n) AS updated_count
+    """,
+    "delete_nodes": """
+    MATCH (n:{label})
+    WHERE n.{key} IN $values
+    DETACH DELETE n
+    RETURN count(n) AS deleted_count
+    """,
+    "create_relationship": """
+    MATCH (a:{from_label} {{{from_key}: $from_value}}),
+          (b:{to_label} {{{to_key}: $to_value}})
+    CREATE (a)-[r:{rel_type}]->(b)
+    SET r += $properties
+    RETURN properties(r) AS r
+    """,
+    "create_relationships": """
+    UNWIND $pairs AS pair
+    MATCH (a:{from_label} {{{from_key}: pair[0]}}),
+          (b:{to_label} {{{to_key}: pair[1]}})
+    CREATE (a)-[r:{rel_type}]->(b)
+    SET r += $properties
+    RETURN count(r) AS created_count
+    """,
+    "get_relationship_properties": """
+    MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label})
+    WHERE a.{from_key} = $from_value AND b.{to_key} = $to_value
+    RETURN properties(r) AS properties
+    """,
+    "get_relationships_properties": """
+    UNWIND range(0, size($pairs) - 1) AS i
+    OPTIONAL MATCH (a:{from_label} {{{from_key}: $pairs[i][0]}})-[r:{rel_type}]->(b:{to_label} {{{to_key}: $pairs[i][1]}})
+    WITH i, head(collect(properties(r))) AS properties
+    RETURN i, properties
+    ORDER BY i
+    """,
+    "stream_relationships": """
+    MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label})
+    RETURN a.{from_key} AS from_value, b.{to_key} AS to_value, properties(r) AS properties
+    """,
+    "stream_relationship_pairs": """
+    MATCH (a:{from_label})-[:{rel_type}]->(b:{to_label})
+    RETURN a.{from_key} AS from_value, b.{to_key} AS to_value
+    """,
+    "update_relationship": """
+    MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label})
+    WHERE a.{from_key} = $from_value AND b.{to_key} = $to_value
+    SET r += $props
+    RETURN properties(r) AS r
+    """,
+    "update_relationships": """
+    UNWIND $pairs AS pair
+    MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label})
+    WHERE a.{from_key} = pair[0] AND b.{to_key} = pair[1]
+    SET r += $props
+    RETURN count(r) AS updated_count
+    """,
+    "delete_relationships": """
+    UNWIND $pairs AS pair
+    MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label})
+    WHERE a.{from_key} = pair[0] AND b.{to_key} = pair[1]
+    DELETE r
+    RETURN count(r) AS deleted_count
+    """,
+}
+
+
+def identifier(name: str) -> str:
+    if not isinstance(name, str) or not IDENTIFIER.match(name):
+        raise InvalidIdentifier(f"Identificador inválido: '{name}'.")
+    return name
+
+
+def projection(fields: Optional[Sequence[str]] = None, alias: str = "n") -> str:
+    """
+    Proyección de mapa del nodo: todas sus propiedades o solo `fields` (ordenadas, para que
+    el mismo conjunto de campos produzca el mismo texto).
+    """
+    if not fields:
+        return f"{alias} {{.*}}"
+    return f"{alias} {{" + ", ".join(f".{identifier(field)}" for field in sorted(set(fields))) + "}"
+
+
+@lru_cache(maxsize=4096)
+def _render(name: str, identifiers: tuple, fields: Optional[tuple]) -> str:
+    return TEMPLATES[name].format(projection=projection(fields), **dict(identifiers))
+
+
+def render(name: str, fields: Optional[Sequence[str]] = None, **identifiers: str) -> str:
+    """
+    Texto de la plantilla `name` con los identificadores validados. Dos llamadas con los
+    mismos identificadores retornan el mismo texto (y el mismo plan en Neo4j).
+    `fields` limita las propiedades que retornan las plantillas con `{projection}`.
+    """
+    for value in identifiers.values():
+        identifier(value)
+    return _render(name, tuple(sorted(identifiers.items())), tuple(sorted(set(fields))) if fields else None)
+
+
+def property_changes(set_props: Optional[Dict[str, Any]], remove_props: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """
+    Mapa para `SET x += $props`: las propiedades a eliminar van con valor null
+    (si una propiedad está en ambos, se elimina, igual que `SET` seguido de `REMOVE`).
+    Las llaves viajan como datos del parámetro, no en el texto de la consulta.
+    """
+    changes = dict(set_props or {})
+    for prop in remove_props or ():
+        changes[prop] = None
+    return changes
+
+
+def template_cache_info() -> Dict[str, int]:
+    info = _render.cache_info()
+    return {"distinct_queries": info.currsize, "hits": info.hits, "misses": info.misses}
@@ -0,0 +1,449 @@
+"""
+Snapshot del grafo en arreglos `.npy` que se pueden mapear en memoria.
+
+`export_snapshot(store, directory)` recorre cualquier `GraphStore` (Neo4j o en memoria) y
+escribe en `directory`:
+  - `manifest.json`: labels, relaciones, tamaños y archivos;
+  - por label, los ids de nodo implícitos 0..n-1 en el orden en que llegaron: el texto del
+    identificador (name/title) como bytes UTF-8 (`<Label>.names.npy`) más sus inicios
+    (`<Label>.offsets.npy`), y las propiedades numéricas del registro (`price`, `budget`...)
+    como float64 con NaN donde faltan (`<Label>.<prop>.npy`);
+  - por tipo de relación, la adyacencia origen×destino en CSR (`<TIPO>.indptr.npy` e
+    `<TIPO>.indices.npy`, con las columnas ordenadas en cada fila) y sus propiedades
+    numéricas alineadas con `indices` (`<TIPO>.<prop>.npy`).
+
+La exportación va por bloques de `SNAPSHOT_CHUNK_SIZE`: las relaciones se escriben primero a
+columnas temporales en disco y después se acomodan en la CSR bloque por bloque, así la
+memoria queda acotada por el bloque más un contador por nodo. El snapshot se escribe en un
+directorio aparte y se renombra al final, así nunca se lee uno a medias.
+
+`GraphSnapshot(directory)` lo abre con `np.load(..., mmap_mode="r")`: los arreglos no se
+copian, y varios procesos que abren el mismo snapshot comparten una sola copia en la caché
+de páginas del sistema operativo. `csr(rel_type)` arma la `scipy.sparse.csr_matrix` sobre
+esos mismos arreglos.
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from store.graphStore import GraphStore, RelationshipSpec
+from utils.labelRegistry import LABELS, relationship_specs
+
+# Nodos o relaciones por bloque de exportación
+SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", "100000"))
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+
+RELATIONS: Dict[str, RelationshipSpec] = relationship_specs()
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Column:
+    """
+    Columna temporal en disco a la que se agregan bloques sin conocer su largo final.
+    """
+
+    def __init__(self, path: str, dtype, fill: Any = 0):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+        self.count = 0
+        self._file = open(path, "wb")
+
+    def append(self, values):
+        array = np.asarray(values, dtype=self.dtype)
+        array.tofile(self._file)
+        self.count += len(array)
+
+    def pad(self, count: int):
+        # Rellena hasta `count` (una propiedad que apareció después de los primeros bloques)
+        if count > self.count:
+            self.append(np.full(count - self.count, self.fill, dtype=self.dtype))
+
+    def read(self) -> np.ndarray:
+        self._file.close()
+        if not self.count:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", shape=(self.count,))
+
+    def save(self, path: str, chunk_size: int):
+        # Copia a un .npy por bloques
+        source = self.read()
+        target = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype, shape=(self.count,))
+        for start in range(0, self.count, chunk_size):
+            target[start:start + chunk_size] = source[start:start + chunk_size]
+        target.flush()
+        del target, source
+
+    def remove(self):
+        self._file.close()
+        os.remove(self.path)
+
+
+class _PropertyColumns:
+    """
+    Columnas float64 de propiedades numéricas que aparecen a medida que llegan los bloques.
+    """
+
+    def __init__(self, directory: str, prefix: str):
+        self.directory = directory
+        self.prefix = prefix
+        self.columns: Dict[str, _Column] = {}
+        self.seen: Dict[str, int] = {}
+
+    def append(self, rows: Sequence[Optional[Dict[str, Any]]], offset: int, keys: Optional[Sequence[str]] = None):
+        # `offset` es cuántas filas había antes del bloque
+        found = keys or sorted({key for row in rows if row for key, value in row.items() if _numeric(value)})
+        for key in found:
+            if key not in self.columns:
+                self.columns[key] = _Column(os.path.join(self.directory, f"{self.prefix}.{key}.part"), np.float64, np.nan)
+                self.seen[key] = 0
+            column = self.columns[key]
+            column.pad(offset)
+            values = [row.get(key) if row else None for row in rows]
+            present = [value if _numeric(value) else np.nan for value in values]
+            self.seen[key] += sum(1 for value in values if _numeric(value))
+            column.append(present)
+
+    def finish(self, count: int) -> Dict[str, _Column]:
+        # Las propiedades sin ningún valor numérico (fechas, textos) no se guardan
+        for key, column in list(self.columns.items()):
+            column.pad(count)
+            if not self.seen[key]:
+                column.remove()
+                del self.columns[key]
+        return self.columns
+
+
+def _index_dtype(*sizes: int):
+    # indptr e indices con el mismo tipo, así SciPy los usa sin convertirlos (sin copiar)
+    return np.int32 if max(sizes, default=0) < np.iinfo(np.int32).max else np.int64
+
+
+async def _export_label(store: GraphStore, directory: str, label: str,
+                        chunk_size: int) -> Tuple[Dict[str, Any], Dict[Any, int]]:
+    identifier = LABELS[label].identifier
+    fields = [identifier, *LABELS[label].indexed]
+    names = _Column(os.path.join(directory, f"{label}.names.part"), np.uint8)
+    offsets = _Column(os.path.join(directory, f"{label}.offsets.part"), np.int64)
+    properties = _PropertyColumns(directory, label)
+    ids: Dict[Any, int] = {}
+    chunk: List[Dict[str, Any]] = []
+
+    def flush():
+        encoded = [str(node[identifier]).encode("utf-8") for node in chunk]
+        lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+        offsets.append(names.count + np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(encoded) else [])
+        names.append(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        properties.append(chunk, len(ids) - len(chunk), keys=LABELS[label].indexed)
+        chunk.clear()
+
+    async for node in store.stream_nodes(label, fields=fields):
+        value = node.get(identifier)
+        if value is None or value in ids:
+            continue
+        ids[value] = len(ids)
+        chunk.append(node)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    offsets.append([names.count])
+
+    files = {"names": f"{label}.names.npy", "offsets": f"{label}.offsets.npy"}
+    names.save(os.path.join(directory, files["names"]), chunk_size)
+    offsets.save(os.path.join(directory, files["offsets"]), chunk_size)
+    names.remove()
+    offsets.remove()
+    columns = properties.finish(len(ids))
+    for key, column in columns.items():
+        files[key] = f"{label}.{key}.npy"
+        column.save(os.path.join(directory, files[key]), chunk_size)
+        column.remove()
+
+    return {"identifier": identifier, "count": len(ids), "files": files, "properties": sorted(columns)}, ids
+
+
+async def _export_relationship(store: GraphStore, directory: str, spec: RelationshipSpec,
+                               from_ids: Dict[Any, int], to_ids: Dict[Any, int], chunk_size: int,
+                               with_properties: bool) -> Dict[str, Any]:
+    rel_type = spec.rel_type
+    sources = _Column(os.path.join(directory, f"{rel_type}.sources.part"), np.int64)
+    targets = _Column(os.path.join(directory, f"{rel_type}.targets.part"), np.int64)
+    properties = _PropertyColumns(directory, rel_type)
+    degree = np.zeros(len(from_ids), dtype=np.int64)
+    skipped = 0
+    chunk_sources: List[int] = []
+    chunk_targets: List[int] = []
+    chunk_properties: List[Optional[Dict[str, Any]]] = []
+
+    def flush():
+        nonlocal degree
+        if chunk_sources:
+            encoded = np.asarray(chunk_sources, dtype=np.int64)
+            degree += np.bincount(encoded, minlength=len(from_ids))
+            if with_properties:
+                properties.append(chunk_properties, sources.count)
+            sources.append(encoded)
+            targets.append(chunk_targets)
+        chunk_sources.clear()
+        chunk_targets.clear()
+        chunk_properties.clear()
+
+    # 1. Pares codificados a ids enteros, en columnas temporales
+    async for from_value, to_value, props in store.stream_relationships(spec, with_properties=with_properties):
+        source, target = from_ids.get(from_value), to_ids.get(to_value)
+        if source is None or target is None:
+            skipped += 1
+            continue
+        chunk_sources.append(source)
+        chunk_targets.append(target)
+        chunk_properties.append(props)
+        if len(chunk_sources) >= chunk_size:
+            flush()
+    flush()
+
+    # 2. Cada bloque se acomoda en su posición de la CSR con un cursor por fila
+    nnz = sources.count
+    dtype = _index_dtype(nnz, len(to_ids))
+    files = {"indptr": f"{rel_type}.indptr.npy", "indices": f"{rel_type}.indices.npy"}
+    indptr = np.lib.format.open_memmap(os.path.join(directory, files["indptr"]), mode="w+", dtype=dtype,
+                                       shape=(len(from_ids) + 1,))
+    indptr[0] = 0
+    indptr[1:] = np.cumsum(degree)
+    indices = np.lib.format.open_memmap(os.path.join(directory, files["indices"]), mode="w+", dtype=dtype, shape=(nnz,))
+    columns = properties.finish(nnz)
+    values = {}
+    for key in columns:
+        files[key] = f"{rel_type}.{key}.npy"
+        values[key] = np.lib.format.open_memmap(os.path.join(directory, files[key]), mode="w+", dtype=np.float64,
+                                                shape=(nnz,))
+
+    cursor = np.asarray(indptr[:-1], dtype=np.int64).copy()
+    source_column, target_column = sources.read(), targets.read()
+    value_columns = {key: column.read() for key, column in columns.items()}
+    for start in range(0, nnz, chunk_size):
+        block = np.asarray(source_column[start:start + chunk_size])
+        order = np.argsort(block, kind="stable")
+        ordered = block[order]
+        first = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        rank = np.arange(len(ordered)) - np.repeat(first, np.diff(np.r_[first, len(ordered)]))
+        positions = cursor[ordered] + rank
+        indices[positions] = np.asarray(target_column[start:start + chunk_size])[order]
+        for key, column in value_columns.items():
+            values[key][positions] = np.asarray(column[start:start + chunk_size])[order]
+        cursor += np.bincount(block, minlength=len(cursor))
+
+    # 3. Columnas ordenadas dentro de cada fila, por bloques de filas de ~chunk_size relaciones
+    row = 0
+    while row < len(from_ids):
+        end = int(np.searchsorted(indptr, indptr[row] + chunk_size, side="right")) - 1
+        end = min(max(end, row + 1), len(from_ids))
+        begin, finish = int(indptr[row]), int(indptr[end])
+        if finish - begin > 1:
+            segment = np.asarray(indices[begin:finish])
+            owners = np.repeat(np.arange(row, end), np.diff(np.asarray(indptr[row:end + 1])))
+            order = np.lexsort((segment, owners))
+            indices[begin:finish] = segment[order]
+            for key in values:
+                values[key][begin:finish] = np.asarray(values[key][begin:finish])[order]
+        row = end
+
+    for array in (indptr, indices, *values.values()):
+        array.flush()
+    del indptr, indices, values, source_column, target_column, value_columns
+    for column in (sources, targets, *columns.values()):
+        column.remove()
+
+    return {
+        "from_label": spec.from_label,
+        "to_label": spec.to_label,
+        "shape": [len(from_ids), len(to_ids)],
+        "nnz": nnz,
+        "skipped": skipped,
+        "files": files,
+        "properties": sorted(columns),
+    }
+
+
+async def export_snapshot(store: GraphStore, directory: str, labels: Optional[Sequence[str]] = None,
+                          rel_types: Optional[Sequence[str]] = None, chunk_size: int = SNAPSHOT_CHUNK_SIZE,
+                          with_properties: bool = True,
+                          on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Escribe el snapshot en `directory` (reemplazando el anterior) y retorna su manifiesto.
+    Sin `labels`/`rel_types` exporta todo el registro; los labels de las relaciones pedidas
+    se exportan siempre. `on_progress(nombre, entrada)` se llama al terminar cada label o relación.
+    """
+    started = time.perf_counter()
+    rel_types = list(rel_types or RELATIONS)
+    for rel_type in rel_types:
+        if rel_type not in RELATIONS:
+            raise ValueError(f"Tipo de relación desconocido: '{rel_type}'. Usa: {list(RELATIONS)}")
+    wanted = set(labels or LABELS) | {label for rel_type in rel_types
+                                      for label in (RELATIONS[rel_type].from_label, RELATIONS[rel_type].to_label)}
+    for label in wanted:
+        if label not in LABELS:
+            raise ValueError(f"Label desconocido: '{label}'. Usa: {list(LABELS)}")
+
+    staging = directory.rstrip(os.sep) + ".partial"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "labels": {},
+        "relationships": {},
+    }
+    ids: Dict[str, Dict[Any, int]] = {}
+    for label in (label for label in LABELS if label in wanted):
+        label_started = time.perf_counter()
+        manifest["labels"][label], ids[label] = await _export_label(store, staging, label, chunk_size)
+        manifest["labels"][label]["seconds"] = time.perf_counter() - label_started
+        if on_progress:
+            on_progress(label, manifest["labels"][label])
+
+    for rel_type in rel_types:
+        spec = RELATIONS[rel_type]
+        rel_started = time.perf_counter()
+        entry = await _export_relationship(store, staging, spec, ids[spec.from_label], ids[spec.to_label],
+                                           chunk_size, with_properties)
+        entry["seconds"] = time.perf_counter() - rel_started
+        manifest["relationships"][rel_type] = entry
+        if on_progress:
+            on_progress(rel_type, entry)
+
+    manifest["seconds"] = time.perf_counter() - started
+    with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, ensure_ascii=False)
+
+    previous = directory.rstrip(os.sep) + ".previous"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, previous)
+    os.rename(staging, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+class GraphSnapshot:
+    """
+    Snapshot abierto en modo de solo lectura; los arreglos se mapean en la primera lectura.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as file:
+            self.manifest = json.load(file)
+        if self.manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Versión de snapshot no soportada: {self.manifest.get('version')}")
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._ids: Dict[str, Dict[str, int]] = {}
+
+    def _array(self, file: str) -> np.ndarray:
+        array = self._arrays.get(file)
+        if array is None:
+            array = self._arrays[file] = np.load(os.path.join(self.directory, file), mmap_mode="r")
+        return array
+
+    def _label(self, label: str) -> Dict[str, Any]:
+        entry = self.manifest["labels"].get(label)
+        if entry is None:
+            raise KeyError(f"El snapshot no tiene el label '{label}'.")
+        return entry
+
+    def _relationship(self, rel_type: str) -> Dict[str, Any]:
+        entry = self.manifest["relationships"].get(rel_type)
+        if entry is None:
+            raise KeyError(f"El snapshot no tiene la relación '{rel_type}'.")
+        return entry
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self.manifest["labels"])
+
+    @property
+    def relationships(self) -> List[str]:
+        return list(self.manifest["relationships"])
+
+    # ----------------------------------------------------------------- Nodos
+
+    def node_count(self, label: str) -> int:
+        return self._label(label)["count"]
+
+    def name(self, label: str, node_id: int) -> str:
+        files = self._label(label)["files"]
+        offsets = self._array(files["offsets"])
+        return bytes(self._array(files["names"])[offsets[node_id]:offsets[node_id + 1]]).decode("utf-8")
+
+    def names(self, label: str) -> List[str]:
+        """
+        Identificadores de todos los nodos del label, en orden de id.
+        """
+        files = self._label(label)["files"]
+        blob = bytes(self._array(files["names"]))
+        offsets = self._array(files["offsets"]).tolist()
+        return [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def node_id(self, label: str, name: Any) -> Optional[int]:
+        """
+        Id del nodo con ese identificador, o None. El diccionario se arma en la primera búsqueda.
+        """
+        ids = self._ids.get(label)
+        if ids is None:
+            ids = self._ids[label] = {value: index for index, value in enumerate(self.names(label))}
+        return ids.get(str(name))
+
+    def node_property(self, label: str, prop: str) -> np.ndarray:
+        """
+        Propiedad numérica por id de nodo (NaN donde falta).
+        """
+        files = self._label(label)["files"]
+        if prop not in self._label(label)["properties"]:
+            raise KeyError(f"El snapshot no tiene la propiedad numérica '{label}.{prop}'.")
+        return self._array(files[prop])
+
+    # ----------------------------------------------------------------- Relaciones
+
+    def csr(self, rel_type: str) -> sparse.csr_matrix:
+        """
+        Adyacencia origen×destino sobre los arreglos mapeados, sin copiarlos. Los valores son
+        1 (un arreglo de paso cero, que tampoco ocupa memoria); es de solo lectura.
+        """
+        entry = self._relationship(rel_type)
+        indptr, indices = self._array(entry["files"]["indptr"]), self._array(entry["files"]["indices"])
+        data = np.broadcast_to(np.float32(1.0), (entry["nnz"],))
+        return sparse.csr_matrix((data, indices, indptr), shape=tuple(entry["shape"]), copy=False)
+
+    def edge_property(self, rel_type: str, prop: str) -> np.ndarray:
+        """
+        Propiedad numérica de cada relación, alineada con `csr(rel_type).indices`.
+        """
+        entry = self._relationship(rel_type)
+        if prop not in entry["properties"]:
+            raise KeyError(f"El snapshot no tiene la propiedad numérica '{rel_type}.{prop}'.")
+        return self._array(entry["files"][prop])
+
+    def weighted_csr(self, rel_type: str, prop: str) -> sparse.csr_matrix:
+        """
+        Como `csr` pero con `prop` como valor (NaN pasa a 0). Los pesos se copian en float32;
+        la estructura sigue siendo la mapeada.
+        """
+        entry = self._relationship(rel_type)
+        matrix = self.csr(rel_type)
+        weights = np.nan_to_num(np.asarray(self.edge_property(rel_type, prop), dtype=np.float32), nan=0.0)
+        return sparse.csr_matrix((weights, matrix.indices, matrix.indptr), shape=tuple(entry["shape"]), copy=False)
+
+    def neighbors(self, rel_type: str, node_id: int) -> np.ndarray:
+        entry = self._relationship(rel_type)
+        indptr, indices = self._array(entry["files"]["indptr"]), self._array(entry["files"]["indices"])
+        return indices[indptr[node_id]:indptr[node_id + 1]]
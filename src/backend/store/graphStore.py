@@ -0,0 +1,242 @@
+"""
+Interfaz de almacenamiento del grafo que usan los routers.
+
+Los handlers no escriben Cypher: validan la petición, llaman a un `GraphStore`
+y serializan la respuesta. Hay dos implementaciones:
+  - `Neo4jStore`: consultas Cypher contra Neo4j/Aura.
+  - `MemoryStore`: grafo en memoria con índices de diccionario, para benchmarks,
+    pruebas y para correr la API sin red.
+
+Nodos y relaciones se retornan como diccionarios planos de propiedades.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class RelationshipSpec(NamedTuple):
+    """
+    Describe un patrón `(a:from_label)-[r:rel_type]->(b:to_label)` donde los extremos
+    se identifican por `from_key` y `to_key` (name/title).
+    """
+    from_label: str
+    from_key: str
+    rel_type: str
+    to_label: str
+    to_key: str
+
+
+Pair = Tuple[Any, Any]
+
+
+class Predicate(NamedTuple):
+    """
+    Condición `n.<prop> <op> value` sobre un nodo. Operadores:
+    eq, ne, gt, gte, lt, lte, between (value = (mínimo, máximo), inclusivo), in (value = lista)
+    y starts_with.
+    """
+    prop: str
+    op: str
+    value: Any
+
+
+OPERATORS = ("eq", "ne", "gt", "gte", "lt", "lte", "between", "in", "starts_with")
+
+
+class GraphStore(ABC):
+
+    async def close(self):
+        """
+        Libera los recursos del store (conexiones, archivos, etc.).
+        """
+
+    # ---------------------------------------------------------------- Nodos
+
+    @abstractmethod
+    async def find_nodes(self, label: Optional[str], predicates: Sequence[Predicate] = (),
+                         order_by: Optional[str] = None, descending: bool = False,
+                         limit: int = 100, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Nodos del label (o de todos si es None) que cumplen todos los `predicates`.
+        Con `order_by` retorna los primeros `limit` según esa propiedad (top-k); en ese caso
+        solo se consideran los nodos que la tienen.
+        Con `fields` cada nodo trae solo esas propiedades (en null si no las tiene), igual
+        que la proyección `n {.a, .b}` de Cypher; lo mismo aplica a los demás métodos de lectura.
+        """
+
+    @abstractmethod
+    async def page_nodes(self, label: Optional[str], predicates: Sequence[Predicate] = (),
+                         order_key: Optional[str] = None, after: Any = None, page_size: int = 100,
+                         fields: Optional[Sequence[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """
+        Una página de nodos (keyset): ordenados por la propiedad `order_key`, o por element id
+        si es None, empezando después de `after`.
+        Retorna (nodos, llave del último nodo) — la llave es None si no hay más páginas.
+        """
+
+    @abstractmethod
+    def stream_nodes(self, label: Optional[str], predicates: Sequence[Predicate] = (),
+                     fields: Optional[Sequence[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Itera los nodos a medida que llegan, sin materializar el resultado completo.
+        """
+
+    @abstractmethod
+    async def find_nodes_in(self, label: str, prop: str, values: Sequence[Any],
+                            fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Nodos del label cuya propiedad `prop` esté en `values`.
+        """
+
+    @abstractmethod
+    async def get_node(self, label: Optional[str], key: str, value: Any,
+                       fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Un nodo identificado por `key = value`, o None si no existe.
+        """
+
+    @abstractmethod
+    async def find_by_identifier(self, value: Any, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Nodos de cualquier label del registro (`utils.labelRegistry`) cuyo identificador
+        (name, o title para Review) sea `value`, como `{"label": str, "node": dict}`.
+        Si el valor se repite en varios labels, retorna uno por label.
+        """
+
+    @abstractmethod
+    async def get_nodes_by_identifiers(self, items: Sequence[Tuple[str, Any]],
+                                       fields: Optional[Sequence[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Un nodo por cada `(label, identificador)` de `items` (labels del registro), en el mismo
+        orden y con None donde no existe, con una sola consulta.
+        """
+
+    @abstractmethod
+    async def count_nodes(self, label: Optional[str] = None) -> int:
+        """
+        Total de nodos del label (o de todo el grafo).
+        """
+
+    @abstractmethod
+    async def numeric_aggregates(self, label: str, properties: Optional[Sequence[str]] = None,
+                                 percentiles: Sequence[float] = (), with_mode: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Estadísticas de las propiedades numéricas del label en una sola pasada
+        (ver `store.aggregates.summarize`), solo de `properties` si se indican:
+        `{"total": int, "stats": {prop: {"count", "avg", "min", "max", "stddev", "percentiles", "mode"}}}`.
+        Retorna None si el label no tiene nodos.
+        """
+
+    @abstractmethod
+    async def create_node(self, label: str, properties: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Crea un nodo y retorna sus propiedades.
+        """
+
+    @abstractmethod
+    async def update_node(self, label: str, key: str, value: Any,
+                          set_props: Optional[Dict[str, Any]] = None,
+                          remove_props: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Agrega/actualiza (`set_props`) o elimina (`remove_props`) propiedades de un nodo.
+        Retorna el nodo actualizado o None si no existe.
+        """
+
+    @abstractmethod
+    async def update_nodes(self, label: str, key: str, values: Sequence[Any],
+                           set_props: Optional[Dict[str, Any]] = None,
+                           remove_props: Optional[Sequence[str]] = None) -> int:
+        """
+        Igual que `update_node` para varios nodos. Retorna cuántos se actualizaron.
+        """
+
+    @abstractmethod
+    async def delete_nodes(self, label: str, key: str, values: Sequence[Any]) -> int:
+        """
+        DETACH DELETE de los nodos indicados. Retorna cuántos se eliminaron.
+        """
+
+    # --------------------------------------------------------------- Esquema
+
+    @abstractmethod
+    async def describe_schema(self, sample_size: int = 1000) -> Dict[str, Any]:
+        """
+        Labels y tipos de relación con su total y sus propiedades observadas:
+        `{"labels": {label: {"count", "properties": {prop: {"types", "fill_rate"}}}},
+          "relationship_types": {tipo: {"count", "endpoints", "properties": {...}}}}`.
+        `endpoints` son los pares [label origen, label destino] vistos. El fill rate puede
+        calcularse sobre una muestra de `sample_size` elementos.
+        """
+
+    @abstractmethod
+    async def provision_indexes(self) -> List[Dict[str, Any]]:
+        """
+        Crea los índices/constraints de `utils.labelRegistry` (idempotente).
+        Retorna lo creado: `{"name", "label", "property", "kind"}`.
+        """
+
+    @abstractmethod
+    async def index_status(self) -> List[Dict[str, Any]]:
+        """
+        Estado de los índices: `{"name", "state", "populationPercent", ...}`.
+        """
+
+    # ------------------------------------------------------------ Relaciones
+
+    @abstractmethod
+    async def create_relationship(self, spec: RelationshipSpec, from_value: Any, to_value: Any,
+                                  properties: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Crea la relación entre los dos nodos. Retorna None si alguno no existe.
+        """
+
+    @abstractmethod
+    async def create_relationships(self, spec: RelationshipSpec, pairs: Sequence[Pair], properties: Dict[str, Any]) -> int:
+        """
+        Igual que `create_relationship` para cada par (from_value, to_value), con una sola
+        consulta y las mismas propiedades. Retorna cuántas relaciones se crearon.
+        """
+
+    @abstractmethod
+    async def get_relationship_properties(self, spec: RelationshipSpec, from_value: Any, to_value: Any) -> Optional[Dict[str, Any]]:
+        """
+        Propiedades de la relación entre los dos nodos, o None si no existe.
+        """
+
+    @abstractmethod
+    async def get_relationships_properties(self, spec: RelationshipSpec, pairs: Sequence[Pair]) -> List[Optional[Dict[str, Any]]]:
+        """
+        `get_relationship_properties` de cada par, en el mismo orden que `pairs`
+        (None en los pares sin relación), con una sola consulta.
+        """
+
+    @abstractmethod
+    def stream_relationships(self, spec: RelationshipSpec, with_properties: bool = True) -> AsyncIterator[Tuple[Any, Any, Optional[Dict[str, Any]]]]:
+        """
+        Todas las relaciones del tipo entre los dos labels como `(from_value, to_value, properties)`,
+        a medida que llegan. Con `with_properties=False` las propiedades vienen en None.
+        """
+
+    @abstractmethod
+    async def update_relationship(self, spec: RelationshipSpec, from_value: Any, to_value: Any,
+                                  set_props: Optional[Dict[str, Any]] = None,
+                                  remove_props: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Agrega/actualiza o elimina propiedades de una relación.
+        Retorna la relación actualizada o None si no existe.
+        """
+
+    @abstractmethod
+    async def update_relationships(self, spec: RelationshipSpec, pairs: Sequence[Pair],
+                                   set_props: Optional[Dict[str, Any]] = None,
+                                   remove_props: Optional[Sequence[str]] = None) -> int:
+        """
+        Igual que `update_relationship` para cada par (from_value, to_value).
+        Retorna cuántas relaciones se actualizaron.
+        """
+
+    @abstractmethod
+    async def delete_relationships(self, spec: RelationshipSpec, pairs: Sequence[Pair]) -> int:
+        """
+        Elimina las relaciones de cada par. Retorna cuántas se eliminaron.
+        """
@@ -0,0 +1,525 @@
+"""
+Implementación en memoria de `GraphStore`.
+
+Guarda el grafo en diccionarios dentro del proceso, sin red ni Neo4j:
+  - `_nodes` / `_rels`: id -> nodo/relación.
+  - `_by_label`: label -> ids de nodos (en orden de inserción).
+  - `_indexes`: (label, propiedad) -> valor -> ids. Se construyen al primer uso de
+    cada propiedad y se mantienen en cada escritura, así que las búsquedas por
+    name/title o por cualquier propiedad filtrada son lookups O(1).
+  - `_rel_index`: (id origen, tipo, id destino) -> ids de relaciones, para resolver
+    los pares de `UNWIND $pairs` sin recorrer relaciones.
+  - `_incident`: id de nodo -> ids de relaciones que lo tocan, para DETACH DELETE.
+  - `_sorted`: (label, propiedad) -> llaves ordenadas, para la paginación por keyset
+    con `bisect`. Se reconstruye tras escribir en el label.
+
+Sirve para medir la capa FastAPI (validación, serialización, routing) de forma aislada
+y para correr la API en una laptop sin conexión. Con `MEMORY_STORE_CSV_DIR` se carga
+desde los mismos CSV que genera `utils/createCSV.py`, según `utils.labelRegistry`.
+"""
+
+import asyncio
+import datetime
+import heapq
+import math
+import os
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from store.aggregates import summarize
+from store.graphStore import GraphStore, Pair, Predicate, RelationshipSpec
+from store.nodeCache import project
+from store.schemaCatalog import value_type
+from utils.labelRegistry import LABELS, RELATION_FILES
+
+class _Node:
+    __slots__ = ("id", "label", "props")
+
+    def __init__(self, node_id: int, label: str, props: Dict[str, Any]):
+        self.id = node_id
+        self.label = label
+        self.props = props
+
+
+class _Rel:
+    __slots__ = ("id", "type", "start", "end", "props")
+
+    def __init__(self, rel_id: int, rel_type: str, start: int, end: int, props: Dict[str, Any]):
+        self.id = rel_id
+        self.type = rel_type
+        self.start = start
+        self.end = end
+        self.props = props
+
+
+def _index_key(value: Any) -> Any:
+    """
+    Llave hashable con la semántica de igualdad de Cypher: las listas se comparan
+    por contenido y `true` no es igual a `1`.
+    """
+    if isinstance(value, bool):
+        return (bool, value)
+    if isinstance(value, list):
+        return (list, tuple(_index_key(v) for v in value))
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _order_key(value: Any) -> Any:
+    """
+    Llave comparable para ORDER BY: agrupa por tipo para no comparar str con int.
+    Retorna None para valores que no se pueden ordenar (listas, mapas).
+    """
+    if _is_number(value):
+        return ("number", value)
+    if isinstance(value, (str, bool, datetime.date)):
+        return (type(value).__name__, value)
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _compare(left: Any, right: Any) -> Optional[int]:
+    """
+    -1/0/1 como las comparaciones de Cypher, o None si los tipos no se pueden comparar.
+    """
+    left_key, right_key = _order_key(left), _order_key(right)
+    if left_key is None or right_key is None or left_key[0] != right_key[0]:
+        return None
+    return (left_key > right_key) - (left_key < right_key)
+
+
+def _matches(props: Dict[str, Any], predicate: Predicate) -> bool:
+    value = props.get(predicate.prop)
+    if value is None:
+        return False
+    op = predicate.op
+    if op == "eq":
+        return _index_key(value) == _index_key(predicate.value)
+    if op == "ne":
+        return _index_key(value) != _index_key(predicate.value)
+    if op == "in":
+        return _index_key(value) in {_index_key(item) for item in predicate.value}
+    if op == "starts_with":
+        return isinstance(value, str) and value.startswith(predicate.value)
+    if op == "between":
+        low, high = _compare(value, predicate.value[0]), _compare(value, predicate.value[1])
+        return low is not None and high is not None and low >= 0 and high <= 0
+
+    comparison = _compare(value, predicate.value)
+    if comparison is None:
+        return False
+    return {"gt": comparison > 0, "gte": comparison >= 0, "lt": comparison < 0, "lte": comparison <= 0}[op]
+
+
+def _apply(props: Dict[str, Any], set_props: Optional[Dict[str, Any]], remove_props: Optional[Sequence[str]]):
+    if set_props:
+        for key, value in set_props.items():
+            # Igual que `SET n += $props`: asignar null elimina la propiedad
+            if value is None:
+                props.pop(key, None)
+            else:
+                props[key] = value
+    if remove_props:
+        for key in remove_props:
+            props.pop(key, None)
+
+
+class MemoryStore(GraphStore):
+
+    def __init__(self):
+        self._ids = count()
+        self._nodes: Dict[int, _Node] = {}
+        self._rels: Dict[int, _Rel] = {}
+        self._by_label: Dict[str, Dict[int, None]] = defaultdict(dict)
+        self._indexes: Dict[Tuple[str, str], Dict[Any, Set[int]]] = {}
+        self._rel_index: Dict[Tuple[int, str, int], Dict[int, None]] = defaultdict(dict)
+        self._incident: Dict[int, Set[int]] = defaultdict(set)
+        self._sorted: Dict[Tuple[str, str], Tuple[List[Any], List[int]]] = {}
+
+    # --------------------------------------------------------------- Índices
+
+    def _index(self, label: str, prop: str) -> Dict[Any, Set[int]]:
+        index = self._indexes.get((label, prop))
+        if index is None:
+            index = defaultdict(set)
+            for node_id in self._by_label.get(label, ()):
+                value = self._nodes[node_id].props.get(prop)
+                if value is not None:
+                    index[_index_key(value)].add(node_id)
+            self._indexes[(label, prop)] = index
+        return index
+
+    def _lookup(self, label: Optional[str], prop: str, value: Any) -> List[int]:
+        labels = [label] if label else list(self._by_label)
+        ids = []
+        key = _index_key(value)
+        for current in labels:
+            ids.extend(self._index(current, prop).get(key, ()))
+        return sorted(ids)
+
+    def _candidates(self, label: Optional[str], predicates: Sequence[Predicate]) -> Iterable[int]:
+        """
+        Ids que pueden cumplir los predicados: usa el índice de la primera igualdad (o `in`)
+        y si no hay, recorre el label. El resto de predicados se revisa con `_matches`.
+        """
+        for predicate in predicates:
+            if predicate.op == "eq":
+                return self._lookup(label, predicate.prop, predicate.value)
+            if predicate.op == "in":
+                return sorted({node_id for value in predicate.value for node_id in self._lookup(label, predicate.prop, value)})
+        return list(self._by_label.get(label, ())) if label else list(self._nodes)
+
+    def _sorted_index(self, label: str, prop: str) -> Tuple[List[Any], List[int]]:
+        cached = self._sorted.get((label, prop))
+        if cached is None:
+            entries = []
+            for node_id in self._by_label.get(label, ()):
+                key = _order_key(self._nodes[node_id].props.get(prop))
+                if key is not None:
+                    entries.append((key, node_id))
+            entries.sort()
+            cached = ([key for key, _ in entries], [node_id for _, node_id in entries])
+            self._sorted[(label, prop)] = cached
+        return cached
+
+    def _invalidate_sorted(self, label: str):
+        for key in [key for key in self._sorted if key[0] == label]:
+            del self._sorted[key]
+
+    def _unindex(self, node: _Node):
+        self._invalidate_sorted(node.label)
+        for (label, prop), index in self._indexes.items():
+            if label == node.label and prop in node.props:
+                bucket = index.get(_index_key(node.props[prop]))
+                if bucket:
+                    bucket.discard(node.id)
+
+    def _reindex(self, node: _Node):
+        self._invalidate_sorted(node.label)
+        for (label, prop), index in self._indexes.items():
+            if label == node.label and prop in node.props:
+                index[_index_key(node.props[prop])].add(node.id)
+
+    def _update_props(self, node: _Node, set_props, remove_props):
+        self._unindex(node)
+        _apply(node.props, set_props, remove_props)
+        self._reindex(node)
+
+    def _matching_rels(self, spec: RelationshipSpec, from_value: Any, to_value: Any) -> List[_Rel]:
+        rels = []
+        for start in self._lookup(spec.from_label, spec.from_key, from_value):
+            for end in self._lookup(spec.to_label, spec.to_key, to_value):
+                rels.extend(self._rels[rel_id] for rel_id in self._rel_index.get((start, spec.rel_type, end), ()))
+        return rels
+
+    # ----------------------------------------------------------------- Carga
+
+    def add_node(self, label: str, properties: Optional[Dict[str, Any]] = None) -> _Node:
+        node = _Node(next(self._ids), label, {k: v for k, v in (properties or {}).items() if v is not None})
+        self._nodes[node.id] = node
+        self._by_label[label][node.id] = None
+        self._reindex(node)
+        return node
+
+    def add_relationship(self, rel_type: str, start: int, end: int, properties: Optional[Dict[str, Any]] = None) -> _Rel:
+        rel = _Rel(next(self._ids), rel_type, start, end, {k: v for k, v in (properties or {}).items() if v is not None})
+        self._rels[rel.id] = rel
+        self._rel_index[(start, rel_type, end)][rel.id] = None
+        self._incident[start].add(rel.id)
+        self._incident[end].add(rel.id)
+        return rel
+
+    def load_csv_folder(self, folder: str):
+        """
+        Carga los CSV de `utils/createCSV.py` con la misma semántica que `utils/csvToAura.py`
+        (MERGE de nodos por name/title y de relaciones por par).
+        """
+        import pandas as pd
+
+        def records(df) -> Iterable[Dict[str, Any]]:
+            for row in df.to_dict(orient="records"):
+                yield {k: v for k, v in row.items() if not (isinstance(v, float) and math.isnan(v))}
+
+        for label, spec in LABELS.items():
+            path = os.path.join(folder, spec.csv_file)
+            if not os.path.exists(path):
+                continue
+            key = spec.identifier
+            for row in records(pd.read_csv(path)):
+                existing = self._lookup(label, key, row.get(key))
+                if existing:
+                    self._update_props(self._nodes[existing[0]], row, None)
+                else:
+                    self.add_node(label, row)
+
+        for file, (from_label, to_label, rel_type, from_key, to_key) in RELATION_FILES.items():
+            path = os.path.join(folder, file)
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path)
+            source, target = df.columns[0], df.columns[1]
+            df = df.dropna(subset=[source, target])
+            for row in records(df):
+                properties = {k: v for k, v in row.items() if k not in (source, target)}
+                for start in self._lookup(from_label, from_key, row[source]):
+                    for end in self._lookup(to_label, to_key, row[target]):
+                        existing = self._rel_index.get((start, rel_type, end))
+                        if existing:
+                            _apply(self._rels[next(iter(existing))].props, properties, None)
+                        else:
+                            self.add_relationship(rel_type, start, end, properties)
+
+    # ---------------------------------------------------------------- Nodos
+
+    async def find_nodes(self, label, predicates=(), order_by=None, descending=False, limit=100, fields=None):
+        matching = (
+            self._nodes[node_id] for node_id in self._candidates(label, predicates)
+            if all(_matches(self._nodes[node_id].props, predicate) for predicate in predicates)
+        )
+
+        if order_by:
+            keyed = ((_order_key(node.props.get(order_by)), node.id) for node in matching)
+            keyed = [item for item in keyed if item[0] is not None]
+            top = heapq.nlargest(limit, keyed) if descending else heapq.nsmallest(limit, keyed)
+            return [project(self._nodes[node_id].props, fields) for _, node_id in top]
+
+        nodes = []
+        for node in matching:
+            if len(nodes) >= limit:
+                break
+            nodes.append(project(node.props, fields))
+        return nodes
+
+    async def page_nodes(self, label, predicates=(), order_key=None, after=None, page_size=100, fields=None):
+        if order_key:
+            if not label:
+                raise ValueError("La paginación por propiedad requiere un label")
+            keys, ids = self._sorted_index(label, order_key)
+            start = bisect_right(keys, _order_key(after)) if after is not None else 0
+            sort_keys = [key[1] for key in keys]
+        else:
+            ids = list(self._by_label.get(label, ())) if label else list(self._nodes)
+            start = bisect_right(ids, after) if after is not None else 0
+            sort_keys = ids
+
+        nodes, last = [], None
+        for position in range(start, len(ids)):
+            node = self._nodes[ids[position]]
+            if not all(_matches(node.props, predicate) for predicate in predicates):
+                continue
+            if len(nodes) == page_size:
+                return nodes, last
+            nodes.append(project(node.props, fields))
+            last = sort_keys[position]
+        return nodes, None
+
+    async def stream_nodes(self, label, predicates=(), fields=None):
+        ids = self._candidates(label, predicates)
+
+        for position, node_id in enumerate(ids):
+            node = self._nodes.get(node_id)
+            if node is not None and all(_matches(node.props, predicate) for predicate in predicates):
+                yield project(node.props, fields)
+            if position % 1000 == 999:
+                # Cede el event loop para no bloquear otras peticiones durante exportaciones grandes
+                await asyncio.sleep(0)
+
+    async def find_nodes_in(self, label, prop, values, fields=None):
+        ids = set()
+        for value in values:
+            ids.update(self._lookup(label, prop, value))
+        return [project(self._nodes[node_id].props, fields) for node_id in sorted(ids)]
+
+    async def get_node(self, label, key, value, fields=None):
+        ids = self._lookup(label, key, value)
+        return project(self._nodes[ids[0]].props, fields) if ids else None
+
+    async def find_by_identifier(self, value, fields=None):
+        return [{"label": label, "node": project(self._nodes[node_id].props, fields)}
+                for label, spec in LABELS.items()
+                for node_id in self._lookup(label, spec.identifier, value)]
+
+    async def get_nodes_by_identifiers(self, items, fields=None):
+        nodes = []
+        for label, value in items:
+            ids = self._lookup(label, LABELS[label].identifier, value) if label in LABELS else []
+            nodes.append(project(self._nodes[ids[0]].props, fields) if ids else None)
+        return nodes
+
+    async def count_nodes(self, label=None):
+        return len(self._by_label.get(label, ())) if label else len(self._nodes)
+
+    async def numeric_aggregates(self, label, properties=None, percentiles=(), with_mode=True):
+        ids = self._by_label.get(label)
+        if not ids:
+            return None
+
+        wanted = set(properties) if properties else None
+        columns: Dict[str, List[float]] = defaultdict(list)
+        for node_id in ids:
+            for key, value in self._nodes[node_id].props.items():
+                if (wanted is None or key in wanted) and _is_number(value):
+                    columns[key].append(value)
+
+        stats = {prop: summarize(column, percentiles, with_mode) for prop, column in columns.items()}
+        return {"total": len(ids), "stats": stats}
+
+    async def create_node(self, label, properties=None):
+        return dict(self.add_node(label, properties).props)
+
+    async def update_node(self, label, key, value, set_props=None, remove_props=None):
+        ids = self._lookup(label, key, value)
+        if not ids:
+            return None
+        for node_id in ids:
+            self._update_props(self._nodes[node_id], set_props, remove_props)
+        return dict(self._nodes[ids[0]].props)
+
+    async def update_nodes(self, label, key, values, set_props=None, remove_props=None):
+        # Igual que `WHERE n.key IN $values`: cada nodo se cuenta una sola vez
+        ids = {node_id for value in values for node_id in self._lookup(label, key, value)}
+        for node_id in ids:
+            self._update_props(self._nodes[node_id], set_props, remove_props)
+        return len(ids)
+
+    async def delete_nodes(self, label, key, values):
+        deleted = 0
+        for value in values:
+            for node_id in self._lookup(label, key, value):
+                for rel_id in list(self._incident.get(node_id, ())):
+                    self._remove_rel(self._rels[rel_id])
+                node = self._nodes.pop(node_id)
+                self._unindex(node)
+                del self._by_label[node.label][node_id]
+                self._incident.pop(node_id, None)
+                deleted += 1
+        return deleted
+
+    # --------------------------------------------------------------- Esquema
+
+    async def describe_schema(self, sample_size=1000):
+        # En memoria se recorre todo el grafo: los conteos y fill rates son exactos
+        def describe(elements) -> Dict[str, Any]:
+            total, types, filled = 0, defaultdict(set), defaultdict(int)
+            for element in elements:
+                total += 1
+                for key, value in element.props.items():
+                    types[key].add(value_type(value))
+                    filled[key] += 1
+            properties = {
+                key: {"types": sorted(types[key]), "fill_rate": filled[key] / total}
+                for key in sorted(types)
+            }
+            return {"count": total, "properties": properties}
+
+        labels = {
+            label: describe(self._nodes[node_id] for node_id in ids)
+            for label, ids in sorted(self._by_label.items()) if ids
+        }
+
+        by_type: Dict[str, List[_Rel]] = defaultdict(list)
+        for rel in self._rels.values():
+            by_type[rel.type].append(rel)
+
+        relationship_types = {}
+        for rel_type, rels in sorted(by_type.items()):
+            described = describe(rels)
+            endpoints = {(self._nodes[rel.start].label, self._nodes[rel.end].label) for rel in rels}
+            described["endpoints"] = [list(pair) for pair in sorted(endpoints)]
+            relationship_types[rel_type] = described
+
+        return {"labels": labels, "relationship_types": relationship_types}
+
+    async def provision_indexes(self):
+        # Equivale a construir por adelantado los índices de diccionario que se crean al primer uso
+        results = []
+        for label, spec in LABELS.items():
+            self._index(label, spec.identifier)
+            self._sorted_index(label, spec.identifier)
+            results.append({"name": f"{label.lower()}_{spec.identifier}_unique", "label": label,
+                            "property": spec.identifier, "kind": "range (sin unicidad en memoria)"})
+            for prop in spec.indexed:
+                self._index(label, prop)
+                results.append({"name": f"{label.lower()}_{prop}_range", "label": label, "property": prop, "kind": "range"})
+        return results
+
+    async def index_status(self):
+        return [
+            {"name": f"{label.lower()}_{prop}", "type": "HASH", "labelsOrTypes": [label], "properties": [prop],
+             "state": "ONLINE", "populationPercent": 100.0, "owningConstraint": None}
+            for label, prop in sorted(self._indexes)
+        ]
+
+    # ------------------------------------------------------------ Relaciones
+
+    def _remove_rel(self, rel: _Rel):
+        del self._rels[rel.id]
+        bucket = self._rel_index[(rel.start, rel.type, rel.end)]
+        del bucket[rel.id]
+        if not bucket:
+            del self._rel_index[(rel.start, rel.type, rel.end)]
+        self._incident[rel.start].discard(rel.id)
+        self._incident[rel.end].discard(rel.id)
+
+    async def create_relationship(self, spec, from_value, to_value, properties):
+        starts = self._lookup(spec.from_label, spec.from_key, from_value)
+        ends = self._lookup(spec.to_label, spec.to_key, to_value)
+        created = None
+        for start in starts:
+            for end in ends:
+                created = self.add_relationship(spec.rel_type, start, end, properties)
+        return dict(created.props) if created else None
+
+    async def create_relationships(self, spec, pairs, properties):
+        created = 0
+        for from_value, to_value in pairs:
+            for start in self._lookup(spec.from_label, spec.from_key, from_value):
+                for end in self._lookup(spec.to_label, spec.to_key, to_value):
+                    self.add_relationship(spec.rel_type, start, end, properties)
+                    created += 1
+        return created
+
+    async def get_relationship_properties(self, spec, from_value, to_value):
+        rels = self._matching_rels(spec, from_value, to_value)
+        return dict(rels[0].props) if rels else None
+
+    async def get_relationships_properties(self, spec, pairs):
+        return [await self.get_relationship_properties(spec, from_value, to_value) for from_value, to_value in pairs]
+
+    async def stream_relationships(self, spec, with_properties=True):
+        for position, rel in enumerate(list(self._rels.values())):
+            if rel.id not in self._rels:
+                continue
+            start, end = self._nodes[rel.start], self._nodes[rel.end]
+            if rel.type == spec.rel_type and start.label == spec.from_label and end.label == spec.to_label:
+                yield (start.props.get(spec.from_key), end.props.get(spec.to_key),
+                       dict(rel.props) if with_properties else None)
+            if position % 1000 == 999:
+                await asyncio.sleep(0)
+
+    async def update_relationship(self, spec, from_value, to_value, set_props=None, remove_props=None):
+        rels = self._matching_rels(spec, from_value, to_value)
+        for rel in rels:
+            _apply(rel.props, set_props, remove_props)
+        return dict(rels[0].props) if rels else None
+
+    async def update_relationships(self, spec, pairs: Sequence[Pair], set_props=None, remove_props=None):
+        updated = 0
+        for from_value, to_value in pairs:
+            for rel in self._matching_rels(spec, from_value, to_value):
+                _apply(rel.props, set_props, remove_props)
+                updated += 1
+        return updated
+
+    async def delete_relationships(self, spec, pairs):
+        deleted = 0
+        for from_value, to_value in pairs:
+            for rel in self._matching_rels(spec, from_value, to_value):
+                self._remove_rel(rel)
+                deleted += 1
+        return deleted
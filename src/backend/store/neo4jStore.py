@@ -0,0 +1,281 @@
+"""
+Implementación de `GraphStore` sobre Neo4j.
+
+Funciona con el driver síncrono o asíncrono: las consultas pasan por `utils.queryRunner`.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from neo4j import AsyncDriver
+from store.cypherTemplates import identifier, numeric_aggregates_name, projection, property_changes, render
+from store.graphStore import GraphStore, Pair, Predicate
+from utils import indexProvisioning
+from utils.queryRunner import fetch_all, fetch_single, stream
+
+
+_COMPARISONS = {"eq": "=", "ne": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _match_nodes(label: Optional[str]) -> str:
+    return render("match_nodes", label=label) if label else render("match_all_nodes")
+
+
+def _predicate_clauses(predicates: Sequence[Predicate]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Traduce los predicados a condiciones sobre `n` con parámetros `$f0, $f1, ...`: la consulta
+    solo depende de las propiedades y operadores, no de los valores, así el plan se reutiliza
+    y los rangos pueden resolverse con los índices de rango.
+    """
+    clauses, parameters = [], {}
+    for position, predicate in enumerate(predicates):
+        name, target = f"f{position}", f"n.{identifier(predicate.prop)}"
+        if predicate.op == "between":
+            clauses.append(f"{target} >= ${name}_min AND {target} <= ${name}_max")
+            parameters[f"{name}_min"], parameters[f"{name}_max"] = predicate.value
+            continue
+        if predicate.op == "in":
+            clauses.append(f"{target} IN ${name}")
+        elif predicate.op == "starts_with":
+            clauses.append(f"{target} STARTS WITH ${name}")
+        else:
+            clauses.append(f"{target} {_COMPARISONS[predicate.op]} ${name}")
+        parameters[name] = predicate.value
+    return clauses, parameters
+
+
+class Neo4jStore(GraphStore):
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def close(self):
+        if isinstance(self.driver, AsyncDriver):
+            await self.driver.close()
+        else:
+            self.driver.close()
+
+    # ---------------------------------------------------------------- Nodos
+
+    async def find_nodes(self, label, predicates=(), order_by=None, descending=False, limit=100, fields=None):
+        conditions, parameters = _predicate_clauses(predicates)
+        if order_by:
+            conditions.append(f"n.{identifier(order_by)} IS NOT NULL")
+
+        query = _match_nodes(label)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        # Se ordena sobre el nodo antes de proyectar: el alias `n` del mapa proyectado
+        # taparía la propiedad si no está entre los `fields`
+        query += " WITH n"
+        if order_by:
+            query += f" ORDER BY n.{identifier(order_by)}" + (" DESC" if descending else "")
+        query += f" LIMIT $limit RETURN {projection(fields)} AS n"
+
+        records = await fetch_all(self.driver, query, limit=limit, **parameters)
+        return [record["n"] for record in records]
+
+    async def page_nodes(self, label, predicates=(), order_key=None, after=None, page_size=100, fields=None):
+        sort_expr = f"n.{identifier(order_key)}" if order_key else "elementId(n)"
+
+        conditions, parameters = _predicate_clauses(predicates)
+        if after is not None:
+            conditions.append(f"{sort_expr} > $after")
+        elif order_key:
+            # Con el predicate sobre la propiedad el planner puede leer el orden del índice
+            conditions.append(f"{sort_expr} IS NOT NULL")
+
+        query = _match_nodes(label)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" RETURN {projection(fields)} AS n, {sort_expr} AS sort_key ORDER BY sort_key LIMIT $limit"
+
+        # Se pide un registro extra para saber si hay otra página
+        records = await fetch_all(self.driver, query, after=after, limit=page_size + 1, **parameters)
+        has_more = len(records) > page_size
+        records = records[:page_size]
+
+        nodes = [record["n"] for record in records]
+        return nodes, (records[-1]["sort_key"] if has_more else None)
+
+    async def stream_nodes(self, label, predicates=(), fields=None):
+        conditions, parameters = _predicate_clauses(predicates)
+        query = _match_nodes(label)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" RETURN {projection(fields)} AS n"
+
+        async for record in stream(self.driver, query, **parameters):
+            yield record["n"]
+
+    async def find_nodes_in(self, label, prop, values, fields=None):
+        query = render("find_nodes_in", fields, label=label, key=prop)
+        records = await fetch_all(self.driver, query, values=list(values))
+        return [record["n"] for record in records]
+
+    async def get_node(self, label, key, value, fields=None):
+        query = render("get_node", fields, label=label, key=key) if label else render("get_any_node", fields, key=key)
+        record = await fetch_single(self.driver, query, value=value)
+        return record["n"] if record else None
+
+    async def find_by_identifier(self, value, fields=None):
+        records = await fetch_all(self.driver, render("find_by_identifier", fields), value=value)
+        return [{"label": record["label"], "node": record["n"]} for record in records]
+
+    async def get_nodes_by_identifiers(self, items, fields=None):
+        if not items:
+            return []
+        records = await fetch_all(self.driver, render("find_by_identifiers", fields),
+                                  items=[[label, value] for label, value in items])
+        nodes = [None] * len(items)
+        for record in records:
+            if nodes[record["i"]] is None:
+                nodes[record["i"]] = record["n"]
+        return nodes
+
+    async def count_nodes(self, label=None):
+        query = render("count_nodes", label=label) if label else render("count_all_nodes")
+        record = await fetch_single(self.driver, query)
+        return record["total"]
+
+    async def numeric_aggregates(self, label, properties=None, percentiles=(), with_mode=True):
+        query = render(numeric_aggregates_name(bool(properties), bool(percentiles), with_mode), label=label)
+        records = await fetch_all(self.driver, query, properties=list(properties or []), percentiles=list(percentiles))
+        if not records:
+            total = await self.count_nodes(label)
+            return {"total": total, "stats": {}} if total else None
+
+        stats = {}
+        for record in records:
+            stats[record["prop"]] = {
+                "count": record["count"],
+                "avg": record["avg"],
+                "min": record["min"],
+                "max": record["max"],
+                "stddev": record["stddev"],
+                "percentiles": dict(zip(percentiles, record["percentiles"])),
+            }
+            if with_mode:
+                stats[record["prop"]]["mode"] = record["mode"]
+
+        return {"total": records[0]["total"], "stats": stats}
+
+    async def create_node(self, label, properties=None):
+        query = render("create_node", label=label)
+        record = await fetch_single(self.driver, query, properties=properties or {})
+        return record["n"] if record else None
+
+    async def update_node(self, label, key, value, set_props=None, remove_props=None):
+        query = render("update_node", label=label, key=key)
+        record = await fetch_single(self.driver, query, value=value, props=property_changes(set_props, remove_props))
+        return record["n"] if record else None
+
+    async def update_nodes(self, label, key, values, set_props=None, remove_props=None):
+        query = render("update_nodes", label=label, key=key)
+        record = await fetch_single(self.driver, query, values=list(values), props=property_changes(set_props, remove_props))
+        return record["updated_count"]
+
+    async def delete_nodes(self, label, key, values):
+        query = render("delete_nodes", label=label, key=key)
+        record = await fetch_single(self.driver, query, values=list(values))
+        return record["deleted_count"]
+
+    # --------------------------------------------------------------- Esquema
+
+    async def describe_schema(self, sample_size=1000):
+        # Los tipos salen de los procedimientos de esquema; el total del count store y el
+        # fill rate de una muestra de `sample_size` elementos por label/tipo.
+        node_types = defaultdict(lambda: defaultdict(set))
+        records = await fetch_all(self.driver, render("node_type_properties"))
+        for record in records:
+            for label in record["nodeLabels"]:
+                properties = node_types[label]
+                if record["propertyName"]:
+                    properties[record["propertyName"]].update(record["propertyTypes"] or [])
+
+        rel_types = defaultdict(lambda: defaultdict(set))
+        records = await fetch_all(self.driver, render("rel_type_properties"))
+        for record in records:
+            # relType viene como ":`PURCHASED`"
+            properties = rel_types[record["relType"].lstrip(":").strip("`")]
+            if record["propertyName"]:
+                properties[record["propertyName"]].update(record["propertyTypes"] or [])
+
+        labels = {}
+        for label in sorted(node_types):
+            labels[label] = await self._describe_sample(render("describe_label", label=label), node_types[label], sample_size)
+
+        relationship_types = {}
+        for rel_type in sorted(rel_types):
+            relationship_types[rel_type] = await self._describe_sample(
+                render("describe_relationship_type", rel_type=rel_type), rel_types[rel_type], sample_size, with_endpoints=True)
+
+        return {"labels": labels, "relationship_types": relationship_types}
+
+    async def _describe_sample(self, query, types, sample_size, with_endpoints=False):
+        records = await fetch_all(self.driver, query, sample_size=sample_size)
+
+        described = {"count": records[0]["total"] if records else 0, "properties": {}}
+        for record in records:
+            if record["prop"] is not None:
+                described["properties"][record["prop"]] = {
+                    "types": sorted(types.get(record["prop"], ())),
+                    "fill_rate": record["filled"] / record["sampled"],
+                }
+        described["properties"] = dict(sorted(described["properties"].items()))
+        if with_endpoints:
+            described["endpoints"] = sorted(records[0]["endpoints"]) if records else []
+        return described
+
+    async def provision_indexes(self):
+        return await indexProvisioning.provision_indexes(self.driver)
+
+    async def index_status(self):
+        return await indexProvisioning.index_status(self.driver)
+
+    # ------------------------------------------------------------ Relaciones
+
+    async def create_relationship(self, spec, from_value, to_value, properties):
+        query = render("create_relationship", **spec._asdict())
+        record = await fetch_single(self.driver, query, from_value=from_value, to_value=to_value, properties=properties)
+        return record["r"] if record else None
+
+    async def create_relationships(self, spec, pairs, properties):
+        if not pairs:
+            return 0
+        query = render("create_relationships", **spec._asdict())
+        record = await fetch_single(self.driver, query, pairs=[list(pair) for pair in pairs], properties=properties)
+        return record["created_count"]
+
+    async def get_relationship_properties(self, spec, from_value, to_value):
+        query = render("get_relationship_properties", **spec._asdict())
+        record = await fetch_single(self.driver, query, from_value=from_value, to_value=to_value)
+        return record["properties"] if record else None
+
+    async def get_relationships_properties(self, spec, pairs):
+        if not pairs:
+            return []
+        query = render("get_relationships_properties", **spec._asdict())
+        records = await fetch_all(self.driver, query, pairs=[list(pair) for pair in pairs])
+        return [record["properties"] for record in records]
+
+    async def stream_relationships(self, spec, with_properties=True):
+        query = render("stream_relationships" if with_properties else "stream_relationship_pairs", **spec._asdict())
+        async for record in stream(self.driver, query):
+            yield record["from_value"], record["to_value"], record["properties"] if with_properties else None
+
+    async def update_relationship(self, spec, from_value, to_value, set_props=None, remove_props=None):
+        query = render("update_relationship", **spec._asdict())
+        record = await fetch_single(self.driver, query, from_value=from_value, to_value=to_value,
+                                    props=property_changes(set_props, remove_props))
+        return record["r"] if record else None
+
+    async def update_relationships(self, spec, pairs: Sequence[Pair], set_props=None, remove_props=None):
+        query = render("update_relationships", **spec._asdict())
+        record = await fetch_single(self.driver, query, pairs=[list(pair) for pair in pairs],
+                                    props=property_changes(set_props, remove_props))
+        return record["updated_count"]
+
+    async def delete_relationships(self, spec, pairs):
+        query = render("delete_relationships", **spec._asdict())
+        record = await fetch_single(self.driver, query, pairs=[list(pair) for pair in pairs])
+        return record["deleted_count"]
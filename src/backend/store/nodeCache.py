@@ -0,0 +1,145 @@
+"""
+Caché en proceso de nodos "calientes" para las lecturas por identificador.
+
+Guarda las propiedades completas de un nodo con la llave `(label, identificador)`, donde el
+identificador es la propiedad de `utils.labelRegistry` (name, o title para Review). Es un
+LRU acotado por `NODE_CACHE_SIZE` entradas y cada entrada vence a los `NODE_CACHE_TTL`
+segundos, así los cambios hechos fuera de la API (por ejemplo `utils/csvToAura.py`) se ven
+a más tardar después del TTL.
+
+Las escrituras de la API la mantienen al día sin vaciarla completa:
+  - actualizar un nodo reemplaza su entrada con el nodo que retorna el store,
+  - actualizar varios, eliminar o crear nodos quita solo las llaves afectadas,
+  - si la escritura usa una llave que no es el identificador, se quitan las entradas del label.
+
+Una lectura que empezó antes de una escritura no guarda su resultado (ver `generation`),
+así una respuesta vieja de la base no vuelve a la caché después de invalidarla.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+from fastapi import Request
+from utils.labelRegistry import get_identifier_key
+
+# Entradas máximas de la caché (0 la desactiva)
+NODE_CACHE_SIZE = int(os.getenv("NODE_CACHE_SIZE", "10000"))
+# Segundos que una entrada se considera vigente
+NODE_CACHE_TTL = float(os.getenv("NODE_CACHE_TTL", "60"))
+
+CacheKey = Tuple[str, Any]
+
+
+def project(props: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """
+    Igual que `n {.a, .b}`: las propiedades que el nodo no tiene salen en null.
+    """
+    if not fields:
+        return dict(props)
+    return {field: props.get(field) for field in sorted(set(fields))}
+
+
+class NodeCache:
+
+    def __init__(self, capacity: int = NODE_CACHE_SIZE, ttl: float = NODE_CACHE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Aumenta con cada invalidación; una lectura solo guarda si no cambió mientras iba a la base
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def is_identifier(self, label: Optional[str], key: str) -> bool:
+        """
+        Si una búsqueda por `key` en `label` se puede responder desde la caché.
+        """
+        return self.enabled and bool(label) and key == get_identifier_key(label)
+
+    def get(self, label: str, value: Any) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get((label, value))
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, props = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[(label, value)]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end((label, value))
+        self.hits += 1
+        return props
+
+    def put(self, label: str, props: Dict[str, Any], generation: Optional[int] = None):
+        """
+        Guarda el nodo bajo su identificador. Con `generation` (el valor leído antes de ir a la
+        base) no guarda nada si hubo una invalidación entretanto.
+        """
+        value = props.get(get_identifier_key(label))
+        if not self.enabled or value is None:
+            return
+        if generation is not None and generation != self.generation:
+            return
+
+        self._entries[(label, value)] = (time.monotonic(), dict(props))
+        self._entries.move_to_end((label, value))
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, label: str, values: Iterable[Any]):
+        self.generation += 1
+        for value in values:
+            if self._entries.pop((label, value), None) is not None:
+                self.invalidations += 1
+
+    def invalidate_label(self, label: str):
+        self.generation += 1
+        for key in [key for key in self._entries if key[0] == label]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def written(self, label: str, key: str, values: Iterable[Any]):
+        """
+        Invalida lo que tocó una escritura sobre los nodos con `key` en `values`: solo esas
+        llaves si `key` es el identificador del label, o todo el label si no.
+        """
+        if key == get_identifier_key(label):
+            self.invalidate(label, values)
+        else:
+            self.invalidate_label(label)
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else None,
+            "cached_nodes": len(self._entries),
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl,
+        }
+
+
+def get_node_cache(request: Request) -> NodeCache:
+    """
+    Dependencia de FastAPI: retorna la caché de nodos compartida que vive en `app.state`.
+    """
+    return request.app.state.node_cache
@@ -0,0 +1,138 @@
+"""
+Catálogo del esquema del grafo con caché.
+
+Guarda labels, tipos de relación, llaves de propiedades con sus tipos observados y su
+tasa de llenado (fill rate), tal como los describe `GraphStore.describe_schema`. Se
+reconstruye cuando vence el TTL o en la primera lectura después de una escritura
+(`invalidate`), así los handlers pueden consultarlo sin ir a la base en cada petición. Tras
+una escritura se reconstruye como mucho una vez cada `SCHEMA_REBUILD_INTERVAL` segundos: con
+escrituras seguidas las lecturas de ese intervalo usan el catálogo anterior.
+"""
+
+import asyncio
+import datetime
+import os
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from store.graphStore import GraphStore
+
+# Segundos que el catálogo se considera vigente si no hay escrituras
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
+# Nodos/relaciones que se muestrean por label o tipo para medir el fill rate (solo Neo4j)
+SCHEMA_SAMPLE_SIZE = int(os.getenv("SCHEMA_SAMPLE_SIZE", "1000"))
+# Segundos mínimos entre reconstrucciones provocadas por escrituras
+SCHEMA_REBUILD_INTERVAL = float(os.getenv("SCHEMA_REBUILD_INTERVAL", "5"))
+
+NUMERIC_TYPES = {"Long", "Double"}
+
+
+def value_type(value: Any) -> str:
+    """
+    Nombre del tipo de un valor, con los mismos nombres que `db.schema.nodeTypeProperties`.
+    """
+    if isinstance(value, bool):
+        return "Boolean"
+    if isinstance(value, int):
+        return "Long"
+    if isinstance(value, float):
+        return "Double"
+    if isinstance(value, str):
+        return "String"
+    if isinstance(value, datetime.datetime):
+        return "DateTime"
+    if isinstance(value, datetime.date):
+        return "Date"
+    if isinstance(value, (list, tuple)):
+        inner = {value_type(item) for item in value}
+        return f"{inner.pop()}Array" if len(inner) == 1 else "List"
+    return type(value).__name__
+
+
+class SchemaCatalog:
+
+    def __init__(self, store: GraphStore, ttl: float = SCHEMA_CACHE_TTL, sample_size: int = SCHEMA_SAMPLE_SIZE,
+                 rebuild_interval: float = SCHEMA_REBUILD_INTERVAL):
+        self.store = store
+        self.ttl = ttl
+        self.sample_size = sample_size
+        self.rebuild_interval = rebuild_interval
+        self._schema: Optional[Dict[str, Any]] = None
+        self._built_at = 0.0
+        self._built_version = -1
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """
+        Marca el catálogo como desactualizado; se reconstruye en la siguiente lectura que llegue
+        pasado `rebuild_interval` desde la última construcción.
+        """
+        self._version += 1
+
+    def _is_fresh(self) -> bool:
+        if self._schema is None:
+            return False
+        age = time.monotonic() - self._built_at
+        return age < self.ttl and (self._built_version == self._version or age < self.rebuild_interval)
+
+    async def get(self) -> Dict[str, Any]:
+        if self._is_fresh():
+            return self._schema
+
+        async with self._lock:
+            # Otra petición pudo reconstruirlo mientras se esperaba el lock
+            if not self._is_fresh():
+                version = self._version
+                schema = await self.store.describe_schema(self.sample_size)
+                schema["generated_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                self._schema = schema
+                self._built_at = time.monotonic()
+                self._built_version = version
+        return self._schema
+
+    async def labels(self) -> List[str]:
+        return sorted((await self.get())["labels"])
+
+    async def relationship_types(self) -> List[str]:
+        return sorted((await self.get())["relationship_types"])
+
+    async def property_types(self, label: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        `properties` del label en el catálogo; sin label, los tipos de todos los labels combinados.
+        """
+        labels = (await self.get())["labels"]
+        if label:
+            return labels.get(label, {}).get("properties", {})
+
+        combined: Dict[str, Dict[str, Any]] = {}
+        for described in labels.values():
+            for prop, info in described["properties"].items():
+                types = set(combined.get(prop, {}).get("types", ())) | set(info["types"])
+                combined[prop] = {"types": sorted(types)}
+        return combined
+
+    async def numeric_properties(self, label: str) -> List[str]:
+        """
+        Propiedades del label que solo tienen valores numéricos.
+        """
+        described = (await self.get())["labels"].get(label)
+        if not described:
+            return []
+        return sorted(prop for prop, info in described["properties"].items()
+                      if info["types"] and set(info["types"]) <= NUMERIC_TYPES)
+
+
+def get_schema_catalog(request: Request) -> SchemaCatalog:
+    """
+    Dependencia de FastAPI: retorna el catálogo compartido que vive en `app.state`.
+    """
+    return request.app.state.schema
+
+
+async def invalidate_schema(request: Request):
+    """
+    Dependencia para los routers de escritura: invalida el catálogo cuando el handler termina bien.
+    """
+    yield
+    request.app.state.schema.invalidate()
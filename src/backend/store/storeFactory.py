@@ -0,0 +1,31 @@
+import os
+from fastapi import Request
+from store.graphStore import GraphStore
+from store.memoryStore import MemoryStore
+from store.neo4jStore import Neo4jStore
+from utils.dbConnection import create_driver
+
+# Backend de almacenamiento: "neo4j" (por defecto) o "memory"
+GRAPH_STORE = os.getenv("GRAPH_STORE", "neo4j").lower()
+# Carpeta con los CSV de utils/createCSV.py para precargar el store en memoria
+MEMORY_STORE_CSV_DIR = os.getenv("MEMORY_STORE_CSV_DIR")
+
+def create_store(kind: str = None) -> GraphStore:
+    """
+    Crea el store según `GRAPH_STORE` (o el tipo indicado).
+    """
+    kind = kind or GRAPH_STORE
+    if kind == "neo4j":
+        return Neo4jStore(create_driver())
+    if kind == "memory":
+        store = MemoryStore()
+        if MEMORY_STORE_CSV_DIR:
+            store.load_csv_folder(MEMORY_STORE_CSV_DIR)
+        return store
+    raise ValueError(f"GRAPH_STORE inválido: '{kind}'. Usa 'neo4j' o 'memory'.")
+
+def get_store(request: Request) -> GraphStore:
+    """
+    Dependencia de FastAPI: retorna el store compartido que vive en `app.state`.
+    """
+    return request.app.state.store
@@ -1,4 +1,4 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from dotenv import load_dotenv
 import os
 
@@ -8,5 +8,44 @@ NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
+# Modo del driver: "sync" (sesiones bloqueantes en el threadpool) o "async" (AsyncGraphDatabase)
+NEO4J_DRIVER_MODE = os.getenv("NEO4J_DRIVER_MODE", "sync").lower()
+
+# Configuración del pool de conexiones (ver README para los valores por defecto)
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+NEO4J_FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+
+def _driver_config() -> dict:
+    return {
+        "auth": (NEO4J_USER, NEO4J_PASSWORD),
+        "max_connection_pool_size": NEO4J_MAX_CONNECTION_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+        "fetch_size": NEO4J_FETCH_SIZE,
+    }
+
 def get_neo4j_driver():
-    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    """
+    Crea el driver de Neo4j con su pool de conexiones.
+    Debe existir uno solo por proceso: la API lo crea en el lifespan de `main.py`.
+    """
+    return GraphDatabase.driver(NEO4J_URI, **_driver_config())
+
+def get_async_neo4j_driver():
+    """
+    Igual que `get_neo4j_driver`, pero con el driver asíncrono de Neo4j.
+    """
+    return AsyncGraphDatabase.driver(NEO4J_URI, **_driver_config())
+
+def create_driver(mode: str = None):
+    """
+    Crea el driver según `NEO4J_DRIVER_MODE` (o el modo indicado).
+    """
+    mode = mode or NEO4J_DRIVER_MODE
+    if mode == "async":
+        return get_async_neo4j_driver()
+    if mode == "sync":
+        return get_neo4j_driver()
+    raise ValueError(f"NEO4J_DRIVER_MODE inválido: '{mode}'. Usa 'sync' o 'async'.")
@@ -0,0 +1,130 @@
+"""
+Lenguaje de filtros de `GET /nodes`.
+
+Cada filtro es `<propiedad>:<operador>:<valor>`, por ejemplo:
+  - `price:between:100,500`
+  - `popularity:gte:80`
+  - `type:in:CPU,GPU`
+  - `name:starts_with:Intel`
+  - `available:eq:true`
+
+Los valores se convierten al tipo que el catálogo del esquema observó para la propiedad
+(Long, Double, Boolean, Date, String), así `"100"` se compara como número contra `price`
+y no como texto. Un prefijo fuerza el tipo: `int:`, `float:`, `bool:`, `date:` o `str:`
+(por ejemplo `code:eq:str:007`). Para `between` e `in` los valores se separan con comas.
+"""
+
+import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from fastapi import HTTPException
+from store.cypherTemplates import IDENTIFIER
+from store.graphStore import OPERATORS, Predicate
+
+_TYPE_PREFIXES = {"int": "Long", "float": "Double", "bool": "Boolean", "date": "Date", "str": "String"}
+
+
+def _to_bool(text: str) -> bool:
+    lowered = text.strip().lower()
+    if lowered not in ("true", "false"):
+        raise ValueError(f"'{text}' no es booleano")
+    return lowered == "true"
+
+
+def _to_int(text: str) -> int:
+    number = float(text)
+    if not number.is_integer():
+        raise ValueError(f"'{text}' no es entero")
+    return int(number)
+
+
+_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "Long": _to_int,
+    "Double": float,
+    "Boolean": _to_bool,
+    "Date": datetime.date.fromisoformat,
+    "DateTime": datetime.datetime.fromisoformat,
+    "String": str,
+}
+
+
+def _infer(text: str) -> Any:
+    # Solo para propiedades que el catálogo no conoce o con tipos mezclados
+    for converter in (_to_bool, int, float):
+        try:
+            return converter(text)
+        except ValueError:
+            pass
+    return text
+
+
+def check_identifier(name: str, what: str = "propiedad") -> str:
+    if not IDENTIFIER.match(name):
+        raise HTTPException(status_code=400, detail=f"Nombre de {what} inválido: '{name}'.")
+    return name
+
+
+def convert_value(text: str, types: Sequence[str] = ()) -> Any:
+    """
+    Convierte un valor de la URL según su prefijo de tipo o, si no tiene, según los tipos
+    observados de la propiedad.
+    """
+    prefix, _, rest = text.partition(":")
+    if rest and prefix in _TYPE_PREFIXES:
+        target = _TYPE_PREFIXES[prefix]
+        text = rest
+    elif len(set(types)) == 1 and types[0] in _CONVERTERS:
+        target = types[0]
+    elif types and set(types) <= {"Long", "Double"}:
+        target = "Double"
+    else:
+        return _infer(text)
+
+    try:
+        return _CONVERTERS[target](text)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"El valor '{text}' no es de tipo {target}.")
+
+
+def parse_filter(expression: str, types: Sequence[str] = ()) -> Predicate:
+    try:
+        prop, op, raw = expression.split(":", 2)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Filtro inválido: '{expression}'. Usa <propiedad>:<operador>:<valor>.")
+
+    check_identifier(prop)
+    if op not in OPERATORS:
+        raise HTTPException(status_code=400, detail=f"Operador inválido: '{op}'. Usa: {list(OPERATORS)}")
+
+    if op == "between":
+        bounds = raw.split(",")
+        if len(bounds) != 2:
+            raise HTTPException(status_code=400, detail=f"'between' necesita dos valores separados por coma: '{expression}'.")
+        return Predicate(prop, op, tuple(convert_value(bound, types) for bound in bounds))
+    if op == "in":
+        return Predicate(prop, op, [convert_value(item, types) for item in raw.split(",")])
+    if op == "starts_with":
+        return Predicate(prop, op, raw)
+    return Predicate(prop, op, convert_value(raw, types))
+
+
+def parse_filters(expressions: Optional[Sequence[str]], property_types: Dict[str, Dict[str, Any]]) -> List[Predicate]:
+    """
+    Convierte los filtros de la URL en predicados. `property_types` es el
+    `properties` del label en el catálogo del esquema (puede estar vacío).
+    """
+    predicates = []
+    for expression in expressions or ():
+        prop = expression.split(":", 1)[0]
+        types = property_types.get(prop, {}).get("types", ())
+        predicates.append(parse_filter(expression, types))
+    return predicates
+
+
+def parse_fields(fields: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Campos de `fields=`: se aceptan repetidos (`fields=a&fields=b`) o separados por coma (`fields=a,b`).
+    """
+    if not fields:
+        return None
+    parsed = [field.strip() for value in fields for field in value.split(",") if field.strip()]
+    return [check_identifier(field) for field in parsed] or None
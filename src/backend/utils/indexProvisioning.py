@@ -0,0 +1,103 @@
+"""
+Creación de índices y constraints a partir de `utils.labelRegistry`.
+
+Para cada label crea una constraint de unicidad sobre su identificador (name/title), que
+además respalda el `MERGE` del loader. Si la constraint no se puede crear (por ejemplo
+porque ya hay duplicados) se crea un índice de rango en su lugar. Las propiedades
+`indexed` del registro reciben índices de rango. Todas las sentencias usan
+`IF NOT EXISTS`, así que correrlas en cada arranque no cuesta nada.
+
+Lo usan el lifespan de la API y `utils/csvToAura.py`, con driver síncrono o asíncrono.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+from neo4j.exceptions import Neo4jError
+from utils.labelRegistry import LABELS
+from utils.queryRunner import fetch_all
+
+# Si la API crea los índices/constraints al arrancar
+PROVISION_INDEXES = os.getenv("PROVISION_INDEXES", "true").lower() == "true"
+
+
+class IndexDefinition(NamedTuple):
+    name: str
+    label: str
+    prop: str
+    unique: bool
+
+
+def index_definitions() -> List[IndexDefinition]:
+    definitions = []
+    for label, spec in LABELS.items():
+        definitions.append(IndexDefinition(f"{label.lower()}_{spec.identifier}_unique", label, spec.identifier, True))
+        for prop in spec.indexed:
+            definitions.append(IndexDefinition(f"{label.lower()}_{prop}_range", label, prop, False))
+    return definitions
+
+
+def _constraint_query(definition: IndexDefinition) -> str:
+    return (f"CREATE CONSTRAINT {definition.name} IF NOT EXISTS "
+            f"FOR (n:{definition.label}) REQUIRE n.{definition.prop} IS UNIQUE")
+
+
+def _index_query(name: str, definition: IndexDefinition) -> str:
+    return f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{definition.label}) ON (n.{definition.prop})"
+
+
+async def provision_indexes(driver) -> List[Dict[str, Any]]:
+    """
+    Crea las constraints e índices del registro. Retorna, por definición,
+    `{"name", "label", "property", "kind"}` donde `kind` es "unique", "range" o
+    "range (sin unicidad: <error>)" si la constraint falló.
+    """
+    results = []
+    for definition in index_definitions():
+        result = {"name": definition.name, "label": definition.label, "property": definition.prop}
+        if definition.unique:
+            try:
+                await fetch_all(driver, _constraint_query(definition))
+                result["kind"] = "unique"
+            except Neo4jError as error:
+                name = definition.name.replace("_unique", "_range")
+                await fetch_all(driver, _index_query(name, definition))
+                result.update(name=name, kind=f"range (sin unicidad: {error.message})")
+        else:
+            await fetch_all(driver, _index_query(definition.name, definition))
+            result["kind"] = "range"
+        results.append(result)
+    return results
+
+
+async def index_status(driver, names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Estado de los índices (`SHOW INDEXES`): state y porcentaje de población.
+    """
+    query = """
+    SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state, populationPercent, owningConstraint
+    WHERE $names IS NULL OR name IN $names
+    RETURN name, type, labelsOrTypes, properties, state, populationPercent, owningConstraint
+    ORDER BY name
+    """
+    records = await fetch_all(driver, query, names=list(names) if names is not None else None)
+    return [dict(record) for record in records]
+
+
+async def wait_for_indexes(driver, names: Sequence[str], timeout: float = 300, interval: float = 2,
+                           on_progress: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> bool:
+    """
+    Espera a que los índices indicados estén ONLINE, llamando a `on_progress` con su estado
+    en cada consulta. Retorna False si se agota el `timeout`.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status = await index_status(driver, names)
+        if on_progress:
+            on_progress(status)
+        if all(index["state"] == "ONLINE" for index in status):
+            return True
+        if any(index["state"] == "FAILED" for index in status) or time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(interval)
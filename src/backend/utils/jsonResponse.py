@@ -0,0 +1,36 @@
+"""
+Serialización JSON rápida para las respuestas de la API.
+
+`FastJSONResponse` codifica con orjson (si está instalado) y los handlers de lectura la
+retornan directamente, así FastAPI no pasa el resultado por `jsonable_encoder`. Los
+valores que orjson no conoce (fechas de `neo4j.time`, por ejemplo) salen en formato ISO.
+"""
+
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la librería estándar
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "iso_format"):
+        return value.iso_format()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
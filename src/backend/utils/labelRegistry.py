@@ -0,0 +1,63 @@
+"""
+Registro de labels del grafo.
+
+Es la única fuente para:
+  - la propiedad identificadora de cada label (name, o title para Review),
+  - las propiedades que se filtran seguido y llevan un índice de rango,
+  - los CSV que genera `utils/createCSV.py` y cómo se cargan (API en memoria y `utils/csvToAura.py`).
+"""
+
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from store.graphStore import RelationshipSpec
+
+
+class LabelSpec(NamedTuple):
+    identifier: str
+    csv_file: str
+    indexed: Tuple[str, ...] = ()
+
+
+LABELS: Dict[str, LabelSpec] = {
+    "Component": LabelSpec("name", "components.csv", ("price", "popularity", "release_date")),
+    "Category": LabelSpec("name", "categories.csv", ("popularity", "last_update")),
+    "User": LabelSpec("name", "users.csv", ("budget", "last_visit")),
+    "Review": LabelSpec("title", "reviews.csv", ("rating", "review_date")),
+    "Provider": LabelSpec("name", "providers.csv", ("rating",)),
+}
+
+# Archivo -> (label origen, label destino, tipo, llave origen, llave destino)
+RELATION_FILES: Dict[str, Tuple[str, str, str, str, str]] = {
+    "relations_purchase.csv": ("User", "Component", "PURCHASED", "name", "name"),
+    "relations_categorize.csv": ("Component", "Category", "CATEGORIZED", "name", "name"),
+    "relations_supply.csv": ("Provider", "Component", "SUPPLIES", "name", "name"),
+    "relations_review.csv": ("Review", "Component", "REVIEWS", "title", "name"),
+    "relations_promote.csv": ("Provider", "User", "PROMOTES", "name", "name"),
+    "relations_associate.csv": ("Provider", "Category", "ASSOCIATED_WITH", "name", "name"),
+    "relations_search.csv": ("User", "Component", "SEARCHED", "name", "name"),
+    "relations_wishlist.csv": ("User", "Component", "WANTS", "name", "name"),
+    "relations_write.csv": ("User", "Review", "WRITES", "name", "title"),
+    "relations_complement.csv": ("Component", "Component", "COMPLEMENTS", "name", "name"),
+}
+
+
+def relationship_specs(types: Optional[Iterable[str]] = None) -> Dict[str, RelationshipSpec]:
+    """
+    Tipo de relación -> `RelationshipSpec` con los labels y llaves de `RELATION_FILES` (en su
+    orden). Con `types`, solo esos tipos.
+    """
+    types = None if types is None else set(types)
+    return {
+        rel_type: RelationshipSpec(from_label, from_key, rel_type, to_label, to_key)
+        for from_label, to_label, rel_type, from_key, to_key in RELATION_FILES.values()
+        if types is None or rel_type in types
+    }
+
+
+def get_identifier_key(label: str) -> str:
+    """
+    Devuelve la key de identificador según el label.
+    - Reviews usan `title`
+    - Los demás usan `name`
+    """
+    spec = LABELS.get(label)
+    return spec.identifier if spec else "name"
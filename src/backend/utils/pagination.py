@@ -0,0 +1,39 @@
+"""
+Cursores opacos para la paginación por keyset.
+
+Un cursor guarda la llave de orden (`by`: la propiedad identificadora o `elementId`)
+y el último valor entregado (`after`). La siguiente página continúa con
+`WHERE <llave> > $after ORDER BY <llave>`, que usa el índice en lugar de saltarse
+filas con SKIP.
+"""
+
+import base64
+import json
+from typing import Any, Optional
+from fastapi import HTTPException
+
+ELEMENT_ID = "elementId"
+
+
+def encode_cursor(by: str, after: Any) -> str:
+    payload = json.dumps({"by": by, "after": after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], by: str) -> Any:
+    """
+    Retorna el `after` del cursor, o None si no hay cursor.
+    Lanza 400 si el cursor es inválido o fue generado para otro orden.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        cursor_by, after = payload["by"], payload["after"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+    if cursor_by != by:
+        raise HTTPException(status_code=400, detail="El cursor no corresponde a esta consulta.")
+    return after
@@ -0,0 +1,55 @@
+"""
+Contadores de la caché de planes de Neo4j, vistos desde la API.
+
+Neo4j reutiliza un plan cuando recibe un texto de consulta que ya compiló y su caché es
+un LRU de `server.db.query_cache_size` entradas (1000 por defecto). `PlanCacheStats`
+replica ese LRU con los textos que envía `utils.queryRunner`: un texto nuevo (o ya
+desalojado) cuenta como miss, es decir, una compilación; uno repetido como hit.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Dict
+
+# Debe coincidir con `server.db.query_cache_size` del servidor
+NEO4J_QUERY_CACHE_SIZE = int(os.getenv("NEO4J_QUERY_CACHE_SIZE", "1000"))
+
+
+class PlanCacheStats:
+
+    def __init__(self, capacity: int = NEO4J_QUERY_CACHE_SIZE):
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self._queries: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, query: str):
+        if query in self._queries:
+            self._queries.move_to_end(query)
+            self._queries[query] += 1
+            self.hits += 1
+            return
+
+        self.misses += 1
+        self._queries[query] = 1
+        if len(self._queries) > self.capacity:
+            self._queries.popitem(last=False)
+            self.evictions += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else None,
+            "cached_queries": len(self._queries),
+            "capacity": self.capacity,
+        }
+
+
+plan_cache = PlanCacheStats()
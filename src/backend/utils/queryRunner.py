@@ -0,0 +1,70 @@
+"""
+Ejecución de consultas Cypher independiente del modo del driver.
+
+Los handlers son `async def` y llaman a estas funciones con el driver que reciben
+por dependencia:
+  - Con el driver asíncrono las consultas corren en el event loop, sin ocupar un hilo.
+  - Con el driver síncrono la consulta se delega al threadpool de Starlette,
+    igual que hacía FastAPI con los handlers `def`.
+Cada consulta se registra en `utils.planCache` para medir la reutilización de planes.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+from neo4j import AsyncDriver, Record
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from utils.planCache import plan_cache
+
+
+def _fetch_all_sync(driver, query: str, parameters: Dict[str, Any]) -> List[Record]:
+    with driver.session() as session:
+        return list(session.run(query, parameters))
+
+
+def _fetch_single_sync(driver, query: str, parameters: Dict[str, Any]) -> Optional[Record]:
+    with driver.session() as session:
+        return session.run(query, parameters).single()
+
+
+def _stream_sync(driver, query: str, parameters: Dict[str, Any]):
+    with driver.session() as session:
+        yield from session.run(query, parameters)
+
+
+async def fetch_all(driver, query: str, /, **parameters) -> List[Record]:
+    """
+    Ejecuta la consulta y retorna todos los registros.
+    """
+    plan_cache.record(query)
+    if isinstance(driver, AsyncDriver):
+        async with driver.session() as session:
+            result = await session.run(query, parameters)
+            return [record async for record in result]
+    return await run_in_threadpool(_fetch_all_sync, driver, query, parameters)
+
+
+async def fetch_single(driver, query: str, /, **parameters) -> Optional[Record]:
+    """
+    Ejecuta la consulta y retorna el primer registro (o None si no hay resultados).
+    """
+    plan_cache.record(query)
+    if isinstance(driver, AsyncDriver):
+        async with driver.session() as session:
+            result = await session.run(query, parameters)
+            return await result.single()
+    return await run_in_threadpool(_fetch_single_sync, driver, query, parameters)
+
+
+async def stream(driver, query: str, /, **parameters) -> AsyncIterator[Record]:
+    """
+    Retorna los registros a medida que el driver los va recibiendo (en lotes de `fetch_size`),
+    sin materializar el resultado completo.
+    """
+    plan_cache.record(query)
+    if isinstance(driver, AsyncDriver):
+        async with driver.session() as session:
+            result = await session.run(query, parameters)
+            async for record in result:
+                yield record
+    else:
+        async for record in iterate_in_threadpool(_stream_sync(driver, query, parameters)):
+            yield record
@@ -1,12 +1,13 @@
 import streamlit as st
 import requests
 from config import BASE_URL
+from schemaClient import get_labels
 
 st.set_page_config(page_title="Visualizacion de Nodos", page_icon="📊")
 
 st.title("📊 Visualizacion de Nodos")
 
-AVAILABLE_LABELS = ["Review", "Component", "User", "Provider", "Category"]
+AVAILABLE_LABELS = get_labels()
 
 def get_identifier_key(label: str) -> str:
     return "title" if label == "Review" else "name"
@@ -16,6 +17,19 @@ st.subheader("Consultar Nodos por Filtro")
 label = st.selectbox("Selecciona un Label (opcional)", [""] + AVAILABLE_LABELS, key="filter_label")
 prop = st.text_input("Propiedad (opcional)", key="filter_prop")
 value = st.text_input("Valor (opcional)", key="filter_value")
+advanced_filters = st.text_area(
+    "Filtros avanzados (opcional, uno por línea)",
+    placeholder="price:between:100,500\npopularity:gte:80\ntype:in:CPU,GPU",
+    key="filter_advanced"
+)
+
+PAGE_SIZE = 100
+
+def fetch_nodes_page(params: dict, cursor: str = None):
+    page_params = dict(params, page_size=PAGE_SIZE)
+    if cursor:
+        page_params["cursor"] = cursor
+    return requests.get(f"{BASE_URL}/nodes", params=page_params)
 
 if st.button("Consultar Nodos con Filtro", key="btn_filter"):
     params = {}
@@ -25,19 +39,41 @@ if st.button("Consultar Nodos con Filtro", key="btn_filter"):
         params["prop"] = prop
     if value:
         params["value"] = value
+    filters = [line.strip() for line in advanced_filters.splitlines() if line.strip()]
+    if filters:
+        params["filter"] = filters
 
-    response = requests.get(f"{BASE_URL}/nodes", params=params)
+    response = fetch_nodes_page(params)
 
     if response.status_code == 200:
-        nodes = response.json()
-        if nodes:
-            st.write(f"Se encontraron {len(nodes)} nodo(s)")
-            st.json(nodes)
-        else:
-            st.warning("No se encontraron nodos con los filtros aplicados.")
+        page = response.json()
+        st.session_state.filter_params = params
+        st.session_state.filter_nodes = page["items"]
+        st.session_state.filter_cursor = page["next_cursor"]
+    else:
+        st.session_state.pop("filter_nodes", None)
+        st.error(f"Error {response.status_code}: {response.text}")
+
+# La paginación es por cursor: cada página continúa donde terminó la anterior
+if st.session_state.get("filter_cursor") and st.button("Cargar más nodos", key="btn_filter_more"):
+    response = fetch_nodes_page(st.session_state.filter_params, st.session_state.filter_cursor)
+
+    if response.status_code == 200:
+        page = response.json()
+        st.session_state.filter_nodes += page["items"]
+        st.session_state.filter_cursor = page["next_cursor"]
     else:
         st.error(f"Error {response.status_code}: {response.text}")
 
+if "filter_nodes" in st.session_state:
+    nodes = st.session_state.filter_nodes
+    if nodes:
+        more = " (hay más páginas)" if st.session_state.get("filter_cursor") else ""
+        st.write(f"Se encontraron {len(nodes)} nodo(s){more}")
+        st.json(nodes)
+    else:
+        st.warning("No se encontraron nodos con los filtros aplicados.")
+
 st.subheader("Consultar 1 o Más Nodos por Nombre")
 
 label_specific = st.selectbox("Selecciona el Label", AVAILABLE_LABELS, key="specific_label")
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 from config import BASE_URL
+from schemaClient import get_labels
 import re
 import ast
 
@@ -8,7 +9,7 @@ import ast
 st.set_page_config(page_title="Gestión de Propiedades", page_icon="⚙️")
 st.title("Gestión de Propiedades ⚙️")
 
-AVAILABLE_LABELS = ["Review", "Component", "User", "Provider", "Category"]
+AVAILABLE_LABELS = get_labels()
 
 def to_snake_case(text):
     return re.sub(r'(?<!^)(?=[A-Z])', '_', text).lower()
@@ -27,6 +28,22 @@ def parse_if_list(val):
             pass
     return val
 
+# Busca todos los nodos en una sola petición; el servidor calcula las propiedades comunes
+def load_nodes_with_common_properties(label, identifier_values):
+    payload = {
+        "items": [{"label": label, "identifier": value.strip()} for value in identifier_values if value.strip()],
+        "common_properties": True
+    }
+    response = requests.post(f"{BASE_URL}/nodes/batch", json=payload)
+    if response.status_code != 200:
+        st.error(f"Error {response.status_code}: {response.text}")
+        return [], {"keys": [], "shared_values": {}}
+
+    result = response.json()
+    for missing in result["missing"]:
+        st.error(f"Nodo '{missing['identifier']}' no encontrado o sin datos.")
+    return [item["node"] for item in result["results"] if item["node"] is not None], result["common_properties"]
+
 
 # Agregar propiedades a 1 nodo
 st.subheader("Agregar Propiedades a 1 Nodo")
@@ -192,26 +209,18 @@ def convert_value(value, expected_type):
 
 if st.button("Cargar propiedades comunes", key="load_common_properties_update"):
     st.session_state.update_multi_nodes = identifier_values.copy()
-    properties_list = []
-    for node in identifier_values:
-        response = requests.get(f"{BASE_URL}/nodes?label={label}&prop={identifier_key}&value={node}")
-        if response.status_code == 200 and response.json():
-            properties_list.append(response.json()[0])
-        else:
-            st.error(f"Nodo '{node}' no encontrado o sin datos.")
+    properties_list, common = load_nodes_with_common_properties(label, identifier_values)
 
     if properties_list:
-        all_properties = [set(n.keys()) for n in properties_list]
-        common_properties = set.intersection(*all_properties).difference({"name", "title"})
+        common_properties = set(common["keys"]).difference({"name", "title"})
         st.session_state.update_multi_common_properties = list(common_properties)
 
         sample_values = {}
         property_types = {}
         for prop in common_properties:
-            values = [node[prop] for node in properties_list]
-            first_val = parse_if_list(values[0])
+            first_val = parse_if_list(properties_list[0][prop])
             property_types[prop] = type(first_val)
-            sample_values[prop] = first_val if all(v == values[0] for v in values) else ""
+            sample_values[prop] = first_val if prop in common["shared_values"] else ""
         st.session_state.update_multi_current_values = sample_values
         st.session_state.update_multi_property_types = property_types
     else:
@@ -315,20 +324,10 @@ identifier_values = st.text_input("Nombres de los Nodos (separados por comas)",
 
 # Cargar y guardar propiedades comunes en session_state
 if st.button("Cargar propiedades comunes", key="load_common_properties_delete_multi"):
-    properties_list = []
-
-    for node in identifier_values:
-        response = requests.get(f"{BASE_URL}/nodes?label={label}&prop={identifier_key}&value={node.strip()}")
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                properties_list.append(data[0])
-            else:
-                st.error(f"No se encontraron propiedades para el nodo '{node}'.")
+    properties_list, common = load_nodes_with_common_properties(label, identifier_values)
+
     if properties_list:
-        common_properties = set(properties_list[0].keys())
-        for props in properties_list:
-            common_properties.intersection_update(props.keys())
+        common_properties = set(common["keys"])
         if common_properties:
             st.session_state.common_properties = list(common_properties)
         else:
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 from config import BASE_URL
+from schemaClient import get_labels
 import re
 from datetime import date
 
@@ -8,7 +9,7 @@ st.set_page_config(page_title="Creacion de Relaciones", page_icon="🔗")
 
 st.title("Creacion de Relaciones 🔗")
 
-AVAILABLE_LABELS = ["Review", "Component", "User", "Provider", "Category"]
+AVAILABLE_LABELS = get_labels()
 
 # Relacion permitida: {Relacion: (Label Origen, Label Destino)}
 VALID_RELATIONSHIPS = {
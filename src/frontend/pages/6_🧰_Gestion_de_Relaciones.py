@@ -1,15 +1,15 @@
 import streamlit as st
 import requests
 from config import BASE_URL
+from schemaClient import get_labels, get_relationship_types
 import re
 from datetime import date
 
 st.set_page_config(page_title="Gestion de Propiedades de Relaciones", page_icon="🔗")
 st.title("Gestion de Propiedades de Relaciones 🔗")
 
-AVAILABLE_LABELS = ["Review", "Component", "User", "Provider", "Category"]
-RELATIONSHIP_TYPES = ["Purchased", "Categorized", "Supplies", "Reviews", "Promotes", 
-                      "Associated_with", "Searched", "Wants", "Writes", "Complements"]
+AVAILABLE_LABELS = get_labels()
+RELATIONSHIP_TYPES = get_relationship_types()
 
 def to_snake_case(text):
     return re.sub(r'(?<!^)(?=[A-Z])', '_', text).lower()
@@ -34,6 +34,24 @@ def get_property_input_ui(key_prefix):
     
     return to_snake_case(name), value
 
+# Carga las propiedades de todos los pares en una sola petición; muestra un error por cada par sin relación
+def load_relationships_properties(from_label, to_label, relationship_type, pairs):
+    payload = {
+        "from_label": from_label,
+        "to_label": to_label,
+        "relationship_type": relationship_type.upper(),
+        "pairs": [(from_value.strip(), to_value.strip()) for from_value, to_value in pairs]
+    }
+    response = requests.post(f"{BASE_URL}/relationships/properties/batch", json=payload)
+    if response.status_code != 200:
+        st.error(f"Error {response.status_code}: {response.text}")
+        return []
+
+    result = response.json()
+    for from_value, to_value in result["missing"]:
+        st.error(f"Relación {from_value} -> {to_value} no encontrada")
+    return result["found"]
+
 def manage_single_relationship_properties(operation, endpoint):
     st.subheader(f"{operation} propiedades a 1 relación")
 
@@ -189,23 +207,7 @@ elif option == "Actualizar propiedades de múltiples relaciones":
     pairs = [tuple(line.strip().split(',')) for line in pairs_text.strip().split('\n') if line]
 
     if st.button("Cargar propiedades comunes", key="load_multi_relationship_properties"):
-        properties_list = []
-
-        for from_value, to_value in pairs:
-            response = requests.get(
-                f"{BASE_URL}/relationships/properties",
-                params={
-                    "from_label": from_label,
-                    "to_label": to_label,
-                    "relationship_type": relationship_type.upper(),
-                    "from_value": from_value.strip(),
-                    "to_value": to_value.strip()
-                }
-            )
-            if response.status_code == 200:
-                properties_list.append(response.json()["properties"])
-            else:
-                st.error(f"Relación {from_value} -> {to_value} no encontrada")
+        properties_list = [found["properties"] for found in load_relationships_properties(from_label, to_label, relationship_type, pairs)]
 
         if properties_list:
             common_properties = set(properties_list[0].keys())
@@ -305,24 +307,7 @@ elif option == "Eliminar propiedades de múltiples relaciones":
 
     # Botón para cargar propiedades comunes de las relaciones
     if st.button("Cargar Propiedades Comunes", key="load_common_properties_multi_relationships"):
-        properties_list = []
-
-        for from_value, to_value in pairs:
-            response = requests.get(
-                f"{BASE_URL}/relationships/properties",
-                params={
-                    "from_label": from_label,
-                    "to_label": to_label,
-                    "relationship_type": relationship_type.upper(),
-                    "from_value": from_value.strip(),
-                    "to_value": to_value.strip()
-                }
-            )
-            if response.status_code == 200:
-                properties = response.json()["properties"]
-                properties_list.append(set(properties.keys()))
-            else:
-                st.error(f"No se encontraron propiedades para la relación entre {from_value} y {to_value}")
+        properties_list = [set(found["properties"].keys()) for found in load_relationships_properties(from_label, to_label, relationship_type, pairs)]
 
         # Si hay al menos una relación válida
         if properties_list:
@@ -1,14 +1,14 @@
 import streamlit as st
 import requests
 from config import BASE_URL
+from schemaClient import get_labels, get_relationship_types
 import re
 
 st.set_page_config(page_title="Eliminacion de Nodos y Relaciones", page_icon="🗑️")
 st.title("🗑️ Eliminacion de Nodos y Relaciones")
 
-AVAILABLE_LABELS = ["Review", "Component", "User", "Provider", "Category"]
-RELATIONSHIP_TYPES = ["Purchased", "Categorized", "Supplies", "Reviews", "Promotes",
-                      "Associated_with", "Searched", "Wants", "Writes", "Complements"]
+AVAILABLE_LABELS = get_labels()
+RELATIONSHIP_TYPES = get_relationship_types()
 
 def get_identifier_key(label: str) -> str:
     return "title" if label == "Review" else "name"
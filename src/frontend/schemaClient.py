@@ -0,0 +1,32 @@
+import requests
+import streamlit as st
+from config import BASE_URL
+
+# Valores usados si la API no responde
+DEFAULT_LABELS = ["Review", "Component", "User", "Provider", "Category"]
+DEFAULT_RELATIONSHIP_TYPES = ["Purchased", "Categorized", "Supplies", "Reviews", "Promotes",
+                              "Associated_with", "Searched", "Wants", "Writes", "Complements"]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_schema():
+    """
+    Catálogo del esquema expuesto por la API en `/schema` (en caché 5 minutos).
+    """
+    try:
+        response = requests.get(f"{BASE_URL}/schema", timeout=10)
+        if response.status_code == 200:
+            return response.json()
+    except requests.RequestException:
+        pass
+    return None
+
+def get_labels():
+    schema = get_schema()
+    return sorted(schema["labels"]) if schema and schema["labels"] else DEFAULT_LABELS
+
+def get_relationship_types():
+    # Las páginas muestran los tipos como "Purchased" y los envían con .upper()
+    schema = get_schema()
+    if schema and schema["relationship_types"]:
+        return [rel_type.capitalize() for rel_type in sorted(schema["relationship_types"])]
+    return DEFAULT_RELATIONSHIP_TYPES
@@ -0,0 +1,52 @@
+"""
+Entrena los embeddings de componentes y guarda el índice de componentes similares
+(ver `recommendations/componentEmbeddings.py` en el backend) para que la API lo cargue al
+arrancar en lugar de entrenarlo en la primera consulta.
+
+Lee el grafo por el mismo `GraphStore` que usa la API: Neo4j según el `.env`, o el store en
+memoria cargado desde una carpeta de CSV con `--csv-dir`.
+
+Uso (desde la raíz del proyecto):
+    python src/utils/buildComponentIndex.py --output src/backend/indexes/components.npz
+    python src/utils/buildComponentIndex.py --output src/backend/indexes/components.npz --csv-dir src/csvData
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from recommendations.componentEmbeddings import ComponentSimilarityIndex
+from store.memoryStore import MemoryStore
+from store.storeFactory import create_store
+
+load_dotenv()
+
+async def run(args):
+    if args.csv_dir:
+        store = MemoryStore()
+        store.load_csv_folder(args.csv_dir)
+    else:
+        store = create_store("neo4j")
+    try:
+        similar = ComponentSimilarityIndex(store, args.output)
+        await similar.index()
+        return similar.stats()
+    finally:
+        await store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Archivo .npz del índice (el COMPONENT_INDEX_PATH de la API)")
+    parser.add_argument("--csv-dir", help="Leer desde esta carpeta de CSV en lugar de Neo4j")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args))
+    print(f"✅ Índice en {args.output}: {stats['vectors']} componentes ({stats['trained']} con vector entrenado), "
+          f"{stats['lists']} listas, {stats['dimensions']} dimensiones en {stats['last_build_seconds']:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,10 @@ csv_dir = os.path.join(src_dir, folder_name)
 if not os.path.exists(csv_dir):
     os.makedirs(csv_dir)
 
+# Semilla opcional para generar siempre los mismos datos (la usa benchmarks/benchRecommendations.py)
+if os.getenv("CSV_SEED"):
+    random.seed(int(os.getenv("CSV_SEED")))
+
 def random_date(start, end):
 	return start + timedelta(days=random.randint(0, (end-start).days))
 
@@ -473,9 +477,9 @@ complement_data = []
 generated = 0
 while generated < num_relations:
     component1 = random.choice(component_names)
-    component2 = random.choice([c for c in component_names if c != component1])
+    component2 = random.choice(component_names)
     entry = (component1, component2)
-    if entry not in unique_relations["complement"]:
+    if component1 != component2 and entry not in unique_relations["complement"]:
         unique_relations["complement"].add(entry)
         complement_data.append([
             component1,
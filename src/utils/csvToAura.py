@@ -1,7 +1,14 @@
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 import pandas as pd
+import asyncio
 import os
+import sys
+
+# El registro de labels y la creación de índices se comparten con la API (src/backend)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from utils.indexProvisioning import provision_indexes, wait_for_indexes
+from utils.labelRegistry import LABELS, RELATION_FILES
 
 load_dotenv()
 
@@ -18,12 +25,31 @@ driver = get_neo4j_driver()
 # Diccionario para almacenar logs
 load_report = {"nodes": {}, "relationships": {}}
 
+def print_index_progress(status):
+    pending = [index for index in status if index["state"] != "ONLINE"]
+    if pending:
+        progress = ", ".join(f"{index['name']} {index['populationPercent']:.0f}%" for index in pending)
+        print(f"⏳ Poblando índices: {progress}")
+
+def create_indexes():
+    """
+    Crea las constraints de unicidad de name/title (que usa el MERGE de la carga) y los
+    índices de rango del registro, y espera a que estén ONLINE.
+    """
+    async def provision():
+        created = await provision_indexes(driver)
+        for index in created:
+            print(f"✅ Índice {index['name']} ({index['label']}.{index['property']}): {index['kind']}")
+        online = await wait_for_indexes(driver, [index["name"] for index in created], on_progress=print_index_progress)
+        if not online:
+            print("⚠️ Algunos índices no quedaron ONLINE; la carga continúa sin ellos.")
+
+    asyncio.run(provision())
+
 def load_nodes_from_csv(file_path, node_label):
     df = pd.read_csv(file_path)
 
-    primary_key = "name"
-    if node_label == "Review":
-        primary_key = "title"
+    primary_key = LABELS[node_label].identifier
 
     query = f"""
     UNWIND $data AS row
@@ -70,36 +96,17 @@ def load_relationships_from_csv(file_path, relation_type, from_label, to_label,
 
 def load_all_nodes(folder):
     base_path = os.path.join("src", folder)
-    node_files = {
-        "components.csv": "Component",
-        "categories.csv": "Category",
-        "users.csv": "User",
-        "reviews.csv": "Review",
-        "providers.csv": "Provider"
-    }
-    for file, label in node_files.items():
-        file_path = os.path.join(base_path, file)
+    for label, spec in LABELS.items():
+        file_path = os.path.join(base_path, spec.csv_file)
         if os.path.exists(file_path):
             load_nodes_from_csv(file_path, label)
         else:
             load_report["nodes"][label] = "❌ No encontrado"
-            print(f"⚠️ El archivo {file} no existe.")
+            print(f"⚠️ El archivo {spec.csv_file} no existe.")
 
 def load_all_relationships(folder):
     base_path = os.path.join("src", folder)
-    relation_files = {
-        "relations_purchase.csv": ("User", "Component", "PURCHASED", "name", "name"),
-        "relations_categorize.csv": ("Component", "Category", "CATEGORIZED", "name", "name"),
-        "relations_supply.csv": ("Provider", "Component", "SUPPLIES", "name", "name"),
-        "relations_review.csv": ("Review", "Component", "REVIEWS", "title", "name"),
-        "relations_promote.csv": ("Provider", "User", "PROMOTES", "name", "name"),
-        "relations_associate.csv": ("Provider", "Category", "ASSOCIATED_WITH", "name", "name"),
-        "relations_search.csv": ("User", "Component", "SEARCHED", "name", "name"),
-        "relations_wishlist.csv": ("User", "Component", "WANTS", "name", "name"),
-        "relations_write.csv": ("User", "Review", "WRITES", "name", "title"),
-        "relations_complement.csv": ("Component", "Component", "COMPLEMENTS", "name", "name")
-    }
-    for file, (from_label, to_label, relation_type, from_key, to_key) in relation_files.items():
+    for file, (from_label, to_label, relation_type, from_key, to_key) in RELATION_FILES.items():
         file_path = os.path.join(base_path, file)
         if os.path.exists(file_path):
             load_relationships_from_csv(file_path, relation_type, from_label, to_label, from_key, to_key)
@@ -109,7 +116,9 @@ def load_all_relationships(folder):
 
 if __name__ == "__main__":
     folder = input("Ingresa el nombre del folder en src: ").strip() or "csvData"
-    print("Cargando nodos...")
+    print("Creando índices...")
+    create_indexes()
+    print("\nCargando nodos...")
     load_all_nodes(folder)
     print("\nCargando relaciones...")
     load_all_relationships(folder)
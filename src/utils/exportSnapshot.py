@@ -0,0 +1,64 @@
+"""
+Exporta un snapshot del grafo a arreglos CSR `.npy` mapeables en memoria
+(ver `store/graphSnapshot.py` en el backend).
+
+Lee el grafo por el mismo `GraphStore` que usa la API: Neo4j según el `.env`, o el store en
+memoria cargado desde una carpeta de CSV con `--csv-dir`.
+
+Uso (desde la raíz del proyecto):
+    python src/utils/exportSnapshot.py --output snapshots/graph
+    python src/utils/exportSnapshot.py --output snapshots/graph --relationships PURCHASED WANTS --chunk-size 50000
+    python src/utils/exportSnapshot.py --output snapshots/graph --csv-dir src/csvData
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from store.graphSnapshot import SNAPSHOT_CHUNK_SIZE, export_snapshot
+from store.memoryStore import MemoryStore
+from store.storeFactory import create_store
+
+load_dotenv()
+
+def print_progress(name, entry):
+    if "nnz" in entry:
+        skipped = f", {entry['skipped']} omitidas" if entry["skipped"] else ""
+        print(f"✅ {name}: {entry['nnz']} relaciones{skipped} en {entry['seconds']:.2f} s")
+    else:
+        print(f"✅ {name}: {entry['count']} nodos en {entry['seconds']:.2f} s")
+
+async def run(args):
+    if args.csv_dir:
+        store = MemoryStore()
+        store.load_csv_folder(args.csv_dir)
+    else:
+        store = create_store("neo4j")
+    try:
+        return await export_snapshot(store, args.output, labels=args.labels, rel_types=args.relationships,
+                                     chunk_size=args.chunk_size, with_properties=not args.no_properties,
+                                     on_progress=print_progress)
+    finally:
+        await store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="Carpeta del snapshot (se reemplaza)")
+    parser.add_argument("--labels", nargs="+", help="Labels a exportar (por defecto todos)")
+    parser.add_argument("--relationships", nargs="+", help="Tipos de relación a exportar (por defecto todos)")
+    parser.add_argument("--chunk-size", type=int, default=SNAPSHOT_CHUNK_SIZE, help="Nodos o relaciones por bloque")
+    parser.add_argument("--no-properties", action="store_true", help="No exportar propiedades numéricas de relaciones")
+    parser.add_argument("--csv-dir", help="Leer desde esta carpeta de CSV en lugar de Neo4j")
+    args = parser.parse_args()
+
+    manifest = asyncio.run(run(args))
+    size = sum(os.path.getsize(os.path.join(args.output, file)) for file in os.listdir(args.output))
+    print(f"\n✅ Snapshot en {args.output}: {len(manifest['labels'])} labels, "
+          f"{len(manifest['relationships'])} relaciones, {size / 1e6:.1f} MB en {manifest['seconds']:.2f} s")
+
+if __name__ == "__main__":
+    main()
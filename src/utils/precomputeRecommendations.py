@@ -0,0 +1,256 @@
+"""
+Cálculo nocturno de las recomendaciones de todos los usuarios.
+
+Hace lo mismo que `GET /recommendations/users/{name}` (mismas señales, pesos y filtro de
+presupuesto, ver `recommendations.userRecommender`) pero para todos los `User` de una vez:
+  1. exporta una sola vez los usuarios, componentes, proveedores y las relaciones PURCHASED,
+     WANTS, SEARCHED y SUPPLIES (de Neo4j o de una carpeta de CSV con `--csv-dir`);
+  2. arma las matrices dispersas usuario×componente y la co-ocurrencia de compras
+     (`recommendations.batchRecommender`);
+  3. reparte los usuarios en rangos de `--block-size` entre `--workers` procesos, que
+     calculan el top-k de cada rango con operaciones de matrices;
+  4. escribe el resultado en Neo4j con `UNWIND` en bloques de `--chunk-size` usuarios, como
+     relaciones `RECOMMENDED` (score, rank, generated_at) o como propiedades del usuario
+     (`recommended`, `recommended_scores`, `recommended_at`). Las recomendaciones anteriores
+     de cada usuario se reemplazan.
+
+Al final reporta el tiempo de cada etapa y usuarios/s.
+
+Uso (desde la raíz del proyecto):
+    python src/utils/precomputeRecommendations.py --workers 8 --k 20
+    python src/utils/precomputeRecommendations.py --csv-dir src/csvData --dry-run --output recs.csv
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+# Las señales y el registro de labels se comparten con la API (src/backend)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from recommendations.batchRecommender import BlockScorer, build_interaction_data
+from store.cypherTemplates import render
+from utils.labelRegistry import LABELS, RELATION_FILES
+
+load_dotenv()
+
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USER = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Relaciones que usan las señales
+EXPORTED_RELATIONS = ("PURCHASED", "WANTS", "SEARCHED", "SUPPLIES")
+
+WRITE_RELATIONSHIPS = """
+UNWIND $rows AS row
+MATCH (u:User {name: row.user})
+CALL {
+    WITH u
+    MATCH (u)-[old:RECOMMENDED]->()
+    DELETE old
+}
+WITH u, row
+UNWIND row.items AS item
+MATCH (c:Component {name: item.name})
+CREATE (u)-[r:RECOMMENDED]->(c)
+SET r.score = item.score, r.rank = item.rank, r.generated_at = $generated_at
+"""
+
+WRITE_PROPERTIES = """
+UNWIND $rows AS row
+MATCH (u:User {name: row.user})
+SET u.recommended = [item IN row.items | item.name],
+    u.recommended_scores = [item IN row.items | item.score],
+    u.recommended_at = $generated_at
+"""
+
+def get_neo4j_driver():
+    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+# ----------------------------------------------------------------- Exportación
+
+def export_from_neo4j(driver):
+    """
+    Lee los nodos y relaciones que usan las señales. Cada consulta se recorre en streaming.
+    """
+    with driver.session() as session:
+        users = [record.data() for record in session.run(
+            "MATCH (u:User) RETURN u.name AS name, u.budget AS budget, u.preferred_brands AS preferred_brands")]
+        components = [record.data() for record in session.run(
+            "MATCH (c:Component) RETURN c.name AS name, c.price AS price")]
+        providers = [record["name"] for record in session.run("MATCH (p:Provider) RETURN p.name AS name")]
+
+        edges = {}
+        for from_label, to_label, rel_type, from_key, to_key in RELATION_FILES.values():
+            if rel_type not in EXPORTED_RELATIONS:
+                continue
+            query = render("stream_relationship_pairs", from_label=from_label, from_key=from_key,
+                           rel_type=rel_type, to_label=to_label, to_key=to_key)
+            edges[rel_type] = [(record["from_value"], record["to_value"]) for record in session.run(query)]
+    return users, components, providers, edges
+
+def export_from_csv(folder):
+    """
+    Lo mismo desde los CSV de `createCSV.py`, sin base de datos (pruebas y benchmarks).
+    """
+    def read(file, columns):
+        return pd.read_csv(os.path.join(folder, file), usecols=columns).dropna(subset=[columns[0]])
+
+    users = read(LABELS["User"].csv_file, ["name", "budget", "preferred_brands"])
+    users = users.astype(object).where(users.notna(), None).to_dict(orient="records")
+    components = read(LABELS["Component"].csv_file, ["name", "price"])
+    components = components.astype(object).where(components.notna(), None).to_dict(orient="records")
+    providers = read(LABELS["Provider"].csv_file, ["name"])["name"].tolist()
+
+    edges = {}
+    for file, (_, _, rel_type, _, _) in RELATION_FILES.items():
+        if rel_type not in EXPORTED_RELATIONS:
+            continue
+        df = pd.read_csv(os.path.join(folder, file))
+        df = df.dropna(subset=[df.columns[0], df.columns[1]])
+        edges[rel_type] = list(zip(df[df.columns[0]], df[df.columns[1]]))
+    return users, components, providers, edges
+
+# ----------------------------------------------------------------- Cálculo
+
+_scorer = None
+
+def _init_worker(scorer):
+    # Con `fork` el scorer se hereda sin copiarse; con `spawn` se serializa una vez por proceso
+    global _scorer
+    _scorer = scorer
+
+def _score_range(task):
+    start, end, k = task
+    return _scorer.score_block(start, end, k)
+
+def score_all(scorer, users, k, workers, block_size):
+    tasks = [(start, min(start + block_size, users), k) for start in range(0, users, block_size)]
+    if workers <= 1:
+        _init_worker(scorer)
+        return [result for task in tasks for result in _score_range(task)]
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    results = []
+    with context.Pool(workers, initializer=_init_worker, initargs=(scorer,)) as pool:
+        for done, block in enumerate(pool.imap_unordered(_score_range, tasks), start=1):
+            results.extend(block)
+            if done % max(1, len(tasks) // 10) == 0:
+                print(f"⏳ {done}/{len(tasks)} rangos de usuarios calculados")
+    return results
+
+def recommendation_rows(data, results):
+    """
+    Una fila por usuario con sus items en orden; los usuarios sin recomendaciones van con la
+    lista vacía para que se borren las anteriores.
+    """
+    items = {user: (components, scores) for user, components, scores in results}
+    for index, user in enumerate(data.users):
+        components, scores = items.get(index, ((), ()))
+        yield {
+            "user": user,
+            "items": [{"name": data.components[component], "score": float(score), "rank": rank}
+                      for rank, (component, score) in enumerate(zip(components, scores), start=1)],
+        }
+
+# ----------------------------------------------------------------- Escritura
+
+def write_recommendations(driver, rows, target, chunk_size):
+    query = WRITE_RELATIONSHIPS if target == "relationships" else WRITE_PROPERTIES
+    generated_at = datetime.now(timezone.utc).isoformat()
+    written = 0
+    chunk = []
+
+    def flush():
+        with driver.session() as session:
+            session.execute_write(lambda tx: tx.run(query, rows=chunk, generated_at=generated_at).consume())
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        flush()
+        written += len(chunk)
+    return written
+
+def write_csv(path, rows):
+    records = [{"user": row["user"], "component": item["name"], "rank": item["rank"], "score": item["score"]}
+               for row in rows for item in row["items"]]
+    pd.DataFrame(records, columns=["user", "component", "rank", "score"]).to_csv(path, index=False)
+    return len(records)
+
+# ----------------------------------------------------------------- CLI
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=10, help="Recomendaciones por usuario")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos de cálculo")
+    parser.add_argument("--block-size", type=int, default=5000, help="Usuarios por rango de cálculo")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Usuarios por transacción de escritura")
+    parser.add_argument("--target", choices=["relationships", "properties"], default="relationships",
+                        help="RECOMMENDED o propiedades del usuario")
+    parser.add_argument("--csv-dir", help="Exportar desde esta carpeta de CSV en lugar de Neo4j")
+    parser.add_argument("--output", help="Guardar también las recomendaciones en este CSV")
+    parser.add_argument("--dry-run", action="store_true", help="No escribir en Neo4j")
+    args = parser.parse_args()
+
+    needs_driver = not args.csv_dir or not args.dry_run
+    driver = get_neo4j_driver() if needs_driver else None
+    timings = {}
+
+    try:
+        started = time.perf_counter()
+        if args.csv_dir:
+            users, components, providers, edges = export_from_csv(args.csv_dir)
+        else:
+            users, components, providers, edges = export_from_neo4j(driver)
+        timings["exportación"] = time.perf_counter() - started
+        print(f"✅ Exportados {len(users)} usuarios, {len(components)} componentes y "
+              f"{sum(len(pairs) for pairs in edges.values())} relaciones.")
+
+        started = time.perf_counter()
+        data = build_interaction_data(users, components, providers, edges)
+        scorer = BlockScorer(data)
+        timings["matrices"] = time.perf_counter() - started
+        print(f"✅ Co-ocurrencia de compras: {scorer.cooccurrence.nnz} celdas.")
+
+        started = time.perf_counter()
+        results = score_all(scorer, len(data.users), args.k, args.workers, args.block_size)
+        timings["cálculo"] = time.perf_counter() - started
+        print(f"✅ {len(results)} usuarios con recomendaciones.")
+
+        if args.output:
+            started = time.perf_counter()
+            count = write_csv(args.output, recommendation_rows(data, results))
+            timings["csv"] = time.perf_counter() - started
+            print(f"✅ {count} recomendaciones guardadas en {args.output}.")
+
+        if not args.dry_run:
+            started = time.perf_counter()
+            written = write_recommendations(driver, recommendation_rows(data, results), args.target, args.chunk_size)
+            timings["escritura"] = time.perf_counter() - started
+            print(f"✅ Recomendaciones de {written} usuarios escritas como {args.target}.")
+    finally:
+        if driver is not None:
+            driver.close()
+
+    total = sum(timings.values())
+    print("\n**Reporte de tiempos**")
+    for stage, seconds in timings.items():
+        print(f"  - {stage}: {seconds:.2f} s")
+    print(f"  - total: {total:.2f} s")
+    print(f"  - usuarios/s (cálculo): {len(data.users) / max(timings['cálculo'], 1e-9):,.0f}")
+    print(f"  - usuarios/s (total): {len(data.users) / max(total, 1e-9):,.0f}")
+
+if __name__ == "__main__":
+    main()